@@ -0,0 +1,220 @@
+import bisect
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import streamlit as st
+
+# Products per page of the coverage heatmap, and the tallest it gets
+COVERAGE_PAGE_ROWS = 40
+MAX_FIGURE_HEIGHT = 800
+
+class AssortmentMatrix:
+    """
+    Sparse product x (city, platform) counts, accumulated by report date.
+
+    Two CSR matrices count how many rows reported the availability of each
+    product in each city-platform cell and how many of them were in stock.
+    Rows without reported availability are left out (see
+    components/quality.py). The matrices are kept as running totals through
+    each report date, so the counts of any date window are one subtraction
+    of two totals, however many dates it spans.
+
+    Rows are products, columns city-platform cells; both indexes only grow,
+    so a later total may be wider or taller and older ones are resized on
+    read. Coverage questions are then row/column slices and sums of a few
+    small sparse matrices instead of filters over the raw frame.
+    """
+
+    def __init__(self):
+        self.last_date = None
+        self.products = []
+        self.product_categories = []
+        self.cells = []
+        self._product_ids = {}
+        self._cell_ids = {}
+        # Report dates in order, and the reported / in-stock totals through each
+        self.dates = []
+        self.reported_totals = []
+        self.in_stock_totals = []
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self):
+        return len(self.products), len(self.cells)
+
+    def _index(self, values, ids, labels, extra=None, extras=None):
+        codes = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            code = ids.get(value)
+            if code is None:
+                code = ids[value] = len(labels)
+                labels.append(value)
+                if extras is not None:
+                    extras.append(extra[i])
+            codes[i] = code
+        return codes
+
+    def update(self, data):
+        """Add one pair of running totals per report date newer than `last_date`."""
+        if data is None or data.empty:
+            return 0
+        new = data[data['Report Date'] > self.last_date] if self.last_date is not None else data
+        if new.empty:
+            return 0
+
+        with self._lock:
+            if self.last_date is not None:
+                new = new[new['Report Date'] > self.last_date]
+                if new.empty:
+                    return 0
+
+            new = new.dropna(subset=['Report Date', 'Product Description', 'City', 'Platform'])
+            # Codes for the distinct values only, then broadcast back to the rows
+            product_codes, products = pd.factorize(new['Product Description'])
+            categories = new.groupby(product_codes)['Category'].first().to_numpy()
+            rows = self._index(products, self._product_ids, self.products, categories, self.product_categories)[product_codes]
+            cell_codes, cells = pd.MultiIndex.from_frame(new[['City', 'Platform']]).factorize()
+            cols = self._index(list(cells), self._cell_ids, self.cells)[cell_codes]
+
+            reported = new['Stock Availability (Y/N)'].notna().to_numpy(dtype=np.int32)
+            in_stock = new['Stock Availability (Y/N)'].eq('Yes').to_numpy(dtype=np.int32)
+            dates = new['Report Date'].to_numpy()
+            shape = self.shape
+            for date in np.unique(dates):
+                today = dates == date
+                # COO -> CSR sums duplicate (product, cell) rows into one count
+                reported_today = sp.csr_matrix((reported[today], (rows[today], cols[today])), shape=shape)
+                in_stock_today = sp.csr_matrix((in_stock[today], (rows[today], cols[today])), shape=shape)
+                self.reported_totals.append(self._total_before(self.reported_totals, len(self.dates), shape) + reported_today)
+                self.in_stock_totals.append(self._total_before(self.in_stock_totals, len(self.dates), shape) + in_stock_today)
+                self.reported_totals[-1].eliminate_zeros()
+                self.in_stock_totals[-1].eliminate_zeros()
+                self.dates.append(pd.Timestamp(date))
+            self.last_date = new['Report Date'].max()
+            return len(np.unique(dates))
+
+    # ---------- Queries ----------
+
+    def window(self, date_from=None, date_to=None):
+        """Summed (reported, in_stock) matrices over the report dates in the window."""
+        shape = self.shape
+        start = 0 if date_from is None else bisect.bisect_left(self.dates, pd.Timestamp(date_from))
+        end = len(self.dates) if date_to is None else bisect.bisect_right(self.dates, pd.Timestamp(date_to))
+        end = max(start, end)
+        # Total through the last date in the window minus the total before its first
+        reported = self._total_before(self.reported_totals, end, shape) - self._total_before(self.reported_totals, start, shape)
+        in_stock = self._total_before(self.in_stock_totals, end, shape) - self._total_before(self.in_stock_totals, start, shape)
+        return reported.tocsr(), in_stock.tocsr()
+
+    def _total_before(self, totals, position, shape):
+        # Running total over the first `position` report dates
+        if position == 0:
+            return sp.csr_matrix(shape, dtype=np.int32)
+        return self._resized(totals[position - 1], shape)
+
+    @staticmethod
+    def _resized(matrix, shape):
+        if matrix.shape == shape:
+            return matrix
+        matrix = matrix.copy()
+        matrix.resize(shape)
+        return matrix
+
+    def _cell_mask(self, cities=None, platforms=None):
+        mask = np.ones(len(self.cells), dtype=bool)
+        if cities:
+            mask &= np.isin([city for city, _ in self.cells], list(cities))
+        if platforms:
+            mask &= np.isin([platform for _, platform in self.cells], list(platforms))
+        return mask
+
+    def out_of_stock_cities(self, product, platforms=None, date_from=None, date_to=None):
+        """Cities where `product` was reported but never in stock during the window."""
+        row = self._product_ids.get(product)
+        if row is None:
+            return []
+        reported, in_stock = self.window(date_from, date_to)
+        reported, in_stock = reported.getrow(row).toarray().ravel(), in_stock.getrow(row).toarray().ravel()
+        hit = (reported > 0) & (in_stock == 0) & self._cell_mask(platforms=platforms)
+        return sorted({self.cells[i][0] for i in np.flatnonzero(hit)})
+
+    def missing_products(self, city, platforms=None, categories=None, date_from=None, date_to=None):
+        """
+        Products dropped from the assortment of `city` (on the given
+        platforms): listed there on a report date before the window, but
+        never in stock during it. Products never listed in `city` before
+        the window are not counted.
+        """
+        cols = np.flatnonzero(self._cell_mask(cities=[city], platforms=platforms))
+        if date_from is None:
+            return []
+        earlier, _ = self.window(date_to=pd.Timestamp(date_from) - pd.Timedelta(days=1))
+        _, in_stock = self.window(date_from, date_to)
+        listed = np.asarray(earlier[:, cols].sum(axis=1)).ravel()
+        stocked = np.asarray(in_stock[:, cols].sum(axis=1)).ravel()
+        missing = (listed > 0) & (stocked == 0)
+        if categories:
+            missing &= np.isin(self.product_categories, list(categories))
+        return [self.products[i] for i in np.flatnonzero(missing)]
+
+    def coverage(self, date_from=None, date_to=None, platforms=None, categories=None):
+        """
+        Availability percentage per product x city over the window, summed
+        across the selected platforms. NaN where availability was never reported.
+        """
+        reported, in_stock = self.window(date_from, date_to)
+        cell_mask = self._cell_mask(platforms=platforms)
+        cities = sorted({city for city, _ in self.cells})
+        city_pos = {city: i for i, city in enumerate(cities)}
+
+        # Sparse cells -> cities indicator: one matrix product folds platforms into cities
+        cell_ids = np.flatnonzero(cell_mask)
+        to_city = sp.csr_matrix(
+            (np.ones(len(cell_ids), dtype=np.int32), (cell_ids, [city_pos[self.cells[i][0]] for i in cell_ids])),
+            shape=(len(self.cells), len(cities)),
+        )
+        rows = np.arange(len(self.products))
+        if categories:
+            rows = rows[np.isin(self.product_categories, list(categories))]
+        reported_city = (reported[rows] @ to_city).toarray()
+        in_stock_city = (in_stock[rows] @ to_city).toarray()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            percentage = np.where(reported_city > 0, in_stock_city / reported_city * 100, np.nan)
+        return pd.DataFrame(percentage.round(2), index=[self.products[i] for i in rows], columns=cities)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_assortment(file_path, mtime):
+    return AssortmentMatrix()
+
+
+def load_assortment(file_path):
+    """
+    Assortment matrices for the current version of `file_path`. Running
+    totals are chained date by date, so a corrected workbook (new mtime)
+    starts a fresh chain rather than patching an old total.
+    """
+    return _load_assortment(file_path, os.path.getmtime(file_path))
+
+
+def rank_by_gaps(coverage):
+    """
+    Coverage rows with the largest availability shortfall (mean of 100 minus
+    availability over the cities that reported) first; products never
+    reported go last.
+    """
+    shortfall = (100 - coverage).mean(axis=1)
+    return coverage.loc[shortfall.sort_values(ascending=False, na_position='last', kind='stable').index]
+
+
+def coverage_figure(coverage):
+    import plotly.express as px
+
+    fig = px.imshow(coverage, color_continuous_scale="RdYlGn", zmin=0, zmax=100, aspect="auto",
+                    labels={"x": "City", "y": "Product", "color": "Availability %"})
+    fig.update_layout(title="Product Coverage by City",
+                      height=min(MAX_FIGURE_HEIGHT, max(400, 18 * len(coverage))))
+    return fig
@@ -0,0 +1,165 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+KEYS = ['Product Description', 'City', 'Platform', 'Category']
+WINDOWS = (7, 14, 30)
+HORIZON = max(WINDOWS)
+
+
+class AvailabilityWindowStore:
+    """
+    Rolling availability per product x city x platform.
+
+    Every key owns a ring buffer of HORIZON daily slots holding the number
+    of rows seen and rows in stock that day, indexed by day number modulo
+    HORIZON. A new report date clears the slots it skips over and fills its
+    own, so the 7/14/30-day ratios are sums over a few slots and never touch
+    the history again. Alongside the rings each key keeps the first day of
+    its current stock-out run, which ends as soon as a report date shows the
+    key in stock or leaves it out. Rows without reported availability are
+    not counted as seen (see components/quality.py).
+    """
+
+    def __init__(self):
+        self.last_day = None
+        self.keys = pd.DataFrame(columns=KEYS)
+        self._key_ids = {}
+        self.seen = np.zeros((0, HORIZON), dtype=np.int32)
+        self.in_stock = np.zeros((0, HORIZON), dtype=np.int32)
+        self.out_since = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @property
+    def last_date(self):
+        return None if self.last_day is None else pd.Timestamp(self.last_day, unit='D')
+
+    def _ids(self, frame):
+        # Map each key to its ring row, growing the rings for unseen keys
+        codes, uniques = pd.MultiIndex.from_frame(frame[KEYS]).factorize()
+        new = [key for key in uniques if key not in self._key_ids]
+        if new:
+            for key in new:
+                self._key_ids[key] = len(self._key_ids)
+            added = pd.DataFrame(new, columns=KEYS)
+            self.keys = added if self.keys.empty else pd.concat([self.keys, added], ignore_index=True)
+            grow = np.zeros((len(new), HORIZON), dtype=np.int32)
+            self.seen = np.vstack([self.seen, grow])
+            self.in_stock = np.vstack([self.in_stock, grow])
+            self.out_since = np.concatenate([self.out_since, np.full(len(new), -1, dtype=np.int64)])
+        return np.array([self._key_ids[key] for key in uniques], dtype=np.int64)[codes]
+
+    def _advance(self, day):
+        # Clear the slots of every day between the last report date and `day`
+        if self.last_day is None:
+            return
+        skipped = np.arange(self.last_day + 1, min(day, self.last_day + HORIZON) + 1) % HORIZON
+        self.seen[:, skipped] = 0
+        self.in_stock[:, skipped] = 0
+
+    def update(self, data):
+        """Fold every report date newer than `last_date` into the rings, oldest first."""
+        if data is None or data.empty:
+            return 0
+        new = data[data['Report Date'] > self.last_date] if self.last_day is not None else data
+        if new.empty:
+            return 0
+
+        with self._lock:
+            if self.last_day is not None:
+                new = new[new['Report Date'] > self.last_date]
+                if new.empty:
+                    return 0
+
+            new = new.dropna(subset=KEYS + ['Report Date'])
+            ids = self._ids(new)
+            days = new['Report Date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+            known = new['Stock Availability (Y/N)'].notna().to_numpy(dtype=np.int32)
+            available = new['Stock Availability (Y/N)'].eq('Yes').to_numpy(dtype=np.int32)
+
+            for day in np.unique(days):
+                today = days == day
+                self._advance(day)
+                slot = day % HORIZON
+                seen = np.bincount(ids[today], weights=known[today], minlength=len(self.out_since))
+                stocked = np.bincount(ids[today], weights=available[today], minlength=len(self.out_since))
+                self.seen[:, slot] += seen.astype(np.int32)
+                self.in_stock[:, slot] += stocked.astype(np.int32)
+
+                # Keys out of stock today start or extend their run; keys in stock
+                # or missing from this report date end it, their state is not known
+                out = (seen > 0) & (stocked == 0)
+                self.out_since[out & (self.out_since < 0)] = day
+                self.out_since[~out] = -1
+                self.last_day = int(day)
+            return len(np.unique(days))
+
+    def _mask(self, products=None, platforms=None, categories=None, cities=None):
+        mask = np.ones(len(self.keys), dtype=bool)
+        for col, values in (('Product Description', products), ('Platform', platforms),
+                            ('Category', categories), ('City', cities)):
+            if values:
+                mask &= self.keys[col].isin(values).to_numpy()
+        return mask
+
+    def _window_slots(self, window):
+        return (self.last_day - np.arange(window)) % HORIZON
+
+    def rolling(self, window, group_by=None, **filters):
+        """
+        Availability percentage over the last `window` days up to the latest
+        report date, for the filtered keys, overall or per `group_by` column.
+        """
+        if self.last_day is None:
+            return None if group_by is None else pd.DataFrame(columns=[group_by, 'availability_percentage'])
+        mask = self._mask(**filters)
+        slots = self._window_slots(window)
+        seen = self.seen[mask][:, slots].sum(axis=1)
+        in_stock = self.in_stock[mask][:, slots].sum(axis=1)
+
+        if group_by is None:
+            total = seen.sum()
+            return round(in_stock.sum() / total * 100, 2) if total else None
+
+        grouped = pd.DataFrame({group_by: self.keys.loc[mask, group_by].to_numpy(), 'seen': seen, 'in_stock': in_stock})
+        grouped = grouped.groupby(group_by).sum()
+        grouped = grouped[grouped['seen'] > 0]
+        return (grouped['in_stock'] / grouped['seen'] * 100).round(2).rename('availability_percentage').reset_index()
+
+    def _streak_days(self):
+        # Calendar days from the start of each run to the latest report date, 0 when not out
+        if self.last_day is None:
+            return np.zeros(len(self.out_since), dtype=np.int64)
+        return np.where(self.out_since >= 0, self.last_day - self.out_since + 1, 0)
+
+    def streaks(self, group_by=None, **filters):
+        """
+        Current stock-out run in calendar days up to the latest report date:
+        longest run and number of keys out of stock on that date, overall or
+        per `group_by`.
+        """
+        mask = self._mask(**filters)
+        streak = self._streak_days()[mask]
+        if group_by is None:
+            return {'longest': int(streak.max()) if streak.size else 0, 'out_now': int((streak > 0).sum())}
+        grouped = pd.DataFrame({group_by: self.keys.loc[mask, group_by].to_numpy(), 'streak': streak})
+        return grouped.groupby(group_by)['streak'].agg(
+            longest_streak='max', out_now=lambda s: int((s > 0).sum())
+        ).reset_index()
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_availability_windows(file_path, mtime):
+    return AvailabilityWindowStore()
+
+
+def load_availability_windows(file_path):
+    """
+    Availability rings for the current version of `file_path`. Slot counts
+    are added to, never replaced, so a corrected workbook (new mtime) gets
+    empty rings instead of double-counting the dates it shares with the old one.
+    """
+    return _load_availability_windows(file_path, os.path.getmtime(file_path))
@@ -0,0 +1,158 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+KEYS = ['Platform', 'City', 'Product Description']
+CHANGE_COLUMNS = ['Report Date', 'Previous Date', 'Category'] + KEYS + ['Change', 'Before', 'After', 'Delta']
+
+# Ignore float noise from averaging pincode-level rows
+PRICE_TOLERANCE = 0.01
+DISCOUNT_TOLERANCE = 0.01
+
+
+def snapshot(rows):
+    """
+    Collapse one report date to a single row per Platform/City/Product:
+    mean selling price and discount over its pincodes, and whether the
+    product was in stock anywhere in the city (NaN when never reported).
+    """
+    stock = rows['Stock Availability (Y/N)']
+
+    frame = pd.DataFrame({
+        'Category': rows['Category'],
+        'Platform': rows['Platform'],
+        'City': rows['City'],
+        'Product Description': rows['Product Description'],
+        'price': rows['Selling Price'],
+        'discount': rows['Discount'],
+        'in_stock': (stock == 'Yes').astype(float),
+        'stock_known': stock.notna().astype(float),
+    })
+    snap = frame.groupby(KEYS, sort=False).agg(
+        Category=('Category', 'first'),
+        price=('price', 'mean'),
+        discount=('discount', 'mean'),
+        in_stock=('in_stock', 'max'),
+        stock_known=('stock_known', 'max'),
+    )
+    snap['in_stock'] = snap['in_stock'].where(snap['stock_known'] > 0)
+    return snap.drop(columns='stock_known')
+
+
+def diff_snapshots(previous, current, previous_date, current_date):
+    """
+    Compact change rows between two snapshots, outer-joined on KEYS. A key
+    only in the current snapshot is an "Added" listing, one only in the
+    previous snapshot a "Removed" one; Before / After carry its price.
+    """
+    joined = previous.merge(current, how='outer', left_index=True, right_index=True,
+                            suffixes=('_prev', '_curr'), indicator=True)
+    if joined.empty:
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+    joined['Category_curr'] = joined['Category_curr'].fillna(joined['Category_prev'])
+
+    price_moved = (joined['price_curr'] - joined['price_prev']).abs() > PRICE_TOLERANCE
+    discount_moved = (joined['discount_curr'] - joined['discount_prev']).abs() > DISCOUNT_TOLERANCE
+    stock_known = joined['in_stock_prev'].notna() & joined['in_stock_curr'].notna()
+    stock_flipped = stock_known & (joined['in_stock_prev'] != joined['in_stock_curr'])
+
+    parts = []
+    for change, mask, before, after in (
+        ('Price', price_moved, 'price_prev', 'price_curr'),
+        ('Discount', discount_moved, 'discount_prev', 'discount_curr'),
+        ('Stock', stock_flipped, 'in_stock_prev', 'in_stock_curr'),
+        ('Added', joined['_merge'].eq('right_only'), 'price_prev', 'price_curr'),
+        ('Removed', joined['_merge'].eq('left_only'), 'price_prev', 'price_curr'),
+    ):
+        if not mask.any():
+            continue
+        hit = joined[mask]
+        part = pd.DataFrame({
+            'Category': hit['Category_curr'],
+            'Change': change,
+            'Before': hit[before],
+            'After': hit[after],
+        }, index=hit.index)
+        if change == 'Stock':
+            part['Change'] = np.where(hit[after] > 0, 'Stock In', 'Stock Out')
+        parts.append(part)
+
+    if not parts:
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+
+    changes = pd.concat(parts).reset_index()
+    changes['Delta'] = changes['After'] - changes['Before']
+    changes['Report Date'] = current_date
+    changes['Previous Date'] = previous_date
+    return changes[CHANGE_COLUMNS]
+
+
+class ChangeFeed:
+    """
+    Price, discount and stock changes between consecutive report dates.
+
+    Only the latest snapshot is kept around: each new report date is
+    collapsed to one row per key and diffed against it, so the cost of an
+    update is proportional to the new day's rows, not the history.
+    """
+
+    def __init__(self):
+        self.last_date = None
+        self.previous = None
+        self.changes = pd.DataFrame(columns=CHANGE_COLUMNS)
+        self._lock = threading.Lock()
+
+    def update(self, data):
+        """Diff every report date newer than `last_date`, oldest first."""
+        if data is None or data.empty:
+            return 0
+        new = data[data['Report Date'] > self.last_date] if self.last_date is not None else data
+        if new.empty:
+            return 0
+
+        with self._lock:
+            if self.last_date is not None:
+                new = new[new['Report Date'] > self.last_date]
+            emitted = []
+            for report_date, rows in new.groupby('Report Date', sort=True):
+                current = snapshot(rows)
+                if self.previous is not None:
+                    emitted.append(diff_snapshots(self.previous, current, self.last_date, report_date))
+                self.previous = current
+                self.last_date = report_date
+
+            emitted = [frame for frame in emitted if not frame.empty]
+            if emitted:
+                self.changes = pd.concat([self.changes] + emitted, ignore_index=True) if not self.changes.empty \
+                    else pd.concat(emitted, ignore_index=True)
+            return sum(len(frame) for frame in emitted)
+
+    def query(self, date_from=None, date_to=None, categories=None, platforms=None, cities=None, change_types=None):
+        changes = self.changes
+        mask = pd.Series(True, index=changes.index)
+        if date_from is not None:
+            mask &= changes['Report Date'] >= pd.Timestamp(date_from)
+        if date_to is not None:
+            mask &= changes['Report Date'] <= pd.Timestamp(date_to)
+        for col, values in (('Category', categories), ('Platform', platforms),
+                            ('City', cities), ('Change', change_types)):
+            if values:
+                mask &= changes[col].isin(values)
+        return changes[mask]
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_change_feed(file_path, mtime):
+    return ChangeFeed()
+
+
+def load_change_feed(file_path):
+    """
+    Change feed for the current version of `file_path`. Each report date is
+    diffed once against the one before it, so a corrected workbook (new
+    mtime) gets a fresh feed instead of keeping diffs of the old rows.
+    """
+    return _load_change_feed(file_path, os.path.getmtime(file_path))
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+WINDOWS = ("Current", "Previous")
+MEASURES = ["Availability %", "Stock-Out %", "Avg Selling Price", "Avg Discount %", "Rows"]
+
+
+def window_labels(dates, current, previous):
+    """'Current' / 'Previous' per row, '' outside both. Overlapping days count as current."""
+    conditions = [
+        dates.between(pd.Timestamp(current[0]), pd.Timestamp(current[1])).to_numpy(),
+        dates.between(pd.Timestamp(previous[0]), pd.Timestamp(previous[1])).to_numpy(),
+    ]
+    return np.select(conditions, WINDOWS, default="")
+
+
+def date_span(current, previous):
+    """From/to strings covering both windows, in the pages' '%d/%m/%Y' format."""
+    start = min(current[0], previous[0]).strftime('%d/%m/%Y')
+    end = max(current[1], previous[1]).strftime('%d/%m/%Y')
+    return start, end
+
+
+def _measures(sums):
+    # Ratios from additive sums, so totals can be re-derived from any breakdown
+    availability = sums["available"] / sums["reported"].where(sums["reported"] > 0) * 100
+    return pd.DataFrame({
+        "Availability %": availability,
+        "Stock-Out %": 100 - availability,
+        "Avg Selling Price": sums["price_sum"] / sums["price_count"],
+        "Avg Discount %": sums["discount_sum"] / sums["discount_count"],
+        "Rows": sums["rows"],
+    }).round(2)
+
+
+def _side_by_side(measures):
+    # (group, window) rows -> one row per group with Current, Previous and Δ per measure
+    wide = measures.unstack("window").reindex(columns=pd.MultiIndex.from_product([MEASURES, WINDOWS]))
+    for measure in MEASURES:
+        wide[(measure, "Δ")] = (wide[(measure, "Current")] - wide[(measure, "Previous")]).round(2)
+    return wide.reindex(columns=pd.MultiIndex.from_product([MEASURES, WINDOWS + ("Δ",)]))
+
+
+def compare(rows, current, previous, by):
+    """
+    Both windows' KPIs from one groupby over `rows`, labelled by window.
+
+    Returns (overall, breakdown): overall has a Current / Previous / Δ
+    value per measure (None when neither window has rows), breakdown the
+    same per `by` value. Availability is over rows with reported
+    availability only, as on the pages.
+    """
+    window = window_labels(rows["Report Date"], current, previous)
+    frame = pd.DataFrame({
+        by: rows[by].to_numpy(),
+        "window": window,
+        "available": rows["Stock Availability (Y/N)"].eq("Yes").to_numpy(),
+        "reported": rows["Stock Availability (Y/N)"].notna().to_numpy(),
+        "Selling Price": rows["Selling Price"].to_numpy(),
+        "Discount": rows["Discount"].to_numpy(),
+    })
+    frame = frame[frame["window"] != ""]
+
+    # The single pass over the rows: additive sums per group and window
+    sums = frame.groupby([by, "window"], observed=True).agg(
+        rows=("available", "size"),
+        available=("available", "sum"),
+        reported=("reported", "sum"),
+        price_sum=("Selling Price", "sum"),
+        price_count=("Selling Price", "count"),
+        discount_sum=("Discount", "sum"),
+        discount_count=("Discount", "count"),
+    )
+    overall = sums.groupby(level="window").sum()
+    overall.index = pd.MultiIndex.from_product([["All"], overall.index], names=[by, "window"])
+    overall = _side_by_side(_measures(overall))
+    return (None if overall.empty else overall.iloc[0]), _side_by_side(_measures(sums))
+
+
+def comparison_windows(data, key):
+    """Sidebar toggle plus the two date windows; None while comparison is off."""
+    if not st.sidebar.toggle("Compare periods", key=f"{key}_compare"):
+        return None
+    latest = data["Report Date"].max().date()
+    current = st.sidebar.date_input("Current period", value=(latest - timedelta(days=6), latest), key=f"{key}_current")
+    previous = st.sidebar.date_input("Previous period", value=(latest - timedelta(days=13), latest - timedelta(days=7)),
+                                     key=f"{key}_previous")
+    if len(current) != 2 or len(previous) != 2:
+        st.sidebar.info("Pick a start and an end date for both periods.")
+        return None
+    return current, previous
+
+
+def show_comparison(rows, windows, by):
+    """Render the comparison of `rows` (already filtered to both windows' span) by `by`."""
+    current, previous = windows
+    st.subheader(f"Period Comparison by {by}")
+    st.caption(f"Current {current[0]:%d/%m/%Y} - {current[1]:%d/%m/%Y} vs "
+               f"previous {previous[0]:%d/%m/%Y} - {previous[1]:%d/%m/%Y}")
+    overall, breakdown = compare(rows, current, previous, by)
+    if breakdown.empty:
+        st.warning("No data in either period for the selected filters.")
+        return overall, breakdown
+
+    for measure, col in zip(MEASURES, st.columns(len(MEASURES))):
+        value, delta = overall[(measure, "Current")], overall[(measure, "Δ")]
+        digits = 0 if measure == "Rows" else 2
+        col.metric(measure, "NA" if pd.isna(value) else f"{value:,.{digits}f}",
+                   None if pd.isna(delta) else f"{delta:+,.{digits}f}",
+                   # Stock-outs going up is the bad direction
+                   delta_color="inverse" if measure == "Stock-Out %" else "normal")
+    breakdown.columns = [f"{measure} {window}" for measure, window in breakdown.columns]
+    st.dataframe(breakdown)
+    return overall, breakdown
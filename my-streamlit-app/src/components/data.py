@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from components.quality import known_cities, publish, validate_competition
+
+# With copy-on-write, filtering, renaming and assign() share memory with the
+# source frame until something is actually written, and a write never leaks
+# back into the frame it was derived from. That is what makes it safe to hand
+# the same cached frame to every session without defensive copies.
+pd.set_option("mode.copy_on_write", True)
+
+
+@st.cache_resource(show_spinner="Loading competition data...", max_entries=4)
+def _load_competition(file_path, mtime):
+    raw = pd.read_excel(file_path)
+    # Parsing, typing and validation happen once here, never by the pages;
+    # unreadable rows are quarantined and out-of-range values blanked before any page sees them
+    data, issues, summary = validate_competition(raw, known_cities())
+    report = publish("competition", issues, summary, len(raw))
+    return data, issues, report
+
+
+def load_competition(file_path):
+    """
+    Shared, read-only competition frame.
+
+    One parsed, validated frame per file version lives in the resource cache for all
+    sessions. Callers get a shallow copy-on-write view: reading is free, and
+    any column they add or value they set stays local to their view.
+    """
+    if not os.path.exists(file_path):
+        st.error(f"Source data file not found: {file_path}")
+        return None
+    return _load_competition(file_path, os.path.getmtime(file_path))[0].copy(deep=False)
+
+
+def load_quality(file_path):
+    """
+    Rows with issues (raw values plus Reasons and Action columns) and the
+    quality report of the current version of `file_path`, or None if it is
+    missing.
+    """
+    if not os.path.exists(file_path):
+        return None
+    _, issues, report = _load_competition(file_path, os.path.getmtime(file_path))
+    return issues, report
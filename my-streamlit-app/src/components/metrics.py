@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pandas as pd
+
+from components.quality import availability_flags
+
+# Competition KPIs and brand tables shared by the pages and export_reports.py.
+# Plain pandas only (no Streamlit, no plotting), so batch workers can import
+# them without pulling in the UI.
+#
+# All helpers only read `data` and index it with a single boolean mask,
+# so the shared frame is never copied or modified.
+
+
+def date_filter(fd,td,filtered_data):
+    fd = datetime.strptime(fd, '%d/%m/%Y')
+    td = datetime.strptime(td, '%d/%m/%Y')
+    return filtered_data[(filtered_data['Report Date'] >= fd) & (filtered_data['Report Date'] <= td)]
+
+def filter_rows(data, from_date, to_date, product_filters=None, platform_filters=None, category_filters=None):
+    mask = pd.Series(True, index=data.index)
+    if product_filters and "All products" not in product_filters:
+        mask &= data['Product Description'].isin(product_filters)
+    if category_filters and "All categories" not in category_filters:
+        mask &= data['Category'].isin(category_filters)
+    if platform_filters and "All platforms" not in platform_filters:
+        mask &= data['Platform'].isin(platform_filters)
+    return date_filter(from_date, to_date, data[mask])
+
+def calculate_stock_out_percentage(data,selected_date_from,selected_date_to, product_filters=None, platform_filters=None, category_filters=None):
+    if data is None:
+        return None
+
+    df = filter_rows(data, selected_date_from, selected_date_to, product_filters, platform_filters, category_filters)
+    # Calculate stock-out percentage over rows with reported availability
+    total_count = int(df['Stock Availability (Y/N)'].notna().sum())
+    stock_out_count = int(df['Stock Availability (Y/N)'].eq('No').sum())
+
+    stock_out_percentage = (stock_out_count / total_count * 100) if total_count > 0 else 0
+
+    return round(stock_out_percentage, 2)
+
+def average_sale_price(data,selected_date_from,selected_date_to, product_filters=None, platform_filters=None, category_filters=None):
+    if data is None:
+        return None
+
+    df = filter_rows(data, selected_date_from, selected_date_to, product_filters, platform_filters, category_filters)
+
+    # Calculate average selling price
+    avg_price = df['Selling Price'].mean()
+    return round(avg_price, 2)
+
+def average_discount(data, selected_date_from,selected_date_to,product_filters=None, platform_filters=None, category_filters=None):
+    if data is None:
+        return None
+
+    df = filter_rows(data, selected_date_from, selected_date_to, product_filters, platform_filters, category_filters)
+
+    # Discount is parsed to numbers once at load time
+    avg_discount = df['Discount'].mean(skipna=True)  # Ignore NaN values
+    return round(avg_discount, 2) if not pd.isna(avg_discount) else 0  # Return 0 if all values are NaN
+
+def brand_discount_availability_table(filtered_data):
+    # Calculate average discount percentage
+    avg_discount = filtered_data.groupby('Brand Name')['Discount'].mean().reset_index()
+
+    # Calculate availability percentage for each brand
+    # Rows without reported availability are left out (see components/quality.py)
+    availability_percentage = (availability_flags(filtered_data['Stock Availability (Y/N)']).groupby(filtered_data['Brand Name']).mean() * 100
+                               ).reset_index(name='Availability Percentage')
+    availability_percentage.columns = ['Brand Name', 'Availability Percentage']
+
+    # Merge the two dataframes
+    return pd.merge(avg_discount, availability_percentage, on='Brand Name')
+
+def brand_price_table(filtered_data):
+    # Rename the column to remove special symbols
+    filtered_data = filtered_data.rename(columns={'MRP (₹)': 'MRP'})
+    # Group by 'Brand Name' and calculate the mean of 'Selling Price' and 'MRP'
+    return filtered_data.groupby('Brand Name')[['Selling Price', 'MRP']].mean().reset_index()
+
+def aggregate_kpis(aggregate, selected_date_from, selected_date_to, product_filters=None, platform_filters=None, category_filters=None):
+    """
+    Stock-out percentage, average selling price and average discount from a
+    materialized aggregate (components/usage_log.py), with the same filters
+    and rounding as the row-level helpers above.
+    """
+    df = filter_rows(aggregate, selected_date_from, selected_date_to, product_filters, platform_filters, category_filters)
+    known = int(df['known'].sum())
+    price_count = int(df['price_count'].sum())
+    discount_count = int(df['discount_count'].sum())
+    return {
+        'stock_out': round((known - int(df['available'].sum())) / known * 100, 2) if known > 0 else 0,
+        'avg_price': round(df['price_sum'].sum() / price_count, 2) if price_count > 0 else float('nan'),
+        'avg_discount': round(df['discount_sum'].sum() / discount_count, 2) if discount_count > 0 else 0,
+    }
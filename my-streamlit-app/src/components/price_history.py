@@ -0,0 +1,171 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Pandas period frequency per resolution, finest first
+RESOLUTIONS = {
+    "day": "D",
+    "week": "W-SUN",
+    "month": "M",
+    "quarter": "Q",
+}
+KEYS = ['Category', 'Platform', 'City', 'Product Description']
+STATS = ['min', 'max', 'sum', 'count', 'last', 'last_date']
+# Column types of a level, so an empty level concatenates like a filled one
+LEVEL_DTYPES = {**{key: object for key in KEYS}, 'period': 'datetime64[ns]', 'min': float, 'max': float,
+                'sum': float, 'count': 'int64', 'last': float, 'last_date': 'datetime64[ns]'}
+
+
+def _empty_level():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in LEVEL_DTYPES.items()})
+
+
+def _combine(frame, keys):
+    # Merge partial aggregates that share a key; "last" follows the latest date
+    frame = frame.sort_values('last_date', kind='stable')
+    grouped = frame.groupby(keys, observed=True, sort=False)
+    return grouped.agg(
+        min=('min', 'min'),
+        max=('max', 'max'),
+        sum=('sum', 'sum'),
+        count=('count', 'sum'),
+        last=('last', 'last'),
+        last_date=('last_date', 'max'),
+    ).reset_index()
+
+
+class PriceHistoryStore:
+    """
+    Selling-price pyramid per Category x Platform x City x Product.
+
+    Each resolution keeps one row per key and period with min, max, sum,
+    count and last price, so means can be re-aggregated exactly across keys.
+    `update` only folds in report dates newer than the ones already seen and
+    only the trailing period of each level is ever rewritten.
+    """
+
+    def __init__(self, value_col='Selling Price', date_col='Report Date'):
+        self.value_col = value_col
+        self.date_col = date_col
+        self.last_date = None
+        self.levels = {res: _empty_level() for res in RESOLUTIONS}
+        self._lock = threading.Lock()
+
+    def update(self, data):
+        """Fold report dates newer than `last_date` into every level."""
+        if data is None or data.empty:
+            return 0
+        dates = data[self.date_col]
+        new = data[dates > self.last_date] if self.last_date is not None else data
+        new = new.dropna(subset=[self.date_col, self.value_col])
+        if new.empty:
+            return 0
+
+        with self._lock:
+            # Re-check under the lock, another session may have ingested already
+            if self.last_date is not None:
+                new = new[new[self.date_col] > self.last_date]
+                if new.empty:
+                    return 0
+
+            new = new[KEYS + [self.date_col, self.value_col]].sort_values(self.date_col, kind='stable')
+            daily = new.assign(period=new[self.date_col].dt.normalize())
+            daily = daily.groupby(KEYS + ['period'], observed=True, sort=False).agg(
+                min=(self.value_col, 'min'),
+                max=(self.value_col, 'max'),
+                sum=(self.value_col, 'sum'),
+                count=(self.value_col, 'count'),
+                last=(self.value_col, 'last'),
+                last_date=(self.date_col, 'max'),
+            ).reset_index().astype(LEVEL_DTYPES)
+
+            for res, freq in RESOLUTIONS.items():
+                partial = daily.assign(period=daily['period'].dt.to_period(freq).dt.start_time)
+                level = self.levels[res]
+                # Only periods at or after the first new one can overlap
+                first_period = partial['period'].min()
+                touched = level['period'] >= first_period if not level.empty else np.zeros(0, dtype=bool)
+                merged = _combine(pd.concat([level[touched], partial], ignore_index=True), KEYS + ['period'])
+                self.levels[res] = pd.concat([level[~touched], merged], ignore_index=True).astype(LEVEL_DTYPES)
+
+            self.last_date = new[self.date_col].max()
+        return len(new)
+
+    def choose_resolution(self, start, end, max_points=120):
+        """Finest resolution that keeps the window under `max_points` periods."""
+        for res, freq in RESOLUTIONS.items():
+            periods = pd.period_range(start, end, freq=freq)
+            if len(periods) <= max_points:
+                return res
+        return list(RESOLUTIONS)[-1]
+
+    def query(self, start, end, resolution=None, group_by='Platform', categories=None,
+              platforms=None, cities=None, products=None, max_points=120):
+        """
+        Price series between `start` and `end` (inclusive), one line per
+        `group_by` value. Returns `(resolution, frame)` where the frame has
+        period, group, min, mean, max and last columns; `last` is each
+        listing's (KEYS) price on its latest report date in the period,
+        averaged over the group's listings.
+
+        Coarse periods that lie wholly inside the window come from their
+        level; the (at most two) that straddle an edge are rebuilt from the
+        daily level, so no price from outside the window is counted.
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end)
+        resolution = resolution or self.choose_resolution(start, end, max_points)
+        freq = RESOLUTIONS[resolution]
+
+        def select(level, lo, hi):
+            mask = (level['period'] >= lo) & (level['period'] <= hi)
+            for col, values in (('Category', categories), ('Platform', platforms),
+                                ('City', cities), ('Product Description', products)):
+                if values:
+                    mask &= level[col].isin(values)
+            return level[mask]
+
+        if resolution == "day":
+            rows = select(self.levels[resolution], start, end)
+        else:
+            # Periods fully inside [start, end], then the edge periods from daily rows
+            level = self.levels[resolution]
+            inside = select(level, start, end)
+            inside = inside[inside['period'].dt.to_period(freq).dt.end_time.dt.normalize() <= end]
+            daily = select(self.levels["day"], start, end)
+            edges = daily.assign(period=daily['period'].dt.to_period(freq).dt.start_time)
+            edges = edges[~edges['period'].isin(inside['period'].unique())]
+            rows = pd.concat([frame for frame in (inside, edges) if not frame.empty] or [inside], ignore_index=True)
+        if rows.empty:
+            return resolution, pd.DataFrame(columns=['period', group_by, 'min', 'mean', 'max', 'last'])
+
+        series = rows.groupby(['period', group_by], observed=True).agg(
+            min=('min', 'min'),
+            max=('max', 'max'),
+            sum=('sum', 'sum'),
+            count=('count', 'sum'),
+        )
+        # Latest price per listing first, so one product's price never stands in for the group
+        per_listing = ['period', group_by] + [key for key in KEYS if key != group_by]
+        latest = rows.sort_values('last_date', kind='stable').groupby(per_listing, observed=True)['last'].last()
+        series['last'] = latest.groupby(level=['period', group_by], observed=True).mean()
+        series = series.reset_index()
+        series['mean'] = series['sum'] / series['count']
+        return resolution, series[['period', group_by, 'min', 'mean', 'max', 'last']]
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_price_history(file_path, mtime):
+    return PriceHistoryStore()
+
+
+def load_price_history(file_path):
+    """
+    Price pyramid for the current version of `file_path`. update() only folds
+    in newer report dates, so a replaced or corrected workbook (new mtime)
+    starts an empty store that the next update() rebuilds from every row.
+    """
+    return _load_price_history(file_path, os.path.getmtime(file_path))
@@ -0,0 +1,167 @@
+import bisect
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import streamlit as st
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Ranking weight of a query token depending on how it hit a product token
+EXACT_SCORE = 3
+PREFIX_SCORE = 2
+SUBSTRING_SCORE = 1
+
+
+def normalize(text):
+    # Casefold and strip accents so "Café" and "cafe" land on the same token
+    text = unicodedata.normalize("NFKD", str(text)).casefold()
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class ProductSearchIndex:
+    """
+    Typeahead index over product descriptions.
+
+    A sorted token vocabulary answers prefix lookups with two bisects and a
+    trigram index over that vocabulary catches matches inside a word
+    ("jia" -> "Bhujia"). Brands and categories are stored as integer codes
+    per (product, brand, category) pair so filters are a single numpy mask.
+    """
+
+    def __init__(self, data, text_col='Product Description', brand_col='Brand Name', category_col='Category'):
+        pairs = data[[text_col, brand_col, category_col]].dropna(subset=[text_col]).drop_duplicates()
+
+        # Product ids follow alphabetical order, so sorting by id is sorting by name
+        self.names = np.array(sorted(pairs[text_col].unique()), dtype=object)
+        self.lengths = np.array([len(name) for name in self.names])
+        self.normalized = [normalize(name) for name in self.names]
+
+        self.pair_product = np.searchsorted(self.names, pairs[text_col].to_numpy())
+        self.brands = {b: i for i, b in enumerate(pairs[brand_col].dropna().unique())}
+        self.categories = {c: i for i, c in enumerate(pairs[category_col].dropna().unique())}
+        self.pair_brand = pairs[brand_col].map(self.brands).fillna(-1).to_numpy(dtype=int)
+        self.pair_category = pairs[category_col].map(self.categories).fillna(-1).to_numpy(dtype=int)
+
+        postings = defaultdict(set)
+        for product_id, name in enumerate(self.normalized):
+            for token in TOKEN_RE.findall(name):
+                postings[token].add(product_id)
+
+        self.vocab = sorted(postings)
+        self.postings = [np.fromiter(postings[token], dtype=int) for token in self.vocab]
+
+        self.grams = defaultdict(set)
+        for token_id, token in enumerate(self.vocab):
+            for gram in trigrams(token):
+                self.grams[gram].add(token_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _allowed(self, brands=None, categories=None, products=None):
+        mask = np.ones(len(self.pair_product), dtype=bool)
+        if brands:
+            codes = [self.brands[b] for b in brands if b in self.brands]
+            mask &= np.isin(self.pair_brand, codes)
+        if categories:
+            codes = [self.categories[c] for c in categories if c in self.categories]
+            mask &= np.isin(self.pair_category, codes)
+
+        allowed = np.zeros(len(self.names), dtype=bool)
+        allowed[self.pair_product[mask]] = True
+        if products is not None:
+            allowed &= np.isin(self.names, list(products))
+        return allowed
+
+    def _token_scores(self, query_token):
+        scores = np.zeros(len(self.names), dtype=int)
+
+        # Substring hits through the trigram index (query tokens of 3+ chars)
+        query_grams = trigrams(query_token)
+        if query_grams:
+            candidates = set.intersection(*(self.grams.get(gram, set()) for gram in query_grams))
+            for token_id in candidates:
+                if query_token in self.vocab[token_id]:
+                    scores[self.postings[token_id]] = SUBSTRING_SCORE
+
+        # Prefix hits are a contiguous slice of the sorted vocabulary
+        start = bisect.bisect_left(self.vocab, query_token)
+        end = bisect.bisect_left(self.vocab, query_token + "\uffff")
+        for token_id in range(start, end):
+            score = EXACT_SCORE if self.vocab[token_id] == query_token else PREFIX_SCORE
+            ids = self.postings[token_id]
+            scores[ids] = np.maximum(scores[ids], score)
+        return scores
+
+    def search(self, query, brands=None, categories=None, products=None, limit=50):
+        """
+        Return up to `limit` product descriptions ranked for `query`.
+
+        Every query token must match a product token by prefix or substring.
+        Ties are broken by shorter description, then alphabetically. An empty
+        query lists the (filtered) catalog alphabetically. `products`, when
+        given, restricts the results to those descriptions.
+        """
+        allowed = self._allowed(brands, categories, products)
+        query_tokens = tokenize(query or "")
+        if not query_tokens:
+            return self.names[np.flatnonzero(allowed)[:limit]].tolist()
+
+        scores = np.zeros(len(self.names), dtype=int)
+        for query_token in query_tokens:
+            token_scores = self._token_scores(query_token)
+            allowed &= token_scores > 0
+            scores += token_scores
+
+        candidates = np.flatnonzero(allowed)
+        if candidates.size == 0:
+            return []
+
+        # Whole-query prefix of the description ranks first
+        normalized_query = " ".join(query_tokens)
+        for product_id in candidates:
+            if self.normalized[product_id].startswith(normalized_query):
+                scores[product_id] += EXACT_SCORE
+
+        order = np.lexsort((candidates, self.lengths[candidates], -scores[candidates]))
+        return self.names[candidates[order][:limit]].tolist()
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_product_index(file_path, mtime, _data):
+    # Keyed on the source file and its version, the frame itself is not hashed on every rerun
+    return ProductSearchIndex(_data)
+
+
+def load_product_index(file_path, data):
+    """Index over `data`, the loaded contents of `file_path`; rebuilt when the file changes."""
+    return _load_product_index(file_path, os.path.getmtime(file_path), data)
+
+
+def product_multiselect(index, label, key, brands=None, categories=None, products=None, default=None, limit=50):
+    """
+    Search box plus multiselect that only ships the top `limit` matches to the
+    browser. `products` limits the options to the descriptions present in the
+    rows the page is filtered to. Current selections are always kept among
+    the options so they survive a new search.
+    """
+    if key not in st.session_state:
+        st.session_state[key] = list(default or [])
+    selected = st.session_state[key]
+
+    query = st.text_input(f"Search {label.lower()}", key=f"{key}_query", placeholder="Type to search...")
+    matches = index.search(query, brands=brands, categories=categories, products=products, limit=limit)
+    options = list(dict.fromkeys(list(selected) + matches))
+
+    return st.multiselect(label, options, key=key)
@@ -0,0 +1,161 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+QUALITY_DIR = ".quality"
+CITY_DATA_PATH = "maps/india_city.csv"
+
+# A row must name all of these to be placed on any page
+REQUIRED = ['Report Date', 'Brand Name', 'Category', 'Product Description', 'City', 'Platform']
+TEXT = REQUIRED[1:] + ['Stock Availability (Y/N)']
+NUMERIC = ['Selling Price', 'MRP (₹)', 'Discount']
+# Blank availability is allowed and means "not captured": it is left out of
+# every availability ratio, which is Yes over reported (Yes or No) rows
+AVAILABILITY = {'yes': 'Yes', 'no': 'No'}
+# One scrape of one product for one brand at one pincode on one platform per report date
+DUPLICATE_KEY = ['Report Date', 'Platform', 'Pincode', 'Brand Name', 'Unique Product ID']
+# Report dates are day-first text with a four- or two-digit year (18/12/2024, 20/12/24)
+REPORT_DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%y')
+
+
+def parse_percent(values):
+    """'26%' -> 26.0, blanks and junk -> NaN. Numeric input passes through."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    return pd.to_numeric(values.astype("string").str.replace("%", "", regex=False), errors="coerce").astype(float)
+
+
+def parse_report_dates(values):
+    """
+    Report dates in any of REPORT_DATE_FORMATS, tried in order; cells Excel
+    already stored as dates pass through, anything else -> NaT. Explicit
+    formats never guess the day/month order, unlike read_excel(parse_dates=...).
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    parsed = pd.to_datetime(values, format=REPORT_DATE_FORMATS[0], errors='coerce')
+    for date_format in REPORT_DATE_FORMATS[1:]:
+        parsed = parsed.fillna(pd.to_datetime(values, format=date_format, errors='coerce'))
+    return parsed
+
+
+def availability_flags(values):
+    """1.0 in stock, 0.0 out of stock, NaN not reported; .mean() is the availability ratio."""
+    return values.map({'Yes': 1.0, 'No': 0.0})
+
+
+def known_cities(city_data_path=CITY_DATA_PATH):
+    if not os.path.exists(city_data_path):
+        return None
+    return set(pd.read_csv(city_data_path, usecols=['city'])['city'].dropna().str.strip())
+
+
+def _normalize(values):
+    """
+    Stripped text (NaN for blanks) and a blank mask. Only the distinct values
+    are stripped; rows take theirs through the factorized codes.
+    """
+    codes, uniques = pd.factorize(values)
+    cleaned = np.array([str(u).strip() for u in uniques] + [""], dtype=object)
+    text = cleaned[codes]
+    blank = text == ""
+    return pd.Series(np.where(blank, np.nan, text), index=values.index, dtype=object), pd.Series(blank, index=values.index)
+
+
+def validate_competition(raw, cities=None):
+    """
+    Type, range, enum, duplicate-key and city checks over the whole frame,
+    one vectorized mask per check.
+
+    Text columns are stripped, availability is normalized to Yes/No/blank,
+    and Report Date, prices and Discount are parsed. A row that cannot be
+    placed or read (a missing key, an unknown city, a value of the wrong
+    type, a duplicate key) is quarantined; among rows sharing a
+    DUPLICATE_KEY the most complete one is kept. A value that only fails a
+    range or enum check is blanked and the rest of its row is kept.
+
+    Parameters:
+    raw (pandas.DataFrame): Rows as read from the competition workbook
+    cities (set): Known city names, or None to skip the city check
+
+    Returns:
+    tuple: (clean typed rows; raw rows with an issue plus Reasons and Action
+    ("quarantined" or "values blanked") columns; summary frame)
+    """
+    text, blank = {}, {}
+    for col in TEXT + NUMERIC:
+        text[col], blank[col] = _normalize(raw[col])
+    data = raw.assign(**{col: text[col] for col in TEXT})
+    availability = data['Stock Availability (Y/N)'].str.lower().map(AVAILABILITY)
+    data = data.assign(**{
+        'Report Date': parse_report_dates(data['Report Date']),
+        'Selling Price': pd.to_numeric(data['Selling Price'], errors='coerce'),
+        'MRP (₹)': pd.to_numeric(data['MRP (₹)'], errors='coerce'),
+        'Discount': parse_percent(data['Discount']),
+        'Stock Availability (Y/N)': availability,
+    })
+
+    # Row checks: the row cannot be placed or read
+    row_checks = {f"missing {col}": data[col].isna() for col in REQUIRED}
+    for col in NUMERIC:
+        row_checks[f"{col} is not a number"] = data[col].isna() & ~blank[col]
+    if cities is not None:
+        row_checks["unknown city"] = ~data['City'].isin(cities) & data['City'].notna()
+
+    # Field checks: check -> (mask, columns blanked where it fails)
+    field_checks = {
+        "Stock Availability is not Yes/No": (availability.isna() & ~blank['Stock Availability (Y/N)'],
+                                             ['Stock Availability (Y/N)']),
+        "Selling Price is not positive": (data['Selling Price'].le(0), ['Selling Price']),
+        "MRP is not positive": (data['MRP (₹)'].le(0), ['MRP (₹)']),
+        # Either price could be the wrong one
+        "Selling Price above MRP": (data['Selling Price'].gt(data['MRP (₹)']), ['Selling Price', 'MRP (₹)']),
+        "Discount outside 0-100%": (~data['Discount'].between(0, 100) & data['Discount'].notna(), ['Discount']),
+    }
+    for mask, columns in field_checks.values():
+        data = data.assign(**{col: data[col].mask(mask) for col in columns})
+
+    dropped = pd.concat(row_checks, axis=1).any(axis=1)
+    # Duplicates among readable rows: keep the one with the most measurements
+    completeness = data[NUMERIC + ['Stock Availability (Y/N)']].notna().sum(axis=1)
+    order = completeness[~dropped].sort_values(ascending=False, kind='stable').index
+    row_checks["duplicate key"] = data.loc[order].duplicated(DUPLICATE_KEY).reindex(data.index, fill_value=False)
+    dropped |= row_checks["duplicate key"]
+
+    checks = {**row_checks, **{name: mask for name, (mask, _) in field_checks.items()}}
+    flagged = pd.concat(checks, axis=1).any(axis=1)
+    reasons = np.full(int(flagged.sum()), "", dtype=object)
+    for name, mask in checks.items():
+        hit = mask[flagged].to_numpy()
+        reasons[hit] = np.where(reasons[hit] == "", name, reasons[hit] + "; " + name)
+    issues = raw[flagged].assign(
+        Reasons=reasons,
+        Action=np.where(dropped[flagged], "quarantined", "values blanked"),
+    )
+
+    summary = pd.DataFrame({
+        'check': list(checks),
+        'action': ["quarantined"] * len(row_checks) + ["values blanked"] * len(field_checks),
+        'rows': [int(mask.sum()) for mask in checks.values()],
+    })
+    summary['percent'] = (summary['rows'] / max(len(raw), 1) * 100).round(2)
+    return data[~dropped], issues, summary
+
+
+def publish(name, issues, summary, total, output_dir=QUALITY_DIR):
+    """Write the issues side table and the summary next to it; returns the summary dict."""
+    os.makedirs(output_dir, exist_ok=True)
+    issues.to_csv(os.path.join(output_dir, f"{name}_quarantine.csv"), index=False)
+    quarantined = int(issues['Action'].eq("quarantined").sum())
+    report = {
+        'rows': int(total),
+        'clean': int(total - quarantined),
+        'quarantined': quarantined,
+        'values_blanked': int(len(issues) - quarantined),
+        'checks': summary.to_dict(orient='records'),
+    }
+    with open(os.path.join(output_dir, f"{name}_summary.json"), "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    return report
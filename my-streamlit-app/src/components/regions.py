@@ -0,0 +1,149 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from components.quality import availability_flags
+
+# Indian state / district boundaries, first one found wins. Any format
+# geopandas reads works; the name column is picked from NAME_COLUMNS.
+REGION_PATHS = [
+    "maps/india_states.geojson",
+    "maps/india_states.shp",
+    "maps/india_districts.geojson",
+    "maps/india_districts.shp",
+]
+NAME_COLUMNS = ["st_nm", "ST_NM", "NAME_1", "shapeName", "district", "NAME_2", "name", "NAME"]
+MAX_VERTICES = 20000
+
+
+def find_region_file(paths=REGION_PATHS):
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def simplify_to_budget(geometries, max_vertices=MAX_VERTICES):
+    """
+    Simplify polygons (in degrees) with the smallest tolerance that brings
+    the total vertex count under `max_vertices`, doubling from ~100 m.
+    """
+    import shapely
+
+    tolerance = 0.001
+    simplified = geometries
+    while shapely.get_num_coordinates(simplified).sum() > max_vertices and tolerance < 1:
+        simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+        tolerance *= 2
+    return simplified
+
+
+@st.cache_resource(show_spinner="Loading region boundaries...")
+def load_regions(path, max_vertices=MAX_VERTICES):
+    """
+    Region polygons simplified once to the vertex budget, plus their GeoJSON
+    for the browser. Returns None if there is no boundary file.
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    import geopandas as gpd
+
+    regions = gpd.read_file(path)
+    if regions.crs is not None:
+        regions = regions.to_crs(epsg=4326)
+    name_column = next((col for col in NAME_COLUMNS if col in regions.columns), None)
+    if name_column is None:
+        st.error(f"No region name column in {path}, expected one of {NAME_COLUMNS}")
+        return None
+
+    regions = gpd.GeoDataFrame(
+        {"region": regions[name_column].astype(str)},
+        geometry=simplify_to_budget(regions.geometry.values, max_vertices),
+        crs="EPSG:4326",
+    )
+    regions = regions.dissolve(by="region").reset_index()
+    geojson = json.loads(regions.to_json(drop_id=True))
+    return regions, geojson
+
+
+def assign_regions(city_data, regions=None):
+    """
+    city -> region, found once with an STRtree point-in-polygon query over
+    the region polygons. Cities outside every polygon (or every city, when
+    there are no polygons) fall back to the `admin_name` column.
+    """
+    assigned = pd.Series(city_data["admin_name"].to_numpy(), index=city_data.index, dtype=object)
+    if regions is not None:
+        import shapely
+
+        points = shapely.points(city_data["lng"].to_numpy(), city_data["lat"].to_numpy())
+        tree = shapely.STRtree(regions.geometry.values)
+        point_idx, region_idx = tree.query(points, predicate="within")
+        # A point on a shared border matches twice, keep the first region
+        point_idx, first = np.unique(point_idx, return_index=True)
+        assigned.iloc[point_idx] = regions["region"].to_numpy()[region_idx[first]]
+
+    return pd.DataFrame({
+        "City": city_data["city"].to_numpy(),
+        "region": assigned.to_numpy(),
+        "lat": city_data["lat"].to_numpy(),
+        "lng": city_data["lng"].to_numpy(),
+    }).drop_duplicates("City")
+
+
+@st.cache_data
+def city_regions(city_data_path, region_path=None):
+    """Cached city -> region table; the only place any spatial work happens."""
+    city_data = pd.read_csv(city_data_path, encoding="utf-8")
+    loaded = load_regions(region_path)
+    return assign_regions(city_data, loaded[0] if loaded is not None else None)
+
+
+def region_summary(df, cities):
+    """
+    Availability and average discount per region in one groupby over the
+    filtered rows. Rows without reported availability are left out, as on
+    the city map.
+    """
+    region = df["City"].map(cities.set_index("City")["region"])
+    summary = pd.DataFrame({
+        "region": region,
+        "available": availability_flags(df["Stock Availability (Y/N)"]),
+        "Discount": df["Discount"],
+    }).groupby("region").agg(
+        rows=("Discount", "size"),
+        available=("available", "mean"),
+        avg_discount=("Discount", "mean"),
+    ).reset_index()
+    summary["availability_percentage"] = (summary["available"] * 100).round(2)
+    summary["avg_discount"] = summary["avg_discount"].round(2)
+
+    # Marker position for the no-polygon fallback: centre of the region's cities
+    centres = cities.groupby("region")[["lat", "lng"]].mean()
+    return summary.join(centres, on="region")
+
+
+def region_figure(summary, geojson=None, color="availability_percentage"):
+    import plotly.express as px
+
+    labels = {"availability_percentage": "Availability %", "avg_discount": "Avg Discount %", "region": "Region"}
+    hover = {"rows": True, "availability_percentage": ":.2f", "avg_discount": ":.2f"}
+    if geojson is not None:
+        fig = px.choropleth_mapbox(
+            summary, geojson=geojson, locations="region", featureidkey="properties.region",
+            color=color, color_continuous_scale="Viridis", hover_name="region", hover_data=hover,
+            labels=labels, mapbox_style="open-street-map",
+            center={"lat": 22.5, "lon": 79}, zoom=3.5, opacity=0.7, height=600,
+        )
+    else:
+        # No boundary file: one marker per region at the centre of its cities
+        fig = px.scatter_mapbox(
+            summary.dropna(subset=["lat", "lng"]), lat="lat", lon="lng", size="rows",
+            color=color, color_continuous_scale="Viridis", hover_name="region", hover_data=hover,
+            labels=labels, mapbox_style="open-street-map", zoom=4, height=600,
+        )
+    fig.update_layout(title="Product Availability by Region.")
+    return fig
@@ -0,0 +1,307 @@
+"""
+Two-tier result cache for page aggregates and figures.
+
+Results (aggregates and Plotly figures alike, pickled) are keyed by
+function, code version (a fingerprint of the function's bytecode and of
+the app helpers it calls), dataset version (source file size and
+mtime) and the normalized call arguments. A hit is served from an
+in-process LRU first, then from a zlib-compressed SQLite file on local
+disk that every worker process shares and that survives restarts. Entries
+expire after a TTL, the disk file is trimmed to a size limit (least
+recently used first), and entries of an older dataset or code version are
+purged the first time a process sees the new one, so a deploy that changes
+a cached function never serves results computed by the old code.
+
+Configured with RESULT_CACHE_DIR (default .cache), RESULT_CACHE_MB (256),
+RESULT_CACHE_TTL_HOURS (168) and RESULT_CACHE_MEMORY_ENTRIES (256);
+RESULT_CACHE=0 turns caching off and RESULT_CACHE_VERSION can be bumped
+to drop everything by hand.
+
+    @cached()
+    def platform_summary(filters, products, file_path=FILE_PATH):
+        ...
+"""
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", ".cache")
+MAX_DISK_BYTES = int(float(os.environ.get("RESULT_CACHE_MB", "256")) * 1024 * 1024)
+TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_HOURS", "168")) * 3600
+MEMORY_ENTRIES = int(os.environ.get("RESULT_CACHE_MEMORY_ENTRIES", "256"))
+ENABLED = os.environ.get("RESULT_CACHE", "1") != "0"
+CACHE_VERSION = os.environ.get("RESULT_CACHE_VERSION", "1")
+# Packages whose helpers are part of a cached function's code version
+APP_PACKAGES = ("components", "page")
+
+logger = logging.getLogger(__name__)
+
+
+def dataset_version(path):
+    """Size and modification time of the source file; changes whenever it is replaced."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _normalize(value):
+    # Same query, same key: tuples and lists alike, sets and dict keys sorted
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(v) for v in value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+def _code_objects(code):
+    # A function's code object and those of the functions and lambdas nested in it
+    yield code
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            yield from _code_objects(const)
+
+
+def _function_of(target):
+    """The plain function behind `target` (decorators and Streamlit caches unwrapped), or None."""
+    # st.cache_data / st.cache_resource return a CachedFunc that keeps the function in _info.func
+    info = getattr(target, "_info", None)
+    if info is not None and inspect.isfunction(getattr(info, "func", None)):
+        target = info.func
+    return inspect.unwrap(target) if inspect.isfunction(target) else None
+
+
+def code_version(fn):
+    """
+    Fingerprint of the bytecode, names and constants of `fn` and of every function
+    of its own module or of the app's packages (APP_PACKAGES) it calls, directly
+    or through other such functions, including ones behind st.cache_data /
+    st.cache_resource, plus the module constants they read. Changes whenever
+    their logic does; library functions are not followed.
+    """
+    digest = hashlib.sha256(CACHE_VERSION.encode("utf-8"))
+    seen = set()
+    pending = [_function_of(fn)]
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        for code in _code_objects(current.__code__):
+            # Bytecode alone misses renamed calls and attributes (.mean() -> .median())
+            digest.update(code.co_code)
+            digest.update(repr(code.co_names).encode("utf-8"))
+            digest.update(repr([c for c in code.co_consts if not inspect.iscode(c)]).encode("utf-8"))
+            for name in sorted(code.co_names):
+                value = current.__globals__.get(name)
+                if isinstance(value, (str, int, float, tuple, list, dict, set, frozenset)):
+                    # Module constants the logic reads (column lists, thresholds, mappings)
+                    digest.update(json.dumps([name, _normalize(value)], sort_keys=True, default=str).encode("utf-8"))
+                    continue
+                target = _function_of(value)
+                if target is not None and (target.__module__ == fn.__module__
+                                           or target.__module__.split(".")[0] in APP_PACKAGES):
+                    pending.append(target)
+    return digest.hexdigest()[:16]
+
+
+def cache_key(name, version, arguments):
+    payload = json.dumps({"fn": name, "version": version, "args": _normalize(arguments)}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_disk_bytes=MAX_DISK_BYTES, ttl_seconds=TTL_SECONDS,
+                 memory_entries=MEMORY_ENTRIES):
+        self.path = os.path.join(cache_dir, "results.sqlite")
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._connection() as db:
+            # WAL is a property of the file: other worker processes read while one writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, name TEXT, version TEXT,"
+                " created REAL, accessed REAL, size INTEGER, value BLOB)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    @contextmanager
+    def _connection(self):
+        # One short-lived connection per operation, committed on success and always
+        # closed, so panel threads (components/tasks.py) never leave one behind
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    # ---------- Memory tier ----------
+
+    def _remember(self, key, payload, created):
+        with self._lock:
+            self._memory[key] = (payload, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _recall(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if now - entry[1] > self.ttl_seconds:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[0]
+
+    # ---------- Disk tier ----------
+
+    def _load(self, key, now):
+        with self._connection() as db:
+            row = db.execute("SELECT created, value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            created, blob = row
+            if now - created > self.ttl_seconds:
+                db.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        payload = zlib.decompress(blob)
+        self._remember(key, payload, created)
+        return payload
+
+    def _store(self, key, name, version, payload, now):
+        blob = zlib.compress(payload, 6)
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO results (key, name, version, created, accessed, size, value)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, name, version, now, now, len(blob), blob),
+            )
+            self._trim(db)
+
+    def _trim(self, db):
+        # Drop least recently used entries until the file's payload fits the budget
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        excess = total - self.max_disk_bytes
+        freed = 0
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM results ORDER BY accessed"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        db.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def _check_version(self, name, version):
+        # First call for a new dataset version: forget every older version of this function
+        if self._versions.get(name) == version:
+            return
+        self._versions[name] = version
+        with self._connection() as db:
+            db.execute("DELETE FROM results WHERE name = ? AND version != ?", (name, version))
+
+    # ---------- Public ----------
+
+    def get_or_compute(self, name, version, arguments, compute):
+        key = cache_key(name, version, arguments)
+        now = time.time()
+        payload = self._recall(key, now)
+        if payload is None:
+            try:
+                self._check_version(name, version)
+                payload = self._load(key, now)
+            except sqlite3.Error as e:
+                # A locked or damaged disk tier is a miss, not an error on the page
+                logger.warning("Result cache: could not read %s from disk: %s", name, e)
+        if payload is not None:
+            # Every caller unpickles its own copy, so mutating a result never leaks into the cache
+            return pickle.loads(payload)
+
+        value = compute()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, payload, now)
+        try:
+            self._store(key, name, version, payload, now)
+        except sqlite3.Error as e:
+            # A busy or unwritable disk tier degrades to memory only
+            logger.warning("Result cache: could not store %s on disk: %s", name, e)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._connection() as db:
+            db.execute("DELETE FROM results")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
+
+
+def cached(version_arg="file_path"):
+    """
+    Cache a function's result in the two-tier cache. The dataset version is
+    read from the argument named `version_arg` (a source file path); every
+    other argument must be JSON-like (filters, tuples, dates, strings).
+    Results must pickle: frames, dicts and Plotly figures all do.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        code = None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            nonlocal code
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            if code is None:
+                # On first call, once every helper of the module is defined
+                code = code_version(fn)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            path = arguments[version_arg]
+            if not os.path.exists(path):
+                return fn(*args, **kwargs)
+            version = f"{dataset_version(path)}:{code}"
+            return get_cache().get_or_compute(name, version, arguments, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,200 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+KEYS = ['Brand Name', 'Category', 'Platform', 'City', 'Report Date']
+METRICS = {
+    'Selling Price': 'Selling Price',
+    'MRP': 'MRP (₹)',
+    'Discount': 'Discount',
+}
+QUANTILES = {'p10': 0.10, 'q1': 0.25, 'median': 0.50, 'q3': 0.75, 'p90': 0.90}
+
+
+def compress(means, weights, delta=100):
+    """
+    Merge sorted-or-not centroids into a t-digest of roughly `delta / 2`
+    clusters. Clusters are cut on whole steps of the arcsine scale function,
+    which keeps them tiny near the tails (where p10/p90 live) and wide around
+    the median. Fully vectorized: sort, cumsum, bucket, reduceat.
+    """
+    if means.size == 0:
+        return means, weights
+    order = np.argsort(means, kind='mergesort')
+    means, weights = means[order], weights[order]
+
+    cumulative = np.cumsum(weights)
+    q_mid = (cumulative - weights / 2) / cumulative[-1]
+    k = np.floor(delta / (2 * np.pi) * np.arcsin(2 * q_mid - 1))
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(k)) + 1))
+    merged_weights = np.add.reduceat(weights, starts)
+    merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+    return merged_means, merged_weights
+
+
+def quantiles(means, weights, minimum, maximum, qs):
+    """Interpolate quantiles between centroid centres, pinned to the exact min/max."""
+    if means.size == 0:
+        return np.full(len(qs), np.nan)
+    total = weights.sum()
+    centres = np.cumsum(weights) - weights / 2
+    xp = np.concatenate(([0.0], centres, [total]))
+    fp = np.concatenate(([minimum], means, [maximum]))
+    return np.interp(np.asarray(qs) * total, xp, fp)
+
+
+class QuantileSketchStore:
+    """
+    Mergeable t-digests of Selling Price, MRP and Discount per
+    Brand x Category x Platform x City x report date.
+
+    All centroids of a metric live in two flat arrays, with per-sketch
+    offsets plus exact count/sum/min/max in a small key table. Answering a
+    filter means selecting sketch rows, gathering their centroids and
+    compressing once per output group - no raw rows are sorted.
+    """
+
+    def __init__(self, delta=100):
+        self.delta = delta
+        self.last_date = None
+        self.keys = pd.DataFrame(columns=KEYS)
+        self.stats = {metric: pd.DataFrame(columns=['start', 'end', 'count', 'sum', 'min', 'max']) for metric in METRICS}
+        self.means = {metric: np.empty(0) for metric in METRICS}
+        self.weights = {metric: np.empty(0) for metric in METRICS}
+        self._lock = threading.Lock()
+
+    def update(self, data):
+        """Sketch every report date newer than `last_date`."""
+        if data is None or data.empty:
+            return 0
+        new = data[data['Report Date'] > self.last_date] if self.last_date is not None else data
+        if new.empty:
+            return 0
+
+        with self._lock:
+            if self.last_date is not None:
+                new = new[new['Report Date'] > self.last_date]
+                if new.empty:
+                    return 0
+
+            new = new.dropna(subset=KEYS)
+            groups = list(new.groupby(KEYS, sort=True, observed=True).indices.items())
+            keys = pd.DataFrame([key for key, _ in groups], columns=KEYS)
+            indices = [idx for _, idx in groups]
+
+            for metric, column in METRICS.items():
+                values = new[column].to_numpy(dtype=float)
+                offset = self.means[metric].size
+                means, weights, stats = [], [], []
+                for idx in indices:
+                    group_values = values[idx]
+                    group_values = group_values[~np.isnan(group_values)]
+                    m, w = compress(group_values, np.ones(group_values.size), self.delta)
+                    stats.append((offset, offset + m.size, group_values.size, group_values.sum(),
+                                  group_values.min() if group_values.size else np.nan,
+                                  group_values.max() if group_values.size else np.nan))
+                    offset += m.size
+                    means.append(m)
+                    weights.append(w)
+                self.means[metric] = np.concatenate([self.means[metric]] + means)
+                self.weights[metric] = np.concatenate([self.weights[metric]] + weights)
+                new_stats = pd.DataFrame(stats, columns=['start', 'end', 'count', 'sum', 'min', 'max'])
+                self.stats[metric] = new_stats if self.stats[metric].empty \
+                    else pd.concat([self.stats[metric], new_stats], ignore_index=True)
+
+            self.keys = keys if self.keys.empty else pd.concat([self.keys, keys], ignore_index=True)
+            self.last_date = new['Report Date'].max()
+        return len(indices)
+
+    def summary(self, metric, group_by='Brand Name', date_from=None, date_to=None,
+                categories=None, platforms=None, cities=None):
+        """
+        Distribution of `metric` per `group_by` value for the filter:
+        count, mean, min, p10, q1, median, q3, p90 and max.
+        """
+        keys = self.keys
+        mask = pd.Series(True, index=keys.index)
+        if date_from is not None:
+            mask &= keys['Report Date'] >= pd.Timestamp(date_from)
+        if date_to is not None:
+            mask &= keys['Report Date'] <= pd.Timestamp(date_to)
+        for col, values in (('Category', categories), ('Platform', platforms), ('City', cities)):
+            if values:
+                mask &= keys[col].isin(values)
+
+        selected = keys[mask]
+        stats = self.stats[metric]
+        rows = []
+        for group, sketch_ids in selected.groupby(group_by, observed=True).groups.items():
+            sketch_stats = stats.loc[sketch_ids]
+            sketch_stats = sketch_stats[sketch_stats['count'] > 0]
+            if sketch_stats.empty:
+                continue
+            # Gather every centroid of the selected sketches in one fancy index
+            lengths = (sketch_stats['end'] - sketch_stats['start']).to_numpy()
+            starts = np.repeat(sketch_stats['start'].to_numpy(), lengths)
+            within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            positions = starts + within
+            means, weights = compress(self.means[metric][positions], self.weights[metric][positions], self.delta)
+
+            count = sketch_stats['count'].sum()
+            minimum, maximum = sketch_stats['min'].min(), sketch_stats['max'].max()
+            values = quantiles(means, weights, minimum, maximum, list(QUANTILES.values()))
+            rows.append({group_by: group, 'count': int(count), 'mean': sketch_stats['sum'].sum() / count,
+                         'min': minimum, **dict(zip(QUANTILES, values)), 'max': maximum})
+        return pd.DataFrame(rows, columns=[group_by, 'count', 'mean', 'min'] + list(QUANTILES) + ['max'])
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_quantile_sketches(file_path, mtime):
+    return QuantileSketchStore()
+
+
+def load_quantile_sketches(file_path):
+    """
+    Price and discount digests for the current version of `file_path`.
+    Sketches of a report date are never rewritten, so a corrected workbook
+    (new mtime) gets a fresh store that re-sketches every date.
+    """
+    return _load_quantile_sketches(file_path, os.path.getmtime(file_path))
+
+
+def distribution_figure(summary, group_by, metric):
+    """Box plot drawn straight from sketch quantiles, whiskers at p10/p90."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Box(
+        x=summary[group_by],
+        q1=summary['q1'], median=summary['median'], q3=summary['q3'],
+        lowerfence=summary['p10'], upperfence=summary['p90'], mean=summary['mean'],
+        name=metric, boxpoints=False,
+    ))
+    fig.update_layout(title=f'{metric} Distribution by {group_by} (whiskers p10-p90)',
+                      xaxis_title=group_by, yaxis_title=metric)
+    return fig
+
+
+def distribution_panel(store, filters, group_by, key):
+    """
+    Metric picker plus box plot for the page filters. Returns the summary
+    so the caller can log its size.
+    """
+    from datetime import datetime
+
+    metric = st.selectbox("Metric", list(METRICS), key=key)
+    summary = store.summary(
+        metric, group_by,
+        date_from=datetime.strptime(filters['date_from'], '%d/%m/%Y'),
+        date_to=datetime.strptime(filters['date_to'], '%d/%m/%Y'),
+        categories=filters['categories'], platforms=filters['platforms'], cities=filters['cities'],
+    )
+    if summary.empty:
+        st.warning("No data available for the selected filters.")
+    else:
+        st.plotly_chart(distribution_figure(summary, group_by, metric))
+        st.caption("Sketched per brand, platform, city and day; the product selection does not apply here.")
+    return summary
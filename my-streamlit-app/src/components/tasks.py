@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+MAX_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+
+class Panel:
+    """Outcome of one task: its value, or the exception it raised instead."""
+
+    def __init__(self, name, value=None, error=None, elapsed_ms=0.0):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def run_panels(tasks, interaction=None, max_workers=MAX_WORKERS):
+    """
+    Run independent zero-argument callables on a thread pool and wait for
+    all of them, so a rerun takes about as long as its slowest panel.
+
+    Tasks only compute (aggregations, Plotly figures); anything that draws
+    on the page stays on the script thread, in layout order, via
+    show_panel. A task that raises fails alone: its Panel carries the error
+    and the others are unaffected. Each task is timed as an `interaction`
+    stage when one is given.
+
+    Returns:
+    dict: {name: Panel} in the order of `tasks`
+    """
+    # Worker threads share this rerun's context so cached functions work in them
+    ctx = get_script_run_ctx()
+
+    def attach():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    def call(name, task):
+        started = time.perf_counter()
+        try:
+            if interaction is not None:
+                with interaction.stage(name):
+                    value = task()
+            else:
+                value = task()
+            return Panel(name, value=value, elapsed_ms=(time.perf_counter() - started) * 1000)
+        except Exception as e:
+            logger.exception("Panel %r failed", name)
+            return Panel(name, error=e, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+    workers = max(1, min(max_workers, len(tasks)))
+    with ThreadPoolExecutor(max_workers=workers, initializer=attach, thread_name_prefix="panel") as pool:
+        futures = {name: pool.submit(call, name, task) for name, task in tasks.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def show_panel(panel, render, message="Could not load this panel."):
+    """Render a panel's value with `render`, or a warning in its place if it failed."""
+    if not panel.ok:
+        st.warning(f"{message} ({type(panel.error).__name__}: {panel.error})")
+        return None
+    return render(panel.value)
@@ -0,0 +1,269 @@
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import regex
+
+# Words (any script, combining marks included so Indic viramas and vowel
+# signs stay inside their word), or any single non-space symbol (emoji, punctuation)
+TOKEN_RE = regex.compile(r"[\w\p{M}]+|[^\w\p{M}\s]")
+# Query syntax: quoted phrases, parentheses, negation prefix and bare terms
+QUERY_RE = re.compile(r'"([^"]*)"|(\()|(\))|(-)|([^\s()"]+)')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def normalize(text):
+    """
+    Fold a caption into a comparable form: NFKC for compatibility characters
+    (full-width letters, ligatures), casefold for case-insensitive matching
+    (ß -> ss) and accent stripping on Latin letters so "Hör" also matches
+    "hor". Marks on other scripts are part of the spelling (हल्दीराम is not
+    हलदरम) and are kept, recomposed to NFC.
+    """
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    if text.isascii():
+        return text
+    kept = []
+    latin = False
+    for ch in unicodedata.normalize("NFKD", text):
+        if unicodedata.combining(ch):
+            if latin:
+                continue
+        else:
+            # Basic Latin to Latin Extended-B; precomposed letters beyond it decompose to these
+            latin = ch <= "\u024f" and ch.isalpha()
+        kept.append(ch)
+    return unicodedata.normalize("NFC", "".join(kept))
+
+
+def tokenize(text):
+    """
+    Split normalized text into tokens. Words are kept whole and every emoji
+    becomes its own token; joiners, variation selectors and skin-tone
+    modifiers are dropped so "❤️" and "❤" index the same way.
+    """
+    tokens = []
+    for token in TOKEN_RE.findall(normalize(text)):
+        if token[0].isalnum() or token[0] == "_":
+            tokens.append(token)
+        elif unicodedata.category(token) == "So":
+            tokens.append(token)
+    return tokens
+
+
+class TextIndex:
+    """
+    Positional inverted index with boolean/phrase queries and BM25 ranking.
+
+    Each token keeps CSR-style postings: sorted document ids, the offset of
+    each document's positions and the flattened positions themselves, so
+    boolean operators are numpy set operations and phrase checks only look
+    at documents containing every phrase token.
+    """
+
+    def __init__(self, texts):
+        collected = defaultdict(lambda: ([], []))
+        self.doc_lengths = np.zeros(len(texts), dtype=np.int32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text) if isinstance(text, str) else []
+            self.doc_lengths[doc_id] = len(tokens)
+            per_doc = defaultdict(list)
+            for position, token in enumerate(tokens):
+                per_doc[token].append(position)
+            for token, positions in per_doc.items():
+                docs, pos_lists = collected[token]
+                docs.append(doc_id)
+                pos_lists.append(positions)
+
+        self.postings = {}
+        for token, (docs, pos_lists) in collected.items():
+            offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(p) for p in pos_lists])
+            positions = np.fromiter((p for plist in pos_lists for p in plist), dtype=np.int32, count=offsets[-1])
+            self.postings[token] = (np.asarray(docs, dtype=np.int32), offsets, positions)
+
+        self.n_docs = len(texts)
+        self.avg_length = float(self.doc_lengths.mean()) if self.n_docs else 0.0
+        self.all_docs = np.arange(self.n_docs, dtype=np.int32)
+
+    # ---------- Postings ----------
+
+    def docs(self, token):
+        entry = self.postings.get(token)
+        return entry[0] if entry else np.empty(0, dtype=np.int32)
+
+    def term_frequencies(self, token):
+        entry = self.postings.get(token)
+        if not entry:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        docs, offsets, _ = entry
+        return docs, np.diff(offsets)
+
+    def _positions(self, token, doc_ids):
+        docs, offsets, positions = self.postings[token]
+        idx = np.searchsorted(docs, doc_ids)
+        return [positions[offsets[i]:offsets[i + 1]] for i in idx]
+
+    def phrase_docs(self, tokens):
+        if not tokens:
+            return np.empty(0, dtype=np.int32)
+        if any(token not in self.postings for token in tokens):
+            return np.empty(0, dtype=np.int32)
+
+        candidates = self.docs(tokens[0])
+        for token in tokens[1:]:
+            candidates = np.intersect1d(candidates, self.docs(token), assume_unique=True)
+        if len(tokens) == 1 or candidates.size == 0:
+            return candidates
+
+        # Keep documents where token i appears at start + i for every i
+        starts = self._positions(tokens[0], candidates)
+        for offset, token in enumerate(tokens[1:], start=1):
+            following = self._positions(token, candidates)
+            starts = [np.intersect1d(s, f - offset, assume_unique=True) for s, f in zip(starts, following)]
+        keep = np.array([s.size > 0 for s in starts], dtype=bool)
+        return candidates[keep]
+
+    # ---------- Query parsing ----------
+
+    def _parse(self, query):
+        """
+        Turn a query into nested tuples. Supported syntax: implicit AND
+        between terms, `OR`, `AND`, `NOT term` / `-term`, "quoted phrases"
+        and parentheses. OR binds looser than AND.
+        """
+        tokens = []
+        for phrase, lparen, rparen, minus, word in QUERY_RE.findall(query):
+            if lparen:
+                tokens.append(("(", None))
+            elif rparen:
+                tokens.append((")", None))
+            elif minus:
+                tokens.append(("NOT", None))
+            elif word in ("AND", "OR", "NOT"):
+                tokens.append((word, None))
+            elif word:
+                terms = tokenize(word)
+                if terms:
+                    tokens.append(("PHRASE" if len(terms) > 1 else "TERM", terms))
+            else:
+                terms = tokenize(phrase)
+                if terms:
+                    tokens.append(("PHRASE", terms))
+
+        pos = 0
+
+        def peek():
+            return tokens[pos][0] if pos < len(tokens) else None
+
+        def parse_or():
+            nonlocal pos
+            node = parse_and()
+            while peek() == "OR":
+                pos += 1
+                node = ("OR", node, parse_and())
+            return node
+
+        def parse_and():
+            nonlocal pos
+            node = parse_unary()
+            while peek() not in (None, "OR", ")"):
+                if peek() == "AND":
+                    pos += 1
+                node = ("AND", node, parse_unary())
+            return node
+
+        def parse_unary():
+            nonlocal pos
+            kind = peek()
+            if kind == "NOT":
+                pos += 1
+                operand = parse_unary()
+                # A bare or dangling NOT negates nothing: it matches nothing, not every post
+                return ("NOT", operand) if operand[0] != "EMPTY" else operand
+            if kind == "(":
+                pos += 1
+                node = parse_or()
+                if peek() == ")":
+                    pos += 1
+                return node
+            if kind in ("TERM", "PHRASE"):
+                pos += 1
+                return tokens[pos - 1]
+            # Dangling operator or stray ")": skip it
+            pos += 1
+            return ("EMPTY", None)
+
+        return parse_or() if tokens else ("EMPTY", None)
+
+    def _evaluate(self, node, terms):
+        kind = node[0]
+        if kind == "TERM":
+            terms.extend(node[1])
+            return self.docs(node[1][0])
+        if kind == "PHRASE":
+            terms.extend(node[1])
+            return self.phrase_docs(node[1])
+        if kind == "AND":
+            left, right = node[1], node[2]
+            # A negated right-hand side is a set difference, not an intersection
+            if right[0] == "NOT":
+                return np.setdiff1d(self._evaluate(left, terms), self._evaluate(right[1], []), assume_unique=True)
+            return np.intersect1d(self._evaluate(left, terms), self._evaluate(right, terms), assume_unique=True)
+        if kind == "OR":
+            return np.union1d(self._evaluate(node[1], terms), self._evaluate(node[2], terms))
+        if kind == "NOT":
+            return np.setdiff1d(self.all_docs, self._evaluate(node[1], []), assume_unique=True)
+        return np.empty(0, dtype=np.int32)
+
+    # ---------- Search ----------
+
+    def _bm25(self, doc_ids, terms):
+        scores = np.zeros(doc_ids.size, dtype=np.float64)
+        lengths = self.doc_lengths[doc_ids]
+        norm = K1 * (1 - B + B * lengths / (self.avg_length or 1.0))
+        for term in set(terms):
+            docs, tf = self.term_frequencies(term)
+            if docs.size == 0:
+                continue
+            idf = math.log(1 + (self.n_docs - docs.size + 0.5) / (docs.size + 0.5))
+            idx = np.searchsorted(docs, doc_ids)
+            idx = np.minimum(idx, docs.size - 1)
+            hit = docs[idx] == doc_ids
+            freq = np.where(hit, tf[idx], 0)
+            scores += idf * freq * (K1 + 1) / (freq + norm)
+        return scores
+
+    def search(self, query, page=1, per_page=20):
+        """
+        Run a query and return `(total_matches, doc_ids, scores)` for the
+        requested 1-based page, best matches first. With `per_page=None`
+        every match is returned, ranked, for the caller to page through.
+        """
+        terms = []
+        matched = self._evaluate(self._parse(query or ""), terms)
+        total = int(matched.size)
+        if total == 0:
+            return 0, matched, np.empty(0)
+
+        scores = self._bm25(matched, terms)
+        # Stable ordering: score desc, then document order
+        order = np.lexsort((matched, -scores))
+        if per_page is None:
+            return total, matched[order], scores[order]
+        start = (max(page, 1) - 1) * per_page
+        page_slice = order[start:start + per_page]
+        return total, matched[page_slice], scores[page_slice]
+
+
+def load_posts(file_path):
+    posts = pd.read_csv(file_path, encoding="utf-8", dtype={"id": str, "video id": str})
+    posts["caption"] = posts["caption"].fillna("")
+    return posts.reset_index(drop=True)
@@ -0,0 +1,317 @@
+"""
+Local usage log and materialization advisor.
+
+Pages record each interaction with `Interaction` (or the `log_interaction`
+context manager) and time their stages; one JSON line per interaction is
+appended to
+`.usage/interactions.jsonl` (override with USAGE_LOG_PATH, disable with
+USAGE_LOG=0).
+
+Offline analysis, run from the app directory:
+
+    python -m components.usage_log                 # rank slow / frequent query shapes
+    python -m components.usage_log --build         # also materialize covering aggregates
+
+Built aggregates are listed in `.usage/materialized/manifest.json` with the
+version of the workbook they were built from. Page 1 answers its KPIs from
+the smallest aggregate that covers the current filters (`find_aggregate`)
+and falls back to the rows when none matches the current file.
+"""
+import argparse
+import datetime
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from components.result_cache import dataset_version
+
+LOG_PATH = os.environ.get("USAGE_LOG_PATH", os.path.join(".usage", "interactions.jsonl"))
+MATERIALIZED_DIR = os.path.join(".usage", "materialized")
+ENABLED = os.environ.get("USAGE_LOG", "1") != "0"
+
+logger = logging.getLogger(__name__)
+_write_lock = threading.Lock()
+
+
+def _normalize_value(value):
+    if isinstance(value, (list, tuple, set)):
+        return sorted(str(v) for v in value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def normalize_filters(filters):
+    """Stable, JSON-friendly filter state: sorted keys and sorted multiselect values."""
+    return {key: _normalize_value(filters[key]) for key in sorted(filters)}
+
+
+def query_shape(filters):
+    """
+    What the query looks like regardless of the exact values: which
+    dimensions are restricted ("set") and which are not ("all"). Two
+    analysts filtering different cities, or a different number of them,
+    share a shape, and so would one aggregate.
+    """
+    shape = {}
+    for key, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            shape[key] = "set" if value else "all"
+        elif value in (None, "", "All"):
+            shape[key] = "all"
+        else:
+            shape[key] = "set"
+    return shape
+
+
+class Interaction:
+    """
+    One page interaction. Time stages with `with interaction.stage(name)`,
+    record row counts with `count`, then call `finish()` (or use
+    `log_interaction`) to append it to the log.
+    """
+
+    def __init__(self, page, filters):
+        self.page = page
+        self.filters = normalize_filters(filters)
+        self.stages = {}
+        self.rows = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round((time.perf_counter() - started) * 1000, 3)
+
+    def count(self, name, rows):
+        self.rows[name] = int(rows)
+
+    def finish(self):
+        if not ENABLED:
+            return
+        record = {
+            "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+            "page": self.page,
+            "filters": self.filters,
+            "shape": query_shape(self.filters),
+            "rows": self.rows,
+            "stages_ms": self.stages,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+        }
+        try:
+            append_record(record)
+        except OSError as e:
+            # Logging must never break the dashboard
+            logger.warning("Could not append to the usage log: %s", e)
+
+
+def append_record(record, log_path=None):
+    log_path = log_path or LOG_PATH
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _write_lock:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+
+@contextmanager
+def log_interaction(page, filters):
+    """Time one page interaction and append it to the usage log."""
+    interaction = Interaction(page, filters)
+    try:
+        yield interaction
+    finally:
+        interaction.finish()
+
+
+# ---------- Offline analysis ----------
+
+def load_log(log_path=None):
+    import pandas as pd
+
+    log_path = log_path or LOG_PATH
+    if not os.path.exists(log_path):
+        return pd.DataFrame()
+    with open(log_path, encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle if line.strip()]
+    log = pd.DataFrame.from_records(records)
+    if log.empty:
+        return log
+    # Shapes are recomputed from the logged filters, so older lines group with current ones
+    log["shape_key"] = log["filters"].apply(lambda filters: json.dumps(query_shape(filters), sort_keys=True))
+    return log
+
+
+def rank_shapes(log, top=10):
+    """
+    Rank query shapes by total time users spent waiting on them
+    (frequency x latency), with p50/p95 latency and the slowest stage.
+    """
+    import pandas as pd
+
+    if log.empty:
+        return pd.DataFrame()
+    stages = pd.json_normalize(log["stages_ms"].tolist()).set_index(log.index)
+    slowest_stage = stages.idxmax(axis=1) if not stages.empty else pd.Series("", index=log.index)
+    log = log.assign(slowest_stage=slowest_stage)
+
+    ranked = log.groupby(["page", "shape_key"]).agg(
+        interactions=("total_ms", "size"),
+        p50_ms=("total_ms", "median"),
+        p95_ms=("total_ms", lambda s: s.quantile(0.95)),
+        total_wait_ms=("total_ms", "sum"),
+        slowest_stage=("slowest_stage", lambda s: s.mode().iat[0] if not s.mode().empty else ""),
+    ).reset_index()
+    return ranked.sort_values("total_wait_ms", ascending=False).head(top).reset_index(drop=True)
+
+
+# Filter keys that map onto a competition column
+DIMENSIONS = {
+    "categories": "Category",
+    "platforms": "Platform",
+    "cities": "City",
+    "products": "Product Description",
+}
+
+
+def recommend(ranked):
+    """
+    For each hot shape on the competition pages, the group-by that covers
+    it: every restricted dimension plus the report date, with the additive
+    measures the KPIs and charts need.
+    """
+    recommendations = []
+    for _, row in ranked.iterrows():
+        shape = json.loads(row["shape_key"])
+        dims = [column for key, column in DIMENSIONS.items() if shape.get(key, "all") != "all"]
+        if not any(key in shape for key in DIMENSIONS):
+            # Not a competition page query, nothing to aggregate
+            continue
+        recommendations.append({
+            "page": row["page"],
+            "group_by": dims + ["Report Date"],
+            "interactions": int(row["interactions"]),
+            "p95_ms": round(float(row["p95_ms"]), 1),
+            "slowest_stage": row["slowest_stage"],
+        })
+    return recommendations
+
+
+def build_aggregate(data, group_by, version, output_dir=MATERIALIZED_DIR):
+    """
+    Materialize one covering aggregate as parquet, record it in the manifest
+    under the source `version` and return its path.
+    """
+    available = data["Stock Availability (Y/N)"].eq("Yes")
+    known = data["Stock Availability (Y/N)"].notna()
+    aggregate = data.assign(available=available, known=known).groupby(group_by, observed=True).agg(
+        rows=("Selling Price", "size"),
+        available=("available", "sum"),
+        known=("known", "sum"),
+        price_sum=("Selling Price", "sum"),
+        price_count=("Selling Price", "count"),
+        discount_sum=("Discount", "sum"),
+        discount_count=("Discount", "count"),
+    ).reset_index()
+
+    os.makedirs(output_dir, exist_ok=True)
+    name = "__".join(col.replace(" ", "_") for col in group_by) + ".parquet"
+    path = os.path.join(output_dir, name)
+    aggregate.to_parquet(path, index=False)
+
+    manifest = read_manifest(output_dir)
+    manifest[name] = {"group_by": list(group_by), "version": version}
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return path
+
+
+def read_manifest(output_dir=MATERIALIZED_DIR):
+    path = os.path.join(output_dir, "manifest.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_aggregate(path, mtime):
+    import pandas as pd
+
+    return pd.read_parquet(path)
+
+
+def find_aggregate(filters, file_path, output_dir=MATERIALIZED_DIR):
+    """
+    The smallest materialized aggregate built from the current version of
+    `file_path` that groups by every dimension `filters` restricts (and the
+    report date), or None.
+    """
+    manifest = read_manifest(output_dir)
+    if not manifest:
+        return None
+    version = dataset_version(file_path)
+    needed = {column for key, column in DIMENSIONS.items() if filters.get(key)} | {"Report Date"}
+    candidates = [(len(entry["group_by"]), name) for name, entry in manifest.items()
+                  if entry["version"] == version and needed <= set(entry["group_by"])]
+    if not candidates:
+        return None
+    path = os.path.join(output_dir, min(candidates)[1])
+    try:
+        return _read_aggregate(path, os.path.getmtime(path))
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read aggregate %s: %s", path, e)
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank slow query shapes from the usage log.")
+    parser.add_argument("--log", default=LOG_PATH, help="usage log to analyze")
+    parser.add_argument("--top", type=int, default=10, help="number of shapes to report")
+    parser.add_argument("--build", action="store_true", help="materialize the recommended aggregates")
+    parser.add_argument("--data", default="data/competition.xlsx", help="competition workbook for --build")
+    args = parser.parse_args(argv)
+
+    log = load_log(args.log)
+    if log.empty:
+        print(f"No interactions logged in {args.log}")
+        return
+
+    ranked = rank_shapes(log, args.top)
+    print(ranked.drop(columns="shape_key").assign(shape=ranked["shape_key"]).to_string(index=False))
+
+    recommendations = recommend(ranked)
+    if not recommendations:
+        return
+    print("\nRecommended aggregates:")
+    for rec in recommendations:
+        print(f"  {rec['page']}: group by {rec['group_by']} "
+              f"({rec['interactions']} interactions, p95 {rec['p95_ms']} ms, slowest stage {rec['slowest_stage']!r})")
+
+    if args.build:
+        import pandas as pd
+        from components.quality import known_cities, validate_competition
+
+        data, _, _ = validate_competition(pd.read_excel(args.data), known_cities())
+        version = dataset_version(args.data)
+        built = set()
+        for rec in recommendations:
+            key = tuple(rec["group_by"])
+            if key not in built:
+                built.add(key)
+                print(f"  built {build_aggregate(data, list(key), version)}")
+
+
+if __name__ == "__main__":
+    main()
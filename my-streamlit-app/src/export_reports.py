@@ -0,0 +1,259 @@
+"""
+Headless batch export of weekly per-brand packs.
+
+For every brand found in the hygiene and competition data this writes a
+hygiene pack (per-date hygiene scores, drill-down rows) and a competition
+pack (page 1 KPIs per platform, page 3 brand price and discount tables for
+the brand's categories) as Excel, Parquet and/or HTML.
+
+Inputs are parsed once and staged as uncompressed Arrow files that every
+worker process memory-maps. Workers keep the mapped Arrow tables, which
+share one copy through the OS page cache, and convert only the rows of the
+brand they are exporting (and its category peers) to pandas. Finished
+brands are recorded in `progress.json`; rerunning the same command skips
+them unless the inputs changed or --force is given.
+
+Run from this directory:
+
+    python export_reports.py --out reports --formats xlsx,html --workers 8
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from components.metrics import (average_discount, average_sale_price, brand_discount_availability_table,
+                                brand_price_table, calculate_stock_out_percentage)
+from components.quality import known_cities, validate_competition
+from sample.hygiene import HYGIENE_METRICS, prepare_hygiene, shard_name
+
+COMPETITION_PATH = "data/competition.xlsx"
+HYGIENE_PATH = "sample/Demo-Hygine Data V3.xlsx"
+FORMATS = ("xlsx", "parquet", "html")
+
+# Memory-mapped Arrow tables, set in each worker by _init_worker
+_competition = None
+_hygiene = None
+
+
+# ---------- Input staging ----------
+
+def fingerprint(*paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def stage_inputs(competition_path, hygiene_path, stage_dir):
+    """Parse both workbooks once and write them as memory-mappable Arrow files."""
+    os.makedirs(stage_dir, exist_ok=True)
+    staged = {}
+    version = fingerprint(competition_path, hygiene_path)
+
+    for name, path, prepare in (
+        ("competition", competition_path, _prepare_competition),
+        ("hygiene", hygiene_path, _prepare_hygiene),
+    ):
+        target = os.path.join(stage_dir, f"{name}-{version}.arrow")
+        if not os.path.exists(target):
+            table = pa.Table.from_pandas(prepare(path), preserve_index=False)
+            # No compression: compressed buffers cannot be memory-mapped
+            feather.write_feather(table, target + ".tmp", compression="uncompressed")
+            os.replace(target + ".tmp", target)
+        staged[name] = target
+    return staged, version
+
+
+def _prepare_competition(path):
+    # Same checks as the dashboard, so reports never include quarantined rows
+    data, _, _ = validate_competition(pd.read_excel(path), known_cities())
+    return data.astype({'Area': str, 'SKU ID': str})
+
+
+def _prepare_hygiene(path):
+    return prepare_hygiene(pd.read_excel(path))
+
+
+def _init_worker(staged):
+    global _competition, _hygiene
+    _competition = feather.read_table(staged["competition"], memory_map=True)
+    _hygiene = feather.read_table(staged["hygiene"], memory_map=True)
+
+
+def select_rows(table, column, values):
+    """Rows of an Arrow table whose `column` is in `values`, as a pandas frame."""
+    return table.filter(pc.is_in(table[column], value_set=pa.array(values))).to_pandas()
+
+
+# ---------- Per-brand reports ----------
+
+def hygiene_tables(hygiene, brand):
+    rows = select_rows(hygiene, 'Brand', [brand])
+    if rows.empty:
+        return {}
+    summary = rows.groupby(['Date', 'Sub-category'])[HYGIENE_METRICS].mean().round(2).reset_index()
+    detail_cols = ['Date', 'Sub-category', 'ASIN', 'Generic Title'] + HYGIENE_METRICS
+    return {
+        "hygiene_summary": summary,
+        "hygiene_detail": rows[detail_cols].sort_values(['Date', 'Overall_Brand_Score']),
+    }
+
+
+def competition_tables(competition, brand):
+    brand_rows = competition.filter(pc.equal(competition['Brand Name'], brand))
+    if brand_rows.num_rows == 0:
+        return {}
+    # The brand against every brand in its categories
+    peers = select_rows(competition, 'Category', pc.unique(brand_rows['Category']).to_pylist())
+    rows = peers[peers['Brand Name'] == brand]
+
+    date_from = rows['Report Date'].min().strftime('%d/%m/%Y')
+    date_to = rows['Report Date'].max().strftime('%d/%m/%Y')
+    products = rows['Product Description'].dropna().unique().tolist()
+
+    # Page 1 KPIs for the brand's products, overall and per platform
+    kpis = []
+    for platform in [None] + sorted(rows['Platform'].dropna().unique()):
+        platforms = [platform] if platform else None
+        kpis.append({
+            'Platform': platform or 'All',
+            'Stock-Out Percentage': calculate_stock_out_percentage(rows, date_from, date_to, products, platforms),
+            'Average Selling Price': average_sale_price(rows, date_from, date_to, products, platforms),
+            'Average Discount': average_discount(rows, date_from, date_to, products, platforms),
+        })
+
+    # Page 3 tables over the category peers
+    return {
+        "kpis": pd.DataFrame(kpis),
+        "brand_discount_availability": brand_discount_availability_table(peers).round(2),
+        "brand_prices": brand_price_table(peers).round(2),
+    }
+
+
+def write_outputs(tables, brand, brand_dir, formats):
+    os.makedirs(brand_dir, exist_ok=True)
+    files = []
+    if "xlsx" in formats:
+        path = os.path.join(brand_dir, "report.xlsx")
+        with pd.ExcelWriter(path) as writer:
+            for name, table in tables.items():
+                table.to_excel(writer, sheet_name=name[:31], index=False)
+        files.append(path)
+    if "parquet" in formats:
+        for name, table in tables.items():
+            path = os.path.join(brand_dir, f"{name}.parquet")
+            table.to_parquet(path, index=False)
+            files.append(path)
+    if "html" in formats:
+        path = os.path.join(brand_dir, "report.html")
+        sections = [f"<h2>{name.replace('_', ' ').title()}</h2>\n{table.to_html(index=False)}"
+                    for name, table in tables.items()]
+        with open(path, "w", encoding="utf-8") as handle:
+            title = html.escape(str(brand))
+            handle.write(f"<html><head><meta charset='utf-8'><title>{title}</title></head><body>\n"
+                         f"<h1>{title}</h1>\n" + "\n".join(sections) + "\n</body></html>\n")
+        files.append(path)
+    return files
+
+
+def export_brand(brand, out_dir, formats):
+    tables = {}
+    tables.update(hygiene_tables(_hygiene, brand))
+    tables.update(competition_tables(_competition, brand))
+    if not tables:
+        return brand, []
+    # Same directory names as the dashboard's brand shards: brands that slug alike never share one
+    return brand, write_outputs(tables, brand, os.path.join(out_dir, shard_name(brand)), formats)
+
+
+# ---------- Progress ----------
+
+def load_progress(path):
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    return {}
+
+
+def save_progress(progress, path):
+    with open(path + ".tmp", "w", encoding="utf-8") as handle:
+        json.dump(progress, handle, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def is_done(entry, version, formats):
+    return (
+        entry is not None
+        and entry.get("version") == version
+        and set(formats) <= set(entry.get("formats", []))
+        and all(os.path.exists(path) for path in entry.get("files", []))
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export per-brand hygiene and competition packs.")
+    parser.add_argument("--competition", default=COMPETITION_PATH)
+    parser.add_argument("--hygiene", default=HYGIENE_PATH)
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--formats", default="xlsx,html", help="comma separated: " + ",".join(FORMATS))
+    parser.add_argument("--brands", help="comma separated subset of brands (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true", help="re-export brands that are already done")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+
+    os.makedirs(args.out, exist_ok=True)
+    staged, version = stage_inputs(args.competition, args.hygiene, os.path.join(args.out, "_inputs"))
+
+    # Brand catalog straight from the data
+    brands = set(feather.read_table(staged["hygiene"], columns=["Brand"]).column("Brand").to_pylist())
+    brands |= set(feather.read_table(staged["competition"], columns=["Brand Name"]).column("Brand Name").to_pylist())
+    brands = sorted(b for b in brands if b)
+    if args.brands:
+        wanted = {b.strip() for b in args.brands.split(",")}
+        brands = [b for b in brands if b in wanted]
+
+    progress_path = os.path.join(args.out, "progress.json")
+    progress = load_progress(progress_path)
+    todo = [b for b in brands if args.force or not is_done(progress.get(b), version, formats)]
+    print(f"{len(brands)} brands, {len(brands) - len(todo)} already exported, {len(todo)} to go")
+    if not todo:
+        return
+
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(staged,)) as pool:
+        futures = {pool.submit(export_brand, brand, args.out, formats): brand for brand in todo}
+        for done, future in enumerate(as_completed(futures), start=1):
+            brand = futures[future]
+            try:
+                _, files = future.result()
+            except Exception as e:
+                failed.append(brand)
+                print(f"[{done}/{len(todo)}] {brand}: failed ({e})")
+                continue
+            # Record each brand as soon as it lands so an interrupted run can resume
+            progress[brand] = {"version": version, "formats": formats, "files": files}
+            save_progress(progress, progress_path)
+            print(f"[{done}/{len(todo)}] {brand}: {len(files)} files")
+
+    if failed:
+        print(f"{len(failed)} brands failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import streamlit as st
+import pandas as pd
 
 class StreamlitApp:
     def __init__(self):
@@ -34,7 +35,7 @@ class StreamlitApp:
     def main_app(self):
         with st.sidebar:
             st.title("Navigation")
-            page = st.radio("Go to", ["Home", "Page 1", "Page 2",'Page 3'])
+            page = st.radio("Go to", ["Home", "Page 1", "Page 2",'Page 3', "Page 4", "Page 5"])
 
             if st.button("Logout"):
                 st.session_state.authenticated = False
@@ -48,10 +49,38 @@ class StreamlitApp:
             self.page2()
         elif page == "Page 3":
             self.page3()
+        elif page == "Page 4":
+            self.page4()
+        elif page == "Page 5":
+            self.page5()
 
     def home_page(self):
         st.title("🏠 Welcome to your Personal product analysis DASHBOARD")
         st.write("You are logged in!")
+        self.data_quality()
+
+    def data_quality(self):
+        # Published at ingest by components/data.py, see components/quality.py for the checks
+        from components.data import load_quality
+
+        quality = load_quality("data/competition.xlsx")
+        if quality is None:
+            return
+        issues, report = quality
+        st.subheader("Data Quality")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Source rows", report["rows"])
+        col2.metric("Clean rows", report["clean"])
+        col3.metric("Quarantined", report["quarantined"])
+        col4.metric("Rows with values blanked", report["values_blanked"])
+        checks = pd.DataFrame(report["checks"])
+        st.dataframe(checks[checks["rows"] > 0], hide_index=True)
+        if len(issues):
+            with st.expander("Rows with issues"):
+                # Raw values as they were in the workbook, mixed types and all
+                st.dataframe(issues.astype("string"), hide_index=True)
+                st.download_button("Download rows with issues (CSV)", issues.to_csv(index=False),
+                                   file_name="competition_quarantine.csv", mime="text/csv")
 
     def page1(self):
         import page.page1 as Page1
@@ -65,6 +94,14 @@ class StreamlitApp:
         import page.page3 as Page3
         Page3.run()    
 
+    def page4(self):
+        import page.page4 as Page4
+        Page4.run()
+
+    def page5(self):
+        import page.page5 as Page5
+        Page5.run()
+
     def run(self):
         if not st.session_state.authenticated:
             self.login_page()
@@ -1,9 +1,18 @@
 import streamlit as st
 import pandas as pd
-import geopandas as gpd
 import plotly.express as px
 import os
 from datetime import datetime
+from components.assortment import COVERAGE_PAGE_ROWS, coverage_figure, load_assortment, rank_by_gaps
+from components.availability_windows import WINDOWS, load_availability_windows
+from components.comparison import comparison_windows, date_span, show_comparison
+from components.data import load_competition
+from components.metrics import aggregate_kpis, average_discount, average_sale_price, calculate_stock_out_percentage, filter_rows
+from components.quality import availability_flags
+from components.product_search import load_product_index, product_multiselect
+from components.regions import city_regions, find_region_file, load_regions, region_figure, region_summary
+from components.tasks import run_panels, show_panel
+from components.usage_log import Interaction, find_aggregate
 
 
 # st.set_page_config(page_title="Heatmap Dashboard", layout="wide")  # Sets a full-width layout
@@ -33,15 +42,10 @@ st.markdown(
 )
 
 # ---------- Load Data Functions ----------
-@st.cache_data
 # Function to load data
 def load_data(file_path):
-    if os.path.exists(file_path):
-        data= pd.read_excel(file_path,parse_dates=['Report Date'])
-        return data
-    else:
-        st.error(f"Source data file not found: {file_path}")
-        return None
+    # Shared copy-on-write frame, no per-rerun copy
+    return load_competition(file_path)
 
 @st.cache_data
 def load_city_data(city_data_path):
@@ -50,48 +54,21 @@ def load_city_data(city_data_path):
     st.error(f"City data file not found: {city_data_path}")
     return None
 
-@st.cache_data
-def load_map_data(map_data_path):
-    if os.path.exists(map_data_path):
-        world = gpd.read_file(map_data_path)
-        return world[world.ADMIN == "India"]
-    st.error(f"Map data file not found: {map_data_path}")
-    return None
-
 
 
 # ---------- Data Processing ----------
-
-def date_filter(fd,td,filtered_data):
-    cop = filtered_data.copy()
-    if "Report Date" in cop.columns:
-        cop = cop[(cop['Report Date'] >= fd) & (cop['Report Date'] <= td)]
-        return cop
-    return filtered_data
-
 def calculate_availability(data, city_data,from_date,to_date ,product_filters="All Products",platform_filters=None,category_filters=None):
 
     if data is None or city_data is None:
         return None
-    
-    df = data.copy()
-    df['Stock Availability (Y/N)'].fillna('No', inplace=True)
-    df['available'] = df['Stock Availability (Y/N)'].apply(lambda x: 1 if x == 'Yes' else 0)
-    
-    # Apply filters for multiple selections
-    if product_filters and "All products" not in product_filters:
-        df = df[df['Product Description'].isin(product_filters)]
-    if category_filters and "All categories" not in category_filters:
-        df = df[df['Category'].isin(category_filters)]
-    if platform_filters and "All platforms" not in platform_filters:
-        df = df[df['Platform'].isin(platform_filters)]
-
 
-    df = date_filter(from_date,to_date,df)
+    # Rows without reported availability are left out (see components/quality.py)
+    df = filter_rows(data, from_date, to_date, product_filters, platform_filters, category_filters)
+    available = availability_flags(df['Stock Availability (Y/N)'])
 
     # st.write("in availability function",df)
 
-    availability_df = df.groupby('City')['available'].mean().reset_index()
+    availability_df = available.groupby(df['City']).mean().dropna().rename('available').reset_index()
     availability_df['availability_percentage'] = (availability_df['available'] * 100).round(2)
     
     availability_df = availability_df.merge(city_data, left_on="City", right_on="city", how="left").drop(columns=["city"])
@@ -100,7 +77,7 @@ def calculate_availability(data, city_data,from_date,to_date ,product_filters="A
     return availability_df
 
 # ---------- Visualization ----------
-def generate_map(availability_df, product_filter):
+def generate_map(availability_df, product_filter, value_column="availability_percentage"):
     if availability_df is None or availability_df.empty:
         st.warning("No data available for the selected product.")
         return None
@@ -108,8 +85,8 @@ def generate_map(availability_df, product_filter):
     fig = px.scatter_mapbox(
         availability_df,
         lat="lat", lon="lng",
-        size="availability_percentage",
-        color="availability_percentage",
+        size=value_column,
+        color=value_column,
         color_continuous_scale="Viridis",
         hover_name="City",
         mapbox_style="open-street-map",
@@ -119,86 +96,6 @@ def generate_map(availability_df, product_filter):
     fig.update_layout(title=f"Product Availability in India.")
     return fig
 
-def calculate_stock_out_percentage(data,selected_date_from,selected_date_to, product_filters=None, platform_filters=None, category_filters=None):
-    if data is None:
-        return None
-    
-    df = data.copy()
-    df['Stock Availability (Y/N)'].fillna('No', inplace=True)
-    
-    # Apply filters for multiple selections
-    if product_filters and "All products" not in product_filters:
-        df = df[df['Product Description'].isin(product_filters)]
-    if category_filters and "All categories" not in category_filters:
-        df = df[df['Category'].isin(category_filters)]
-    if platform_filters and "All platforms" not in platform_filters:
-        df = df[df['Platform'].isin(platform_filters)]
-
-    df = date_filter(selected_date_from,selected_date_to,df)
-    # Calculate stock-out percentage
-    total_count = len(df,)
-    stock_out_count = len(df[df['Stock Availability (Y/N)'] == 'No'])
-    
-    stock_out_percentage = (stock_out_count / total_count * 100) if total_count > 0 else 0
-    
-    return round(stock_out_percentage, 2)
-
-def average_sale_price(data,selected_date_from,selected_date_to, product_filters=None, platform_filters=None, category_filters=None):
-    if data is None:
-        return None
-    
-    df = data.copy()
-    
-    # Apply filters
-    if product_filters and "All products" not in product_filters:
-        df = df[df['Product Description'].isin(product_filters)]
-    if category_filters and "All categories" not in category_filters:
-        df = df[df['Category'].isin(category_filters)]
-    if platform_filters and "All platforms" not in platform_filters:
-        df = df[df['Platform'].isin(platform_filters)]
-
-    # filter on DATE
-    df = date_filter(selected_date_from,selected_date_to,df)
-        
-    
-    # Calculate average selling price
-    if 'Selling Price' in df.columns:
-        avg_price = df['Selling Price'].mean()
-        return round(avg_price, 2)
-    
-    return None
-
-def average_discount(data, selected_date_from,selected_date_to,product_filters=None, platform_filters=None, category_filters=None):
-    if data is None:
-        return None
-    
-    df = data.copy()
-    
-    # Apply filters
-    if product_filters and "All products" not in product_filters:
-        df = df[df['Product Description'].isin(product_filters)]
-    if category_filters and "All categories" not in category_filters:
-        df = df[df['Category'].isin(category_filters)]
-    if platform_filters and "All platforms" not in platform_filters:
-        df = df[df['Platform'].isin(platform_filters)]
-
-    # DATE filter 
-    df = date_filter(selected_date_from,selected_date_to,df)
-       
-    
-    # Ensure 'Discount' column exists
-    if 'Discount' in df.columns:
-        print('column found')
-        df['Discount'] = df['Discount'].astype(str).str.replace("%", "", regex=True)  # Remove '%' symbol
-        df['Discount'] = pd.to_numeric(df['Discount'], errors='coerce')  # Convert to numeric (NaN for blanks)
-        
-        avg_discount = df['Discount'].mean(skipna=True)  # Ignore NaN values
-        return round(avg_discount, 2) if not pd.isna(avg_discount) else 0  # Return 0 if all values are NaN
-    
-    return 'NA'  # Return NA if the column doesn't exist
-
-
-    
 # ---------- Main App ----------
 def main():
     st.title("📊 Heatmap Visualization Dashboard")
@@ -206,12 +103,10 @@ def main():
     # File Paths
     file_path = "data/competition.xlsx"
     city_data_path = "maps/india_city.csv"
-    map_data_path = "maps/ne_110m_admin_0_countries.shp"
     
     # Load Data
     data = load_data(file_path)
     city_data = load_city_data(city_data_path)
-    map_data = load_map_data(map_data_path)
 
     
     
@@ -220,9 +115,9 @@ def main():
 
         with col1:
             # st.subheader("Select Products")
-            unique_products = sorted(data['Product Description'].dropna().unique().tolist())
+            product_index = load_product_index(file_path, data)
             # unique_products.insert(0,"All products")
-            selected_products = st.multiselect("Choose Products", unique_products, default=unique_products[0])  # Default: First item
+            selected_products = product_multiselect(product_index, "Choose Products", key="page1_products", default=product_index.names[:1])  # Default: First item
 
             unique_categories = sorted(data['Category'].dropna().unique().tolist())
             # unique_categories.insert(0,"All categories")
@@ -247,26 +142,150 @@ def main():
             # unique_platforms.insert(0,'All platforms')
             selected_platforms = st.multiselect("Choose Platforms", unique_platforms, default=unique_platforms[0])
 
-            # Display Stock-Out Percentage
-            stock_out_percentage = calculate_stock_out_percentage(data,selected_date_from,selected_date_to,selected_products, selected_platforms, selected_categories)
-            st.metric(label="Stock-Out Percentage", value=f"{stock_out_percentage:.2f}%")
+            # Usage log entry for this rerun, see components/usage_log.py
+            interaction = Interaction("page1", {
+                'products': selected_products, 'categories': selected_categories, 'platforms': selected_platforms,
+                'date_from': selected_date_from, 'date_to': selected_date_to,
+            })
+            interaction.count('source', len(data))
+
+            # Rolling windows end at the latest report date and ignore the date pickers
+            windows = load_availability_windows(file_path)
+            windows.update(data)
+            assortment = load_assortment(file_path)
+            assortment.update(data)
+            window_filters = dict(products=selected_products, platforms=selected_platforms, categories=selected_categories)
+
+        # Map controls are drawn before the panels run so their values are known
+        with col2:
+            map_level = st.radio("Map level", ["City", "State"], horizontal=True, key="page1_map_level")
+            if map_level == "City":
+                st.subheader("Availability Percent by City")
+                map_metric = st.selectbox("Map metric", ["Selected dates"] + [f"{w}-day rolling" for w in WINDOWS] + ["Stock-out streak"],
+                                          key="page1_map_metric")
+            else:
+                st.subheader("Availability and Discount by State")
+                # City -> state assignment and simplified polygons are cached, only the groupby runs per rerun
+                region_path = find_region_file()
+                regions = load_regions(region_path)
+                cities = city_regions(city_data_path, region_path)
+                if regions is None:
+                    st.caption("No state boundary file in maps/, showing one marker per state from the city list.")
+                color = st.radio("Colour by", ["availability_percentage", "avg_discount"], horizontal=True,
+                                 format_func={"availability_percentage": "Availability", "avg_discount": "Discount"}.get,
+                                 key="page1_region_color")
+
+        def city_map():
+            if map_metric == "Selected dates":
+                availability_df = calculate_availability(data,city_data,selected_date_from,selected_date_to,selected_products,selected_platforms,selected_categories)
+                return availability_df, generate_map(availability_df, selected_products,)
+            if city_data is None:
+                return None, None
+            if map_metric == "Stock-out streak":
+                availability_df = windows.streaks(group_by='City', **window_filters).merge(city_data, left_on="City", right_on="city", how="left")
+                return availability_df, generate_map(availability_df, selected_products, value_column="longest_streak")
+            window = int(map_metric.split("-")[0])
+            availability_df = windows.rolling(window, group_by='City', **window_filters).merge(city_data, left_on="City", right_on="city", how="left")
+            return availability_df, generate_map(availability_df, selected_products,)
+
+        def region_map():
+            df = filter_rows(data, selected_date_from, selected_date_to, selected_products, selected_platforms, selected_categories)
+            summary = region_summary(df, cities)
+            return summary, None if summary.empty else region_figure(summary, regions[1] if regions is not None else None, color)
+
+        # The KPIs and the map don't depend on each other, so they run side by side
+        kpi_args = (data, selected_date_from, selected_date_to, selected_products, selected_platforms, selected_categories)
+        tasks = {
+            'stock_out': lambda: calculate_stock_out_percentage(*kpi_args),
+            'avg_price': lambda: average_sale_price(*kpi_args),
+            'avg_discount': lambda: average_discount(*kpi_args),
+            'rolling_kpis': lambda: ({w: windows.rolling(w, **window_filters) for w in WINDOWS}, windows.streaks(**window_filters)),
+        }
+        # A covering aggregate built by `python -m components.usage_log --build` for this
+        # file version answers the KPIs without scanning the rows
+        aggregate = find_aggregate(window_filters, file_path)
+        if aggregate is not None:
+            kpis = aggregate_kpis(aggregate, *kpi_args[1:])
+            for name in ('stock_out', 'avg_price', 'avg_discount'):
+                tasks[name] = lambda name=name: kpis[name]
+            interaction.count('aggregate', len(aggregate))
+        if map_level == "City":
+            tasks['availability_map'] = city_map
+        else:
+            tasks['region_map'] = region_map
+        panels = run_panels(tasks, interaction)
 
+        with col3:
+            # Display Stock-Out Percentage
+            show_panel(panels['stock_out'], lambda value: st.metric(label="Stock-Out Percentage", value=f"{value:.2f}%"))
 
             # Display AVG sale price
-            average_selling_price = average_sale_price(data,selected_date_from,selected_date_to,selected_products, selected_platforms, selected_categories)
-            st.metric(label="Average selling price", value=f"{average_selling_price}")
+            show_panel(panels['avg_price'], lambda value: st.metric(label="Average selling price", value=f"{value}"))
 
             # Display AVG Discount
-            average_discount_value = average_discount(data,selected_date_from,selected_date_to, selected_products, selected_platforms, selected_categories)
-            st.metric(label="Average Discount", value=f"{average_discount_value:}%")
+            show_panel(panels['avg_discount'], lambda value: st.metric(label="Average Discount", value=f"{value:}%"))
 
+            def show_rolling(value):
+                rolling, streaks = value
+                for w, col in zip(WINDOWS, st.columns(len(WINDOWS))):
+                    col.metric(label=f"{w}-day Avail.", value="NA" if rolling[w] is None else f"{rolling[w]:.2f}%")
+                st.metric(label="Stock-Out Streak", value=f"{streaks['longest']} days",
+                          help=f"Longest current run of calendar days without stock, up to the latest report date; {streaks['out_now']} listings are out on that date.")
+            show_panel(panels['rolling_kpis'], show_rolling)
 
         with col2:
-            st.subheader("Availability Percent by City")
-            availability_df = calculate_availability(data,city_data,selected_date_from,selected_date_to,selected_products,selected_platforms,selected_categories)
-            fig = generate_map(availability_df, selected_products,)
-            if fig:
-                st.plotly_chart(fig)
+            if map_level == "City":
+                def show_city_map(value):
+                    availability_df, fig = value
+                    if fig:
+                        st.plotly_chart(fig)
+                    interaction.count('cities', 0 if availability_df is None else len(availability_df))
+                show_panel(panels['availability_map'], show_city_map)
+            else:
+                def show_region_map(value):
+                    summary, fig = value
+                    if fig is None:
+                        st.warning("No data available for the selected product.")
+                    else:
+                        st.plotly_chart(fig)
+                    interaction.count('regions', len(summary))
+                show_panel(panels['region_map'], show_region_map)
+
+        # Product x city coverage from the sparse assortment matrices, every product in the chosen categories
+        st.subheader("Product Coverage by City")
+        with interaction.stage('coverage'):
+            date_from = pd.to_datetime(selected_date_from, format='%d/%m/%Y')
+            date_to = pd.to_datetime(selected_date_to, format='%d/%m/%Y')
+            coverage = assortment.coverage(date_from, date_to, platforms=selected_platforms, categories=selected_categories)
+            if coverage.empty:
+                st.warning("No data available for the selected filters.")
+            else:
+                # Widest gaps first, one page of products per chart
+                ranked = rank_by_gaps(coverage)
+                pages = max(1, -(-len(ranked) // COVERAGE_PAGE_ROWS))
+                page_number = st.number_input("Coverage page", min_value=1, max_value=pages, value=1, step=1,
+                                              key="page1_coverage_page") if pages > 1 else 1
+                start = (page_number - 1) * COVERAGE_PAGE_ROWS
+                shown = ranked.iloc[start:start + COVERAGE_PAGE_ROWS]
+                st.caption(f"Products {start + 1}-{start + len(shown)} of {len(ranked)}, largest availability gaps first.")
+                st.plotly_chart(coverage_figure(shown), use_container_width=True)
+            interaction.count('coverage_products', len(coverage))
+        coverage_city = st.selectbox("Dropped from assortment in", coverage.columns.tolist(), key="page1_coverage_city")
+        if coverage_city:
+            missing = assortment.missing_products(coverage_city, platforms=selected_platforms, categories=selected_categories,
+                                                  date_from=date_from, date_to=date_to)
+            st.caption(f"{len(missing)} products listed in {coverage_city} before {selected_date_from} were not in stock there "
+                       f"on the selected platforms and dates.")
+            if missing:
+                st.dataframe(pd.DataFrame({'Product Description': missing}), hide_index=True)
+
+        # Both periods come out of one grouped pass over the rows spanning them
+        periods = comparison_windows(data, "page1")
+        if periods is not None:
+            with interaction.stage('comparison'):
+                rows = filter_rows(data, *date_span(*periods), selected_products, selected_platforms, selected_categories)
+                show_comparison(rows, periods, 'City')
+        interaction.finish()
 
                
     # Footer
@@ -1,165 +1,282 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import os
 from datetime import datetime
+from components.comparison import comparison_windows, date_span, show_comparison
+from components.data import load_competition
+from components.quality import availability_flags
+from components.hll import RELATIVE_ERROR, load_distinct_sketches
+from components.result_cache import cached
+from components.product_search import load_product_index, product_multiselect
+from components.usage_log import Interaction
+from components.price_history import load_price_history
+from components.sketches import distribution_panel, load_quantile_sketches
+
+FILE_PATH = "data/competition.xlsx"
+
+
+# ---------- Cached building blocks ----------
+# Each takes only the inputs it depends on, so a rerun recomputes nothing
+# whose inputs did not change. Results go to the shared two-tier cache
+# (components/result_cache.py), keyed by the data file's version.
+
+@cached()
+def column_options(column, filter_column=None, filter_values=(), file_path=FILE_PATH):
+    data = load_data(file_path)
+    if filter_column and filter_values:
+        data = data[data[filter_column].isin(filter_values)]
+    return data[column].unique().tolist()
+
+
+def apply_filters(data, filters):
+    date_from = datetime.strptime(filters['date_from'], '%d/%m/%Y')
+    date_to = datetime.strptime(filters['date_to'], '%d/%m/%Y')
+    filtered_data = data[(data['Report Date'] >= date_from) & (data['Report Date'] <= date_to)]
+    if filters['categories']:
+        filtered_data = filtered_data[filtered_data['Category'].isin(filters['categories'])]
+    if filters['platforms']:
+        filtered_data = filtered_data[filtered_data['Platform'].isin(filters['platforms'])]
+    if filters['cities']:
+        filtered_data = filtered_data[filtered_data['City'].isin(filters['cities'])]
+    return filtered_data
+
+
+@cached()
+def product_options(filters, file_path=FILE_PATH):
+    # Products with rows under the current category, platform, city and date filters
+    return apply_filters(load_data(file_path), filters)['Product Description'].dropna().unique().tolist()
+
+
+@cached()
+def platform_summary(filters, products, file_path=FILE_PATH):
+    filtered_data = apply_filters(load_data(file_path), filters)
+    if products:
+        filtered_data = filtered_data[filtered_data['Product Description'].isin(products)]
+    if filtered_data.empty:
+        return None
+
+    # Calculate average discount percentage
+    avg_discount = filtered_data.groupby('Platform')['Discount'].mean().reset_index()
+
+    # Calculate availability percentage over rows with reported availability (see components/quality.py)
+    availability = (availability_flags(filtered_data['Stock Availability (Y/N)']).groupby(filtered_data['Platform']).mean() * 100
+                    ).reset_index(name='Availability')
+
+    # Merge the two dataframes
+    return pd.merge(avg_discount, availability, on='Platform')
+
+
+# The figure is cached too, a warm hit skips the aggregation and Plotly alike
+@cached()
+def platform_summary_figure(filters, products, file_path=FILE_PATH):
+    merged_data = platform_summary(filters, products, file_path)
+    if merged_data is None:
+        return None
+    # Create a grouped bar chart
+    fig = px.bar(merged_data, x='Platform', y=['Discount', 'Availability'],
+        barmode='group', title='Average Discount Percentage and Availability by Platform',labels={'value': 'Percentage'})
+
+    # Update the layout to show values on the bars
+    fig.update_traces(texttemplate='%{y:.2f}%', textposition='outside')
+    return fig
+
+
+def create_top_container(data, batch=False):
+    # In batch mode the filters only take effect when "Apply filters" is pressed
+    container = st.form("page2_filters", border=False) if batch else st.container()
+    with container:
+        # Create four containers in the first row
+        col1, col2, col3, col4 , col5 = st.columns([2,2,2,1,1])
+
+        with col1:
+            st.subheader("Select Category")
+            categories = column_options('Category')
+            selected_categories = st.multiselect("Categories", categories)
+
+        with col2:
+            st.subheader("Select Platform")
+            platforms = column_options('Platform', 'Category', tuple(selected_categories))
+            selected_platforms = st.multiselect("Platforms", platforms)
+
+        with col3:
+            st.subheader("Select City")
+            cities = column_options('City', 'Platform', tuple(selected_platforms))
+            selected_cities = st.multiselect("Cities", cities)
+
+         # Calculate min and max dates from the data
+        min_date = data['Report Date'].min().strftime('%d/%m/%Y')
+        max_date = data['Report Date'].max().strftime('%d/%m/%Y')
+        # with col4:
+        #     st.subheader("Select Date From")
+        #     selected_date_f = st.date_input("From Date", value=datetime.strptime(min_date, '%d/%m/%Y').date())
+        #     selected_date_from = selected_date_f.strftime('%d/%m/%Y')
+
+        # with col4:
+        #     st.subheader("Select Date To")
+        #     selected_date_to = st.date_input("To Date", value=datetime.strptime(max_date, '%d/%m/%Y').date())
+        #     selected_date_to = selected_date_to.strftime('%d/%m/%Y')
+        with col4:
+            st.subheader("Date")
+            # col4_1, col4_2 = st.columns(2)
+            # with col4_1:
+                # st.subheader("Date Selector")
+            selected_date_from = st.date_input("From Date", value=datetime.strptime(min_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
+            selected_date_from = selected_date_from.strftime('%d/%m/%Y')
+        with col5:
+            # with col4_2:
+            st.subheader("")
+            selected_date_to = st.date_input("To Date", value=datetime.strptime(max_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
+            selected_date_to = selected_date_to.strftime('%d/%m/%Y')
+
+        if batch:
+            st.form_submit_button("Apply filters")
 
-def create_top_container(data):
-    # Create four containers in the first row
-    col1, col2, col3, col4 , col5 = st.columns([2,2,2,1,1])
-    
-    with col1:
-        st.subheader("Select Category")
-        categories = data['Category'].unique().tolist()
-        selected_categories = st.multiselect("Categories", categories)
-        
-    with col2:
-        st.subheader("Select Platform")
-        if selected_categories:
-            filtered_data = data[data['Category'].isin(selected_categories)]
-            platforms = filtered_data['Platform'].unique().tolist()
-        else:
-            platforms = data['Platform'].unique().tolist()
-        selected_platforms = st.multiselect("Platforms", platforms)
-        
-    with col3:
-        st.subheader("Select City")
-        if selected_platforms:
-            filtered_data = data[data['Platform'].isin(selected_platforms)]
-            cities = filtered_data['City'].unique().tolist()
-        else:
-            cities = data['City'].unique().tolist()
-        selected_cities = st.multiselect("Cities", cities)
-        
-     # Calculate min and max dates from the data
-    min_date = data['Report Date'].min().strftime('%d/%m/%Y')
-    max_date = data['Report Date'].max().strftime('%d/%m/%Y')    
-    # with col4:
-    #     st.subheader("Select Date From")
-    #     selected_date_f = st.date_input("From Date", value=datetime.strptime(min_date, '%d/%m/%Y').date())
-    #     selected_date_from = selected_date_f.strftime('%d/%m/%Y')
-        
-    # with col4:
-    #     st.subheader("Select Date To")
-    #     selected_date_to = st.date_input("To Date", value=datetime.strptime(max_date, '%d/%m/%Y').date())
-    #     selected_date_to = selected_date_to.strftime('%d/%m/%Y')
-    with col4:
-        st.subheader("Date")       
-        # col4_1, col4_2 = st.columns(2)
-        # with col4_1:
-            # st.subheader("Date Selector")
-        selected_date_from = st.date_input("From Date", value=datetime.strptime(min_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
-        selected_date_from = selected_date_from.strftime('%d/%m/%Y')
-    with col5:        
-        # with col4_2:
-        st.subheader("")
-        selected_date_to = st.date_input("To Date", value=datetime.strptime(max_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
-        selected_date_to = selected_date_to.strftime('%d/%m/%Y')
-        
     return selected_categories, selected_platforms, selected_cities, selected_date_from,selected_date_to
 
 
-def bottom_container(filtered_data):
-    # Create three containers in the second row
+# The filter bar stays in the full script run, since every panel below reads its
+# filters; it hands them (and the comparison periods) to the fragments through
+# st.session_state. Each fragment reruns alone when one of its own widgets changes.
+
+@st.fragment
+def product_panels():
+    # Picking products reruns the product picker and the charts that depend on it
+    filters = st.session_state['page2_filters']
     col1, col2, col3 = st.columns([1, 2, 2])
-    
+
     with col1:
         st.subheader("Select Product")
-        if filtered_data is not None:
-            products = filtered_data['Product Description'].unique().tolist()
-            selected_products = st.multiselect("Products", products)
-        else:
-            selected_products = []
-        # Apply product filter
-        if selected_products:
-            filtered_data_with_products = filtered_data[filtered_data['Product Description'].isin(selected_products)]
-        else:
-            filtered_data_with_products = filtered_data
+        selected_products = product_multiselect(load_product_index(FILE_PATH, load_data(FILE_PATH)), "Products",
+                                                key="page2_products", categories=filters['categories'],
+                                                products=product_options(filters))
+
+    # Usage log entry for this rerun, see components/usage_log.py
+    interaction = Interaction("page2", dict(filters, products=selected_products))
 
-    
     with col2:
         st.subheader("Average Discount Percentage and Availability Graph")
-        if not filtered_data_with_products.empty:
-            # Calculate average discount percentage
-            avg_discount = filtered_data_with_products.groupby('Platform')['Discount'].mean().reset_index()
-
-            # Calculate availability percentage
-            # N O T E ::::: Here i have ignored empty cell from calculation
-            availability = filtered_data_with_products.groupby('Platform')['Stock Availability (Y/N)'].apply(
-                lambda x: (x[x == 'Yes'].count() / x[x != ''].count()) * 100
-            ).reset_index(name='Availability')
-
-            # Merge the two dataframes
-            merged_data = pd.merge(avg_discount, availability, on='Platform')
-
-            # Create a grouped bar chart
-            fig = px.bar(merged_data, x='Platform', y=['Discount', 'Availability'], 
-                barmode='group', title='Average Discount Percentage and Availability by Platform',labels={'value': 'Percentage'})
-            
-            # Update the layout to show values on the bars
-            fig.update_traces(texttemplate='%{y:.2f}%', textposition='outside')
-
+        with interaction.stage('platform_summary'):
+            fig = platform_summary_figure(filters, tuple(selected_products))
+        if fig is not None:
             st.plotly_chart(fig)
         else:
-            st.warning("No data available for the selected product.")   
-        
-    
+            st.warning("No data available for the selected product.")
+
+
     with col3:
         st.subheader("Selling Price Trend")
-        if not filtered_data.empty and 'Selling Price' in filtered_data.columns:
-            # Filter out rows with empty Selling Price values
-            filtered_data = filtered_data.dropna(subset=['Selling Price'])
-            # Extract year and quarter from 'Report Date' for the x-axis
-            filtered_data['Year'] = filtered_data['Report Date'].dt.year
-            filtered_data['Quarter'] = filtered_data['Report Date'].dt.quarter
-            # st.write("Trend data:", filtered_data)
-            # Create a Plotly line chart with quarters on the x-axis
-            price_fig = px.line(filtered_data, x='Year', y='Selling Price', color='Quarter', title='Selling Price Trend by Quarter')
-            
+        with interaction.stage('price_trend'):
+            resolution, trend = load_price_history(FILE_PATH).query(
+                datetime.strptime(filters['date_from'], '%d/%m/%Y'),
+                datetime.strptime(filters['date_to'], '%d/%m/%Y'),
+                categories=filters['categories'], platforms=filters['platforms'],
+                cities=filters['cities'], products=selected_products,
+            )
+        interaction.count('trend_points', len(trend))
+        if not trend.empty:
+            # Mean price per period, with the period's range and last price on hover
+            price_fig = px.line(trend, x='period', y='mean', color='Platform', markers=True,
+                                hover_data={'min': ':.2f', 'max': ':.2f', 'last': ':.2f'},
+                                labels={'period': resolution.title(), 'mean': 'Selling Price'},
+                                title=f'Selling Price Trend by {resolution.title()}')
+
             # Display the chart in Streamlit
             st.plotly_chart(price_fig)
         else:
             st.warning("No data available for the selected product.")
-    
-    return selected_products
 
-@st.cache_data
+    # Both periods come out of one grouped pass over the rows spanning them
+    windows = st.session_state['page2_windows']
+    if windows is not None:
+        with interaction.stage('comparison'):
+            date_from, date_to = date_span(*windows)
+            rows = apply_filters(load_data(FILE_PATH), dict(filters, date_from=date_from, date_to=date_to))
+            if selected_products:
+                rows = rows[rows['Product Description'].isin(selected_products)]
+            show_comparison(rows, windows, 'Platform')
+
+    interaction.finish()
+
+
+@st.fragment
+def distribution_section():
+    # Switching the metric only redraws this chart
+    filters = st.session_state['page2_filters']
+    interaction = Interaction("page2", filters)
+    st.subheader("Price and Discount Distribution by Platform")
+    with interaction.stage('distribution'):
+        distribution = distribution_panel(load_quantile_sketches(FILE_PATH), filters, 'Platform',
+                                          key="page2_distribution_metric")
+    interaction.count('distribution_groups', len(distribution))
+    interaction.finish()
+
+
+@st.fragment
+def breadth_section():
+    # Distinct-SKU KPIs and their breakdown; switching the breakdown only reruns this section
+    filters = st.session_state['page2_filters']
+    interaction = Interaction("page2", filters)
+    distinct = load_distinct_sketches(FILE_PATH)
+    st.subheader("Assortment Breadth")
+    breadth_by = st.selectbox("Breakdown", ['Platform', 'City', 'Brand Name'], key="page2_breadth_by")
+    breadth_filters = dict(
+        date_from=datetime.strptime(filters['date_from'], '%d/%m/%Y'),
+        date_to=datetime.strptime(filters['date_to'], '%d/%m/%Y'),
+        platforms=filters['platforms'], cities=filters['cities'], categories=filters['categories'],
+    )
+    with interaction.stage('assortment_breadth'):
+        totals = distinct.distinct(**breadth_filters)
+        breadth = distinct.distinct(group_by=breadth_by, **breadth_filters)
+    col1, col2, col3 = st.columns([1, 1, 3])
+    col1.metric("Distinct SKUs Listed", totals['listed'])
+    col2.metric("Distinct SKUs In Stock", totals['in_stock'])
+    with col3:
+        if breadth.empty:
+            st.warning("No data available for the selected filters.")
+        else:
+            fig = px.bar(breadth, x=breadth_by, y=['listed', 'in_stock'], barmode='group',
+                         labels={'value': 'Distinct SKUs', 'variable': ''},
+                         title=f'Distinct SKUs Listed and In Stock by {breadth_by}')
+            fig.update_traces(texttemplate='%{y}', textposition='outside')
+            st.plotly_chart(fig)
+    st.caption(f"HyperLogLog estimates, within about ±{2 * RELATIVE_ERROR:.1%} of the exact count 95% of the time.")
+    interaction.finish()
+
 def load_data(file_path):
-    if os.path.exists(file_path):
-        data= pd.read_excel(file_path,parse_dates=['Report Date'])
-        return data
-    else:
-        st.error(f"Source data file not found: {file_path}")
-        return None
+    # Shared copy-on-write frame with Discount already numeric
+    return load_competition(file_path)
 
 def run():
     global data
-    data = load_data("data/competition.xlsx")
-    data['Discount'] = data['Discount'].str.replace("%", "").astype(float)
+    data = load_data(FILE_PATH)
 
     if data is not None:
-        selected_categories, selected_platforms, selected_cities, selected_date_from,selected_date_to = create_top_container(data)
-        
-        # Filter data based on selected options
-        filtered_data = data.copy()
-        if selected_date_from and selected_date_to:
-            filtered_data = filtered_data[(filtered_data['Report Date'] >= selected_date_from) & (filtered_data['Report Date'] <= selected_date_to)]
-        if selected_categories:
-            filtered_data = filtered_data[filtered_data['Category'].isin(selected_categories)]
-        if selected_platforms:
-            filtered_data = filtered_data[filtered_data['Platform'].isin(selected_platforms)]
-        if selected_cities:
-            filtered_data = filtered_data[filtered_data['City'].isin(selected_cities)]
-        print("Selected date from:",selected_date_from)
-        
-       
+        batch = st.sidebar.toggle("Apply filters in batch", key="page2_batch",
+                                  help="Change several filters, then press Apply filters to update the charts once.")
+        selected_categories, selected_platforms, selected_cities, selected_date_from,selected_date_to = create_top_container(data, batch)
+        filters = {
+            'categories': tuple(selected_categories),
+            'platforms': tuple(selected_platforms),
+            'cities': tuple(selected_cities),
+            'date_from': selected_date_from,
+            'date_to': selected_date_to,
+        }
+
+        # Fold any new report dates into the shared price history and sketches
+        load_price_history(FILE_PATH).update(data)
+        load_quantile_sketches(FILE_PATH).update(data)
+        load_distinct_sketches(FILE_PATH).update(data)
+
         st.empty()
 
-        # Further filter data based on selected products
-        selected_products = bottom_container(filtered_data)
-        if selected_products:
-            filtered_data = filtered_data[filtered_data['Product Description'].isin(selected_products)]
-        
+        # Sidebar widgets cannot live inside a fragment, so the periods are picked here
+        st.session_state['page2_filters'] = filters
+        st.session_state['page2_windows'] = comparison_windows(data, "page2")
+
+        product_panels()
+        distribution_section()
+        breadth_section()
+
         # Display filtered data
         # st.write(filtered_data)
 
@@ -167,4 +284,4 @@ def run():
     st.markdown("**Powered by Purple Block**")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
@@ -1,154 +1,207 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import os
 from datetime import datetime
+from components.comparison import comparison_windows, date_span, show_comparison
+from components.data import load_competition
+from components.metrics import brand_discount_availability_table, brand_price_table
+from components.result_cache import cached
+from components.product_search import load_product_index, product_multiselect
+from components.sketches import distribution_panel, load_quantile_sketches
+from components.tasks import run_panels, show_panel
+from components.usage_log import Interaction
+from page.page2 import apply_filters, product_options
+
+FILE_PATH = "data/competition.xlsx"
 
 # Function to load data
-@st.cache_data
 def load_data(file_path):
-    if os.path.exists(file_path):
-        data= pd.read_excel(file_path,parse_dates=['Report Date'])
-        return data
-    else:
-        st.error(f"Source data file not found: {file_path}")
+    # Shared copy-on-write frame with Discount already numeric
+    return load_competition(file_path)
+
+@cached()
+def column_options(column, file_path=FILE_PATH):
+    return load_data(file_path)[column].unique().tolist()
+
+# Filtered rows for the bottom charts, recomputed only when filters or products change
+def filtered_rows(filters, products, file_path=FILE_PATH):
+    filtered_data = apply_filters(load_data(file_path), filters)
+    if products:
+        filtered_data = filtered_data[filtered_data['Product Description'].isin(products)]
+    return filtered_data
+
+@cached()
+def brand_discount_availability(filters, products, file_path=FILE_PATH):
+    filtered_data = filtered_rows(filters, products, file_path)
+    if filtered_data.empty:
+        return None
+    return brand_discount_availability_table(filtered_data)
+
+@cached()
+def brand_prices(filters, products, file_path=FILE_PATH):
+    filtered_data = filtered_rows(filters, products, file_path)
+    if filtered_data.empty:
+        return None
+    return brand_price_table(filtered_data)
+
+# The figures are cached too, a warm hit skips the aggregation and Plotly alike
+@cached()
+def brand_discount_availability_figure(filters, products, file_path=FILE_PATH):
+    merged_data = brand_discount_availability(filters, products, file_path)
+    if merged_data is None:
+        return None
+    # Grouped bar chart for discount and availability by brand
+    fig = px.bar(
+        merged_data,
+        x='Brand Name',
+        y=['Discount', 'Availability Percentage'],
+        barmode='group',
+        # title='Availability Percent and Avg Discount Percent by Brand'
+    )
+
+    # Update the layout to show values on the bars
+    fig.update_traces(texttemplate='%{y:.2f}', textposition='outside')
+    return fig
+
+@cached()
+def brand_prices_figure(filters, products, file_path=FILE_PATH):
+    avg_price_by_brand = brand_prices(filters, products, file_path)
+    if avg_price_by_brand is None:
         return None
+    # Create a bar chart using plotly.express
+    fig = px.bar(avg_price_by_brand, x='Brand Name', y=['Selling Price', 'MRP'], barmode='group',
+                title='Avg Selling Price and Avg MRP by Brand')
+
+    # Update the layout to show values on the bars
+    fig.update_traces(texttemplate='%{y:.2f}', textposition='outside')
+    return fig
 
 # Function to create the top container with filters
-def create_top_container(data):
-    col1, col2, col3, col4,col5 = st.columns([2,1,1,2,2])
-    
-    with col1:
-        st.subheader("Select Category")
-        categories = data['Category'].unique().tolist()
-        selected_categories = st.multiselect("Categories", categories)
-        
-    # Calculate min and max dates from the data
-    min_date = data['Report Date'].min().strftime('%d/%m/%Y')
-    max_date = data['Report Date'].max().strftime('%d/%m/%Y')        
-    with col2:
-        st.subheader("Date")
-        selected_date_from = st.date_input("From Date", value=datetime.strptime(min_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
-        selected_date_from = selected_date_from.strftime('%d/%m/%Y')
+def create_top_container(data, batch=False):
+    # In batch mode the filters only take effect when "Apply filters" is pressed
+    container = st.form("page3_filters", border=False) if batch else st.container()
+    with container:
+        col1, col2, col3, col4,col5 = st.columns([2,1,1,2,2])
+
+        with col1:
+            st.subheader("Select Category")
+            categories = column_options('Category')
+            selected_categories = st.multiselect("Categories", categories)
+
+        # Calculate min and max dates from the data
+        min_date = data['Report Date'].min().strftime('%d/%m/%Y')
+        max_date = data['Report Date'].max().strftime('%d/%m/%Y')
+        with col2:
+            st.subheader("Date")
+            selected_date_from = st.date_input("From Date", value=datetime.strptime(min_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
+            selected_date_from = selected_date_from.strftime('%d/%m/%Y')
+
+        with col3:
+            st.subheader(" ")
+            selected_date_to = st.date_input("To Date", value=datetime.strptime(max_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
+            selected_date_to = selected_date_to.strftime('%d/%m/%Y')
+
+        with col4:
+            st.subheader("Select Platform")
+            platforms = column_options('Platform')
+            selected_platforms = st.multiselect("Platforms", platforms)
+
+        with col5:
+            st.subheader("Select City")
+            cities = column_options('City')
+            selected_cities = st.multiselect("Cities", cities)
+
+        if batch:
+            st.form_submit_button("Apply filters")
 
-    with col3:
-        st.subheader(" ")
-        selected_date_to = st.date_input("To Date", value=datetime.strptime(max_date, '%d/%m/%Y').date(), min_value=datetime.strptime(min_date, '%d/%m/%Y').date(), max_value=datetime.strptime(max_date, '%d/%m/%Y').date())
-        selected_date_to = selected_date_to.strftime('%d/%m/%Y')
-        
-    with col4:
-        st.subheader("Select Platform")
-        platforms = data['Platform'].unique().tolist()
-        selected_platforms = st.multiselect("Platforms", platforms)
-        
-    with col5:
-        st.subheader("Select City")
-        cities = data['City'].unique().tolist()
-        selected_cities = st.multiselect("Cities", cities)
-        
     return selected_categories, selected_date_from,selected_date_to, selected_platforms, selected_cities
 
 
-# Function to create the bottom container with plots
-def bottom_container(filtered_data):
+# The filter bar stays in the full script run, since every panel below reads its
+# filters; it hands them (and the comparison periods) to the fragments through
+# st.session_state. Each fragment reruns alone when one of its own widgets changes.
+
+@st.fragment
+def product_panels():
+    # Picking products reruns the product picker and the charts that depend on it
+    filters = st.session_state['page3_filters']
     col1, col2, col3 = st.columns([1,2,2])
-    
+
     with col1:
         st.subheader("Select Product")
-        if filtered_data is not None:
-            products = filtered_data['Product Description'].unique().tolist()
-            selected_products = st.multiselect("Products", products)
-        else:
-            selected_products = []
-        # Apply product filter
-        if selected_products:
-            filtered_data_with_products = filtered_data[filtered_data['Product Description'].isin(selected_products)]
-        else:
-            filtered_data_with_products = filtered_data
-        
+        selected_products = product_multiselect(load_product_index(FILE_PATH, load_data(FILE_PATH)), "Products",
+                                                key="page3_products", categories=filters['categories'],
+                                                products=product_options(filters))
+        products = tuple(selected_products)
+
+    # Usage log entry for this rerun, see components/usage_log.py
+    interaction = Interaction("page3", dict(filters, products=selected_products))
+
+    # Both charts are independent, build them side by side; a failure only blanks its own chart
+    panels = run_panels({
+        'brand_discount_availability': lambda: brand_discount_availability_figure(filters, products),
+        'brand_prices': lambda: brand_prices_figure(filters, products),
+    }, interaction)
+
     with col2:
-        try:
-            st.subheader("Availability Percent and Avg Discount Percent by Brand")
-            if filtered_data_with_products is not None and 'Discount' in filtered_data_with_products.columns and 'Stock Availability (Y/N)' in filtered_data_with_products.columns:
-                # Ensure Discount column is in percentage format
-                filtered_data_with_products['Discount'] = pd.to_numeric(filtered_data_with_products['Discount'].str.replace('%', ''), errors='coerce')
-                
-                # Calculate average discount percentage
-                avg_discount = filtered_data_with_products.groupby('Brand Name')['Discount'].mean().reset_index()
-                
-                # Calculate availability percentage for each brand
-                availability_percentage = filtered_data_with_products.groupby('Brand Name')['Stock Availability (Y/N)'].apply(
-                    lambda x: (x[x == 'Yes'].count() / x[x != ''].count()) * 100
-                ).reset_index(name='Availability Percentage')
-                availability_percentage.columns = ['Brand Name', 'Availability Percentage']
-                
-                # st.write(availability_percentage)
-                # Merge the two dataframes
-                merged_data = pd.merge(avg_discount, availability_percentage, on='Brand Name')
-                
-                # Grouped bar chart for discount and availability by brand
-                fig = px.bar(
-                    merged_data,
-                    x='Brand Name',
-                    y=['Discount', 'Availability Percentage'],
-                    barmode='group',
-                    # title='Availability Percent and Avg Discount Percent by Brand'
-                )
-                
-                # Update the layout to show values on the bars
-                fig.update_traces(texttemplate='%{y:.2f}', textposition='outside')
-                    
-                st.plotly_chart(fig)
-            else:
-                st.warning("No data available for the selected product.")
-        except Exception as e:
-            print(e)
-            st.warning("No data available for the selected product.")
+        st.subheader("Availability Percent and Avg Discount Percent by Brand")
+        show_panel(panels['brand_discount_availability'],
+                   lambda fig: st.plotly_chart(fig) if fig is not None else st.warning("No data available for the selected product."))
     with col3:
         st.subheader("Avg Selling Price and Avg MRP by Brand")
-        filtered_data=filtered_data_with_products
-        # Rename the column to remove special symbols
-        filtered_data.rename(columns={'MRP (₹)': 'MRP'}, inplace=True)
-        if filtered_data is not None and 'Selling Price' in filtered_data.columns and 'MRP' in filtered_data.columns:
-            # Group by 'Brand Name' and calculate the mean of 'Selling Price' and 'MRP'
-            avg_price_by_brand = filtered_data.groupby('Brand Name')[['Selling Price', 'MRP']].mean().reset_index()
-            
-            # Create a bar chart using plotly.express
-            fig = px.bar(avg_price_by_brand, x='Brand Name', y=['Selling Price', 'MRP'], barmode='group', 
-                        title='Avg Selling Price and Avg MRP by Brand')
-            
-            # Update the layout to show values on the bars
-            fig.update_traces(texttemplate='%{y:.2f}', textposition='outside')
-            
-            # Display the chart in Streamlit
-            st.plotly_chart(fig)
-        else:
-            st.warning("No selling price data available.")
+        # Display the chart in Streamlit
+        show_panel(panels['brand_prices'],
+                   lambda fig: st.plotly_chart(fig) if fig is not None else st.warning("No selling price data available."))
+
+    # Both periods come out of one grouped pass over the rows spanning them
+    windows = st.session_state['page3_windows']
+    if windows is not None:
+        with interaction.stage('comparison'):
+            date_from, date_to = date_span(*windows)
+            show_comparison(filtered_rows(dict(filters, date_from=date_from, date_to=date_to), products), windows, 'Brand Name')
+
+    interaction.finish()
+
+
+@st.fragment
+def distribution_section():
+    # Switching the metric only redraws this chart
+    filters = st.session_state['page3_filters']
+    interaction = Interaction("page3", filters)
+    st.subheader("Price and Discount Distribution by Brand")
+    with interaction.stage('distribution'):
+        distribution = distribution_panel(load_quantile_sketches(FILE_PATH), filters, 'Brand Name',
+                                          key="page3_distribution_metric")
+    interaction.count('distribution_groups', len(distribution))
+    interaction.finish()
+
 # Main function to run the app
 def run():
     global data
-    data = load_data("data/competition.xlsx")
-    
+    data = load_data(FILE_PATH)
+
     if data is not None:
-        selected_categories, selected_date_f,selected_date_t, selected_platforms, selected_cities = create_top_container(data)
-        
-        # Filter data based on selected options
-        filtered_data = data.copy()
-        if selected_categories:
-            filtered_data = filtered_data[filtered_data['Category'].isin(selected_categories)]
-        if selected_date_f and selected_date_t:
-            filtered_data = filtered_data[(filtered_data['Report Date'] >= selected_date_f) & (filtered_data['Report Date'] <= selected_date_t)]
-        if selected_platforms:
-            filtered_data = filtered_data[filtered_data['Platform'].isin(selected_platforms)]
-        if selected_cities:
-            filtered_data = filtered_data[filtered_data['City'].isin(selected_cities)]
-        
-        selected_products = bottom_container(filtered_data)
-        
-        # Further filter data based on selected products
-        if selected_products:
-            filtered_data = filtered_data[filtered_data['Product Description'].isin(selected_products)]
-        
+        batch = st.sidebar.toggle("Apply filters in batch", key="page3_batch",
+                                  help="Change several filters, then press Apply filters to update the charts once.")
+        selected_categories, selected_date_f,selected_date_t, selected_platforms, selected_cities = create_top_container(data, batch)
+        filters = {
+            'categories': tuple(selected_categories),
+            'platforms': tuple(selected_platforms),
+            'cities': tuple(selected_cities),
+            'date_from': selected_date_f,
+            'date_to': selected_date_t,
+        }
+
+        # Fold any new report dates into the shared distribution sketches
+        load_quantile_sketches(FILE_PATH).update(data)
+
+        # Sidebar widgets cannot live inside a fragment, so the periods are picked here
+        st.session_state['page3_filters'] = filters
+        st.session_state['page3_windows'] = comparison_windows(data, "page3")
+
+        product_panels()
+        distribution_section()
+
         # Display filtered data
         # st.write(filtered_data)
 
@@ -156,4 +209,4 @@ def run():
     st.markdown("**Powered by Purple Block**")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
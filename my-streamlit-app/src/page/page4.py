@@ -0,0 +1,69 @@
+import streamlit as st
+import pandas as pd
+import os
+import time
+from components.text_index import TextIndex, load_posts
+
+
+# ---------- Load Data Functions ----------
+@st.cache_resource(show_spinner="Indexing posts...", max_entries=2)
+def _load_post_index(file_path, mtime):
+    posts = load_posts(file_path)
+    return posts, TextIndex(posts['caption'].tolist())
+
+
+def load_post_index(file_path):
+    # Keyed on the file's mtime, so a refreshed export is re-indexed on the next rerun
+    if os.path.exists(file_path):
+        return _load_post_index(file_path, os.path.getmtime(file_path))
+    st.error(f"Post data file not found: {file_path}")
+    return None, None
+
+
+# ---------- Main App ----------
+def run():
+    st.title("🔎 Post Search")
+
+    posts, index = load_post_index("data.csv")
+
+    if index is not None:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            query = st.text_input(
+                "Search captions",
+                placeholder='e.g. bhujia OR namkeen, "limited edition", snacks -ad',
+            )
+        with col2:
+            per_page = st.selectbox("Results per page", [10, 20, 50], index=1)
+
+        st.caption('Terms are AND-ed by default. Supports OR, NOT / -term, "exact phrases" and parentheses. Emoji are searchable too.')
+
+        if query:
+            started = time.perf_counter()
+            # One evaluation per query: every match ranked, then paged here
+            total, ranked_ids, ranked_scores = index.search(query, per_page=None)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            pages = max(1, -(-total // per_page))
+            page_number = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+            start = (page_number - 1) * per_page
+            doc_ids, scores = ranked_ids[start:start + per_page], ranked_scores[start:start + per_page]
+
+            st.write(f"**{total}** matching posts ({elapsed_ms:.1f} ms) - page {page_number} of {pages}")
+
+            if total:
+                results = posts.iloc[doc_ids][['caption', 'location', 'video url', 'is_video']]
+                results.insert(0, 'score', scores.round(2))
+                st.dataframe(
+                    results,
+                    column_config={'video url': st.column_config.LinkColumn('video url')},
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            else:
+                st.warning("No posts match this query.")
+
+    # Footer
+    st.markdown("**Powered by Purple Block**")
+
+if __name__ == "__main__":
+    run()
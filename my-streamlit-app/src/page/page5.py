@@ -0,0 +1,62 @@
+import streamlit as st
+from datetime import datetime
+from components.change_feed import load_change_feed
+from page.page2 import create_top_container, load_data
+
+CHANGE_TYPES = ["Price", "Discount", "Stock In", "Stock Out", "Added", "Removed"]
+
+
+# Main function to run the app
+def run():
+    st.title("🔔 Competitor Change Feed")
+
+    file_path = "data/competition.xlsx"
+    data = load_data(file_path)
+
+    if data is not None:
+        # Only report dates not seen before are diffed
+        feed = load_change_feed(file_path)
+        feed.update(data)
+
+        selected_categories, selected_platforms, selected_cities, selected_date_from, selected_date_to = create_top_container(data)
+        selected_changes = st.multiselect("Change Types", CHANGE_TYPES, default=CHANGE_TYPES)
+
+        changes = feed.query(
+            date_from=datetime.strptime(selected_date_from, '%d/%m/%Y'),
+            date_to=datetime.strptime(selected_date_to, '%d/%m/%Y'),
+            categories=selected_categories,
+            platforms=selected_platforms,
+            cities=selected_cities,
+            change_types=selected_changes,
+        )
+
+        col1, col2, col3, col4, col5, col6 = st.columns(6)
+        counts = changes['Change'].value_counts()
+        col1.metric("Price Moves", int(counts.get("Price", 0)))
+        col2.metric("Discount Changes", int(counts.get("Discount", 0)))
+        col3.metric("Back In Stock", int(counts.get("Stock In", 0)))
+        col4.metric("Went Out Of Stock", int(counts.get("Stock Out", 0)))
+        col5.metric("Products Added", int(counts.get("Added", 0)))
+        col6.metric("Products Removed", int(counts.get("Removed", 0)))
+
+        if not changes.empty:
+            st.dataframe(
+                changes.sort_values(['Report Date', 'Change', 'Delta'], ascending=[False, True, True]),
+                column_config={
+                    'Report Date': st.column_config.DateColumn('Report Date', format='DD/MM/YYYY'),
+                    'Previous Date': st.column_config.DateColumn('Previous Date', format='DD/MM/YYYY'),
+                    'Before': st.column_config.NumberColumn('Before', format='%.2f'),
+                    'After': st.column_config.NumberColumn('After', format='%.2f'),
+                    'Delta': st.column_config.NumberColumn('Delta', format='%.2f'),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.info("No changes between report dates for the selected filters.")
+
+    # Footer
+    st.markdown("**Powered by Purple Block**")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from sample.rules import DEFAULT_RULES
+
+# Columns produced by calculate_hygiene_metrics, in display order
+HYGIENE_METRICS = [
+    "Activation_Hygiene", "Price_Hygiene", "EDD_Hygiene",
+    "Catalog_Hygiene", "Rating_Hygiene", "Availability_Hygiene",
+    "Deal_Hygiene", "Overall_Brand_Score"
+]
+
+# Raw sheets carry one `EDD_<pincode>` column of promised delivery days per pincode
+EDD_COLUMN = re.compile(r"^EDD_(\d{6})$")
+# A pincode is on time when delivery is promised within this many days
+EDD_TARGET_DAYS = 2
+
+
+def calculate_hygiene_metrics(df):
+    """
+    Calculate hygiene metrics for each row in the dataset
+    
+    Parameters:
+    df (pandas.DataFrame): DataFrame containing the required columns
+    
+    Returns:
+    pandas.DataFrame: New DataFrame with the original columns plus hygiene metrics columns (df is not modified)
+    """
+    # Every metric is derived with assign(), which returns a new frame that
+    # shares the untouched columns with `df` under copy-on-write
+    result_df = df.assign(
+        # 1. Activation Hygiene (100% if both validations are True, 0% if either is False)
+        Activation_Hygiene=((df['SNS Validation'] == True) &
+                            (df['BXGY Validation'] == True)) * 100,
+        Price_Hygiene=(df['Price Validation'] == True) * 100,
+        # 2. EDD Hygiene (100% if EDD ≤ 2, 0% if EDD > 2)
+        EDD_Hygiene=df['EDD'],
+        # 3. Catalog Hygiene (use raw Catalog Score for each row)
+        Catalog_Hygiene=df['Catalog Score'],
+        # 4. Rating Hygiene (divide by 5 and multiply by 100 for percentage)
+        Rating_Hygiene=(df['Ratings'] / 5) * 100,
+        # 5. Availability Hygiene (100% if Available, 0% if Not Available)
+        Availability_Hygiene=(df['Availability'] == 'Yes') * 100,
+        # 6. Deal Hygiene (100% if Coupon Validation is True, 0% if False)
+        Deal_Hygiene=df['Coupon Validation'] * 100,
+    )
+
+    # 7. Overall Brand Score
+    result_df = result_df.assign(Overall_Brand_Score=(
+        (result_df['Price_Hygiene'].fillna(0) * 0.2) +
+        (result_df['Activation_Hygiene'].fillna(0) * 0.05) +
+        (result_df['Deal_Hygiene'].fillna(0) * 0.05) +
+        (result_df['Availability_Hygiene'].fillna(0) * 0.2) +
+        (result_df['EDD_Hygiene'].fillna(0) * 0.1) +
+        (result_df['Rating_Hygiene'].fillna(0) * 0.2) +
+        (result_df['Catalog_Hygiene'].fillna(0) * 0.2)
+    ))   # Divide by 100 to get final percentage
+
+    return result_df
+
+
+def split_edd(df):
+    """
+    Move the wide `EDD_<pincode>` columns into a long delivery table.
+
+    Parameters:
+    df (pandas.DataFrame): Raw rows of the hygiene workbook
+
+    Returns:
+    tuple: (df without the EDD columns, long table with one row per observed
+    ASIN, date and pincode: row, ASIN, Date, pincode, days)
+    """
+    columns = [c for c in df.columns if EDD_COLUMN.match(c)]
+    pincodes = np.array([int(EDD_COLUMN.match(c).group(1)) for c in columns], dtype="int32")
+
+    # Rows x pincodes as one float block; only observed cells are kept
+    days = df[columns].to_numpy(dtype="float32")
+    row_pos, pin_pos = np.nonzero(~np.isnan(days))
+    edd = pd.DataFrame({
+        "row": df.index.to_numpy()[row_pos].astype("int32"),
+        "ASIN": pd.Categorical(df["ASIN"].to_numpy()[row_pos]),
+        "Date": pd.to_datetime(df["Date"].to_numpy()[row_pos]),
+        # Integer codes into the pincode dimension, not one column per pincode
+        "pincode": pd.Categorical.from_codes(pin_pos.astype("int16"), categories=pincodes),
+        "days": days[row_pos, pin_pos],
+    })
+    return df.drop(columns=columns), edd
+
+
+def edd_scores(edd, index, pincode_count):
+    """
+    EDD score per hygiene row: the share of tracked pincodes promised within
+    EDD_TARGET_DAYS, as a percentage. Pincodes without a promise count as
+    missed, rows without any promise score 0.
+    """
+    if pincode_count == 0:
+        return pd.Series(0.0, index=index)
+    on_time = edd["days"].le(EDD_TARGET_DAYS).groupby(edd["row"]).sum()
+    return (on_time.reindex(index, fill_value=0) * 100 / pincode_count).astype(float)
+
+
+def edd_by_pincode(edd, by=("pincode",)):
+    """Promise statistics per pincode (and any other key in `by`) in one groupby."""
+    on_time = edd["days"].le(EDD_TARGET_DAYS)
+    return edd.assign(on_time=on_time).groupby(list(by), observed=True).agg(
+        observations=("days", "size"),
+        avg_days=("days", "mean"),
+        on_time_pct=("on_time", "mean"),
+    ).assign(on_time_pct=lambda t: (t["on_time_pct"] * 100).round(2)).reset_index()
+
+
+def prepare_hygiene_with_edd(df, rules=DEFAULT_RULES):
+    """
+    Derive the scoring inputs (Catalog Score, EDD, cleaned Total Ratings,
+    and the Price/Coupon/SNS/BXGY validations from their rule and live
+    columns) from the raw hygiene sheet and compute the hygiene metrics.
+
+    Parameters:
+    df (pandas.DataFrame): Raw rows of the hygiene workbook
+    rules (HygieneRules): Tolerances for the rule-vs-live validations
+
+    Returns:
+    tuple: (scored rows, one per ASIN and date; long EDD table from split_edd)
+    """
+    df = df.copy(deep=False)
+
+    # Validations are recomputed from the rules, any precomputed flags in the sheet are ignored
+    validations = rules.validate(df)
+    df[list(validations)] = validations
+
+    df["Catalog Score"] = (df['Ratings'] >= 4).astype(int) + (df['Title Length'] >= 180).astype(int) + (df['Bullet Point Count'] > 5).astype(int) + (df['Images Count'] >= 7).astype(int) + (df['A+'] == 'Yes').astype(int)
+    df["Catalog Score"] = df["Catalog Score"]*20
+    df["Date"] = pd.to_datetime(df["Date"])
+
+    df['Total Ratings'] = (
+        df['Total Ratings']
+          .fillna('')                 # So NaN becomes an empty string
+          .astype(str)                # Convert numbers to string
+          .str.extract(r'(\d+)')[0]   # Extract only digits
+          .astype(float)              # Convert back to float
+    )
+
+    df, edd = split_edd(df)
+    df['EDD'] = edd_scores(edd, df.index, edd['pincode'].cat.categories.size)
+
+    return calculate_hygiene_metrics(df), edd
+
+
+def prepare_hygiene(df, rules=DEFAULT_RULES):
+    """Scored hygiene rows only, see prepare_hygiene_with_edd."""
+    return prepare_hygiene_with_edd(df, rules)[0]
+
+
+
+# ---------- Brand shards ----------
+
+def shard_name(brand):
+    """
+    Readable slug plus a short hash of the exact brand name, so brands that
+    slug alike ("A&B" / "A B", case, non-ASCII names) never share a shard.
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", str(brand)).strip("_").lower() or "brand"
+    return f"{slug}-{hashlib.sha1(str(brand).encode('utf-8')).hexdigest()[:8]}"
+
+
+def source_version(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def read_catalog(shard_dir):
+    """Brand catalog written by build_shards, or None if there is none yet."""
+    path = os.path.join(shard_dir, "catalog.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def build_shards(source_path, shard_dir, rules=DEFAULT_RULES):
+    """
+    Score the hygiene workbook once and write one parquet pair (scored rows,
+    long EDD table) per brand, plus a catalog of the brands found. Does
+    nothing if the catalog already matches the source file and the rule
+    settings. Shard directories of brands no longer in the catalog are
+    removed once the new catalog is in place.
+
+    Returns:
+    dict: The catalog, {"version": ..., "brands": {brand: {"shard", "rows"}}}
+    """
+    version = f"{source_version(source_path)}|{rules.version}"
+    catalog = read_catalog(shard_dir)
+    if catalog is not None and catalog.get("version") == version:
+        return catalog
+
+    scored, edd = prepare_hygiene_with_edd(pd.read_excel(source_path), rules)
+    brands = {}
+    for brand, rows in scored.groupby("Brand", sort=True).groups.items():
+        name = shard_name(brand)
+        if any(entry["shard"] == name for entry in brands.values()):
+            raise ValueError(f"Brand {brand!r} maps to shard {name!r}, which another brand already uses")
+        os.makedirs(os.path.join(shard_dir, name), exist_ok=True)
+        # Scored rows keep their original index, which the EDD `row` column points at
+        scored.loc[rows].to_parquet(os.path.join(shard_dir, name, "hygiene.parquet"))
+        brand_edd = edd[edd["row"].isin(rows)]
+        brand_edd = brand_edd.assign(ASIN=brand_edd["ASIN"].cat.remove_unused_categories())
+        brand_edd.to_parquet(os.path.join(shard_dir, name, "edd.parquet"), index=False)
+        brands[str(brand)] = {"shard": name, "rows": len(rows)}
+
+    catalog = {"version": version, "brands": brands}
+    # Catalog last: a half-written build is simply rebuilt next time
+    with open(os.path.join(shard_dir, "catalog.json.tmp"), "w", encoding="utf-8") as handle:
+        json.dump(catalog, handle, indent=2, sort_keys=True)
+    os.replace(os.path.join(shard_dir, "catalog.json.tmp"), os.path.join(shard_dir, "catalog.json"))
+
+    # Shards of an older build that the new catalog no longer points at
+    current = {entry["shard"] for entry in brands.values()}
+    for name in os.listdir(shard_dir):
+        path = os.path.join(shard_dir, name)
+        if name not in current and os.path.exists(os.path.join(path, "hygiene.parquet")):
+            shutil.rmtree(path, ignore_errors=True)
+    return catalog
+
+
+def read_shard(shard_dir, shard):
+    """One brand's scored rows and long EDD table."""
+    edd = pd.read_parquet(os.path.join(shard_dir, shard, "edd.parquet"))
+    return (
+        pd.read_parquet(os.path.join(shard_dir, shard, "hygiene.parquet")),
+        # Parquet keeps the values, restore the compact pincode dimension
+        edd.astype({"pincode": "category"}),
+    )
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Live price may differ from the rule price by this many rupees, or this
+# percent of the rule price, whichever band is wider. 0 / 0 is an exact
+# match, which is what the workbook's own validation columns expect.
+PRICE_TOLERANCE = float(os.environ.get("HYGIENE_PRICE_TOLERANCE", "0"))
+PRICE_TOLERANCE_PCT = float(os.environ.get("HYGIENE_PRICE_TOLERANCE_PCT", "0"))
+
+# Spellings treated as the same flag value when comparing rule and live
+FLAG_EQUIVALENTS = {
+    "yes": "yes", "y": "yes", "true": "yes", "1": "yes", "live": "yes", "active": "yes",
+    "no": "no", "n": "no", "false": "no", "0": "no", "": "no", "not live": "no", "inactive": "no",
+}
+
+# Validation column -> (rule column, live column)
+FLAG_RULES = {
+    "Coupon Validation": ("Coupon Rule", "Live Coupon"),
+    "SNS Validation": ("SNS Rule", "Live SNS"),
+    "BXGY Validation": ("BXGY Rule", "Live BXGY"),
+}
+PRICE_RULE = ("Price Validation", "Price Rule", "Live Price")
+VALIDATION_COLUMNS = [PRICE_RULE[0], *FLAG_RULES]
+
+
+class HygieneRules:
+    """
+    Rule-vs-live validations for the hygiene sheet, computed column-wise.
+
+    Price is valid when the live price is inside the tolerance band around
+    the rule price; a flag (coupon, SNS, BXGY) is valid when the live value
+    is equivalent to the rule's. Results are 1.0 / 0.0, or blank where
+    there is no rule (and, for price, no live price), matching the
+    validation columns the workbook used to carry.
+
+    Flag columns hold a handful of distinct strings, so they are factorized
+    and only the distinct values are normalized; the rows themselves are
+    compared as integer codes in one pass.
+    """
+
+    def __init__(self, price_tolerance=PRICE_TOLERANCE, price_tolerance_pct=PRICE_TOLERANCE_PCT,
+                 flag_equivalents=None):
+        self.price_tolerance = price_tolerance
+        self.price_tolerance_pct = price_tolerance_pct
+        self.flag_equivalents = FLAG_EQUIVALENTS if flag_equivalents is None else flag_equivalents
+
+    @property
+    def version(self):
+        """Changes whenever a setting does, so results cached under it are recomputed."""
+        equivalents = ",".join(f"{k}={v}" for k, v in sorted(self.flag_equivalents.items()))
+        return f"price:{self.price_tolerance}:{self.price_tolerance_pct}|flags:{equivalents}"
+
+    def validate_price(self, rule, live):
+        rule = pd.to_numeric(rule, errors="coerce").to_numpy(dtype=float)
+        live = pd.to_numeric(live, errors="coerce").to_numpy(dtype=float)
+        band = np.maximum(self.price_tolerance, np.abs(rule) * self.price_tolerance_pct / 100)
+        # A hair of slack so prices stored as floats still match exactly
+        valid = np.abs(live - rule) <= band + 1e-6
+        return np.where(np.isnan(rule) | np.isnan(live), np.nan, valid.astype(float))
+
+    def _tokens(self, values, missing):
+        # Normalize the distinct values once; rows map to their token through the codes
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        cleaned = [str(u).strip().lower() for u in uniques]
+        tokens = np.array([self.flag_equivalents.get(u, u) for u in cleaned] + [missing], dtype=object)
+        return tokens[codes]
+
+    def validate_flag(self, rule, live):
+        rule_tokens = self._tokens(rule, None)
+        # A blank live value means the feature is not running
+        live_tokens = self._tokens(live, self.flag_equivalents.get("", "no"))
+        valid = (rule_tokens == live_tokens).astype(float)
+        return np.where(pd.isna(rule_tokens), np.nan, valid)
+
+    def validate(self, df):
+        """
+        Validation columns for `df`.
+
+        Returns:
+        pandas.DataFrame: One float column per VALIDATION_COLUMNS entry, aligned with df
+        """
+        name, rule, live = PRICE_RULE
+        result = {name: self.validate_price(df[rule], df[live])}
+        for name, (rule, live) in FLAG_RULES.items():
+            result[name] = self.validate_flag(df[rule], df[live])
+        return pd.DataFrame(result, index=df.index)
+
+
+DEFAULT_RULES = HygieneRules()
@@ -0,0 +1,191 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class SalesEngine:
+    """
+    Month-to-date GMV against target for every category.
+
+    Daily GMV lives in one categories x days float array with a matching
+    month-to-date cumulative array, and monthly targets in a categories x
+    months array. New days are appended and their cumulative columns are
+    continued from the previous day in one vectorized cumsum per month, so
+    an update only touches the new days and a snapshot of every category
+    is a handful of column reads.
+
+    Parameters of update(): rows with Date, Category, GMV (blank for days
+    without actuals) and GMV_target, the category's target for the month.
+    """
+
+    def __init__(self):
+        self.categories = []
+        self._category_ids = {}
+        self.first_day = None
+        self.last_date = None
+        self.gmv = np.zeros((0, 0))
+        self.cumulative = np.zeros((0, 0))
+        self.first_month = None
+        self.targets = np.zeros((0, 0))
+        self._lock = threading.Lock()
+
+    # ---------- Layout helpers ----------
+
+    @staticmethod
+    def _day(dates):
+        return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+    @staticmethod
+    def _month(dates):
+        return np.asarray(dates, dtype='datetime64[M]').astype(np.int64)
+
+    def _dates(self, days):
+        return (np.asarray(days) + self.first_day).astype('datetime64[D]')
+
+    def _category_codes(self, categories):
+        new = [c for c in pd.unique(categories) if c not in self._category_ids]
+        for category in new:
+            self._category_ids[category] = len(self.categories)
+            self.categories.append(category)
+        if new:
+            grow = ((0, len(new)), (0, 0))
+            self.gmv = np.pad(self.gmv, grow, constant_values=np.nan)
+            self.cumulative = np.pad(self.cumulative, grow, constant_values=np.nan)
+            self.targets = np.pad(self.targets, grow, constant_values=np.nan)
+        return np.array([self._category_ids[c] for c in categories], dtype=np.int64)
+
+    # ---------- Ingest ----------
+
+    def update(self, sales):
+        """Append every day newer than `last_date`; returns the number of days added."""
+        with self._lock:
+            sales = sales.dropna(subset=['Date', 'Category'])
+            codes = self._category_codes(sales['Category'].to_numpy())
+            days = self._day(sales['Date'])
+            months = self._month(sales['Date'])
+
+            # Targets are per month and may arrive before the actuals
+            if len(sales):
+                if self.first_month is None:
+                    self.first_month = int(months.min())
+                month_pos = months - self.first_month
+                if month_pos.max() >= self.targets.shape[1]:
+                    extra = month_pos.max() + 1 - self.targets.shape[1]
+                    self.targets = np.pad(self.targets, ((0, 0), (0, extra)), constant_values=np.nan)
+                self.targets[codes, month_pos] = sales['GMV_target'].to_numpy(dtype=float)
+
+            # Actuals: only days after the last one already folded in
+            actual = sales['GMV'].notna().to_numpy()
+            if self.last_date is not None:
+                # Not in place: under copy-on-write to_numpy() can return a read-only view
+                actual = actual & (days > self._day(self.last_date))
+            if not actual.any():
+                return 0
+            if self.first_day is None:
+                self.first_day = int(days[actual].min())
+
+            start = self.gmv.shape[1]
+            end = int(days[actual].max()) - self.first_day + 1
+            new_days = end - start
+            block = np.full((len(self.categories), new_days), np.nan)
+            rows, cols = codes[actual], days[actual] - self.first_day - start
+            # Days a category reported are summed from 0, days it did not stay blank
+            block[rows, cols] = 0
+            np.add.at(block, (rows, cols), sales['GMV'].to_numpy(dtype=float)[actual])
+
+            # Month-to-date cumsum of the new days, carrying the previous day when the month continues
+            block_months = self._month(self._dates(np.arange(start, end)))
+            cumulative = np.empty_like(block)
+            for month in np.unique(block_months):
+                cols = np.flatnonzero(block_months == month)
+                carry = 0.0
+                if cols[0] == 0 and start > 0 and self._month(self._dates([start - 1]))[0] == month:
+                    carry = np.nan_to_num(self.cumulative[:, start - 1])
+                cumulative[:, cols] = np.nancumsum(block[:, cols], axis=1) + np.reshape(carry, (-1, 1))
+
+            self.gmv = np.hstack([self.gmv, block])
+            self.cumulative = np.hstack([self.cumulative, cumulative])
+            self.last_date = pd.Timestamp(self._dates([end - 1])[0])
+            return new_days
+
+    # ---------- Queries ----------
+
+    def _targets_for(self, day):
+        month = self._month(self._dates([day]))[0]
+        pos = month - self.first_month
+        if pos < 0 or pos >= self.targets.shape[1]:
+            return np.full(len(self.categories), np.nan)
+        return self.targets[:, pos]
+
+    def _position(self, as_of):
+        # Day column for `as_of`, clamped to the last day with actuals; None before the first
+        if self.last_date is None:
+            return None
+        as_of = pd.Timestamp(as_of or self.last_date)
+        day = min(int(self._day([as_of])[0]), int(self._day([self.last_date])[0])) - self.first_day
+        return day if day >= 0 else None
+
+    def snapshot(self, as_of=None):
+        """
+        Every category as of `as_of` (default: the last day with actuals):
+        month-to-date GMV, target to date, run-rate per day, projected
+        month-end GMV and attainment percentages. Attainment is NaN for a
+        category without a positive target for the month. Empty when there
+        are no actuals on or before `as_of`.
+        """
+        day = self._position(as_of)
+        if day is None:
+            return pd.DataFrame()
+        date = pd.Timestamp(self._dates([day])[0])
+        elapsed, days_in_month = date.day, date.days_in_month
+
+        target = self._targets_for(day)
+        mtd = self.cumulative[:, day]
+        run_rate = mtd / elapsed
+        projected = run_rate * days_in_month
+        target_to_date = target * elapsed / days_in_month
+        # A zero (or missing) target has no attainment, not an infinite one
+        has_target = target > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            attainment_to_date = np.where(has_target, mtd / target_to_date * 100, np.nan)
+            projected_attainment = np.where(has_target, projected / target * 100, np.nan)
+        return pd.DataFrame({
+            'Category': self.categories,
+            'MTD GMV': mtd,
+            'Target to Date': target_to_date,
+            'Attainment to Date %': attainment_to_date,
+            'Run Rate / Day': run_rate,
+            'Projected Month-End': projected,
+            'Month Target': target,
+            'Projected Attainment %': projected_attainment,
+        }).round(2).assign(**{'As Of': date.date()})
+
+    def series(self, category, as_of=None):
+        """
+        Daily series for one category's month up to `as_of`: cumulative GMV,
+        target to date and the run-rate projection through month end. Empty
+        when there are no actuals on or before `as_of`.
+        """
+        day = self._position(as_of)
+        if day is None or category not in self._category_ids:
+            return pd.DataFrame(columns=['Date', 'Cumulative GMV', 'Targeted GMV', 'Projected GMV'])
+        c = self._category_ids[category]
+        date = pd.Timestamp(self._dates([day])[0])
+        month_start = max(day - date.day + 1, 0)
+        month_days = np.arange(day - date.day + 1, day - date.day + 1 + date.days_in_month)
+
+        cumulative = np.full(month_days.size, np.nan)
+        observed = month_days[(month_days >= month_start) & (month_days <= day)]
+        cumulative[observed - month_days[0]] = self.cumulative[c, observed]
+
+        target = self._targets_for(day)[c]
+        day_of_month = np.arange(1, month_days.size + 1)
+        run_rate = self.cumulative[c, day] / date.day
+        projected = np.where(day_of_month >= date.day, run_rate * day_of_month, np.nan)
+        return pd.DataFrame({
+            'Date': pd.to_datetime(self._dates(month_days)),
+            'Cumulative GMV': cumulative,
+            'Targeted GMV': target * day_of_month / month_days.size,
+            'Projected GMV': projected,
+        })
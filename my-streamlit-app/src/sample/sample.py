@@ -1,79 +1,27 @@
 import streamlit as st
 import random
+import os
+import sys
 import pandas as pd
 # import matplotlib.pyplot as plt
 
-df = pd.read_excel("Demo-Hygine Data V3.xlsx")
-df_sales = pd.read_excel("sales.xlsx")
+# Filtering and derived columns share memory until written, no defensive copies needed
+pd.set_option("mode.copy_on_write", True)
 
-df["Catalog Score"] = (df['Ratings'] >= 4).astype(int) + (df['Title Length'] >= 180).astype(int) + (df['Bullet Point Count'] > 5).astype(int) + (df['Images Count'] >= 7).astype(int) + (df['A+'] == 'Yes').astype(int)
-df["Catalog Score"] = df["Catalog Score"]*20
-df["Date"] = pd.to_datetime(df["Date"])
+# Shared helpers live in src/components, one level up from this app. src goes first so
+# `sample` resolves to this package rather than to this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.usage_log import Interaction
 
-df['Total Ratings'] = (
-    df['Total Ratings']
-      .fillna('')                 # So NaN becomes an empty string
-      .astype(str)                # Convert numbers to string
-      .str.extract(r'(\d+)')[0]   # Extract only digits
-      .astype(float)              # Convert back to float
-)
+from sample.hygiene import EDD_TARGET_DAYS, build_shards, edd_by_pincode, read_shard
+from sample.sales import SalesEngine
 
-def calculate_hygiene_metrics(df):
-    """
-    Calculate hygiene metrics for each row in the dataset
-    
-    Parameters:
-    df (pandas.DataFrame): DataFrame containing the required columns
-    
-    Returns:
-    pandas.DataFrame: Original DataFrame with additional hygiene metrics columns
-    """
-    # Create a copy of the DataFrame to avoid modifying the original
-    result_df = df.copy()
-    
-    # 1. Activation Hygiene (100% if both validations are True, 0% if either is False)
-    result_df['Activation_Hygiene'] = ((result_df['SNS Validation'] == True) & 
-                                     (result_df['BXGY Validation'] == True)) * 100
-    
-    result_df['Price_Hygiene'] = (result_df['Price Validation'] == True) * 100
-    
-    # 2. EDD Hygiene (100% if EDD ≤ 2, 0% if EDD > 2)
-    result_df['EDD_Hygiene'] = result_df['EDD']
-    
-    # 3. Catalog Hygiene (use raw Catalog Score for each row)
-    result_df['Catalog_Hygiene'] = result_df['Catalog Score']
-    
-    # 4. Rating Hygiene (divide by 5 and multiply by 100 for percentage)
-    result_df['Rating_Hygiene'] = (result_df['Ratings'] / 5) * 100
-    
-    # 5. Availability Hygiene (100% if Available, 0% if Not Available)
-    result_df['Availability_Hygiene'] = (result_df['Availability'] == 'Yes') * 100
-    
-    # 6. Deal Hygiene (100% if Coupon Validation is True, 0% if False)
-    result_df['Deal_Hygiene'] = result_df['Coupon Validation'] * 100
-    
-    # 7. Overall Brand Score
-    result_df['Overall_Brand_Score'] = (
-        (result_df['Price_Hygiene'].fillna(0) * 0.2) +
-        (result_df['Activation_Hygiene'].fillna(0) * 0.05) +
-        (result_df['Deal_Hygiene'].fillna(0) * 0.05) +
-        (result_df['Availability_Hygiene'].fillna(0) * 0.2) +
-        (result_df['EDD_Hygiene'].fillna(0) * 0.1) +
-        (result_df['Rating_Hygiene'].fillna(0) * 0.2) +
-        (result_df['Catalog_Hygiene'].fillna(0) * 0.2)
-    )   # Divide by 100 to get final percentage
-
-    return result_df
-
-df['EDD_400013_Score'] = (df['EDD_400013'] <= 2).astype("int")
-df['EDD_600005_Score'] = (df['EDD_600005'] <= 2).astype("int")
-df['EDD_122102_Score'] = (df['EDD_122102'] <= 2).astype("int")
-df['EDD_700016_Score'] = (df['EDD_700016'] <= 2).astype("int")
-df['EDD_560068_Score'] = (df['EDD_560068'] <= 2).astype("int")
-
-df['EDD'] = (df['EDD_400013_Score'] + df['EDD_600005_Score'] + df['EDD_122102_Score'] + df['EDD_700016_Score'] + df['EDD_560068_Score'])*20
+HYGIENE_PATH = "Demo-Hygine Data V3.xlsx"
+SHARD_DIR = ".hygiene_shards"
+# Brands kept in memory at once, shared by all sessions
+HOT_SHARDS = 16
 
-df = calculate_hygiene_metrics(df)
+SALES_PATH = "sales.xlsx"
 
 st.set_page_config(initial_sidebar_state="collapsed")
 
@@ -86,6 +34,36 @@ footer {visibility: hidden;}
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner="Preparing brand data...")
+def load_catalog(version):
+    # Scores the workbook and writes per-brand shards only when the source changed
+    return build_shards(HYGIENE_PATH, SHARD_DIR)
+
+def brand_catalog():
+    stat = os.stat(HYGIENE_PATH)
+    return load_catalog(f"{stat.st_size}:{stat.st_mtime_ns}")
+
+# Least recently used shards are evicted once HOT_SHARDS brands are resident
+@st.cache_resource(max_entries=HOT_SHARDS, show_spinner="Loading brand data...")
+def load_brand_shard(shard, version):
+    # Scored rows plus the long pincode delivery table (row, ASIN, Date, pincode, days)
+    return read_shard(SHARD_DIR, shard)
+
+@st.cache_data(show_spinner=False)
+def read_sales(path, mtime):
+    return pd.read_excel(path, usecols=["Date", "Category", "GMV", "GMV_target"], parse_dates=["Date"])
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_sales_engine(path, mtime):
+    # Days already folded in are never revisited, so an edited sales file (new mtime) starts a new engine
+    return SalesEngine()
+
+def sales_engine():
+    mtime = os.path.getmtime(SALES_PATH)
+    engine = load_sales_engine(SALES_PATH, mtime)
+    engine.update(read_sales(SALES_PATH, mtime))
+    return engine
+
 def force_rerun():
     # Change the URL query parameters to force a rerun
     st.query_params = {"rerun": str(random.random())}
@@ -113,7 +91,7 @@ def show_brand():
         return
 
     st.title("Choose Brand")
-    brands = ["Oshea", "Origami", "Harissons"]
+    brands = sorted(brand_catalog()["brands"])
     choice = st.selectbox("Select brand:", brands)
 
     if st.button("Next"):
@@ -137,18 +115,26 @@ def show_analytics():
 
     # Show the sidebar only on this page
     st.sidebar.header("Analytics Sections")
-    mode = st.sidebar.radio("View mode:", ["Summary", "Drill Down"]) #, "Sales vs Target Trend"
+    mode = st.sidebar.radio("View mode:", ["Summary", "Drill Down", "Delivery", "Sales vs Target Trend"])
 
     st.title(f"Analytics for {st.session_state['selected_brand']}")
 
-    df_selection = df[df['Brand'] == st.session_state['selected_brand']]
+    # Only the selected brand's shard is read, never the other brands
+    catalog = brand_catalog()
+    entry = catalog["brands"].get(st.session_state['selected_brand'])
+    if entry is None:
+        st.warning("No hygiene data for this brand.")
+        return
+    df_selection, df_edd = load_brand_shard(entry["shard"], catalog["version"])
 
     if mode == "Summary":
         show_summary_tab(df_selection)
     elif mode == "Sales vs Target Trend":
-        show_sales_vs_target_tab(df_sales)
+        show_sales_vs_target_tab(sales_engine())
+    elif mode == "Delivery":
+        show_delivery_tab(df_selection, df_edd)
     else:
-        show_drilldown_tab(df_selection)
+        show_drilldown_tab(df_selection, df_edd)
 
 def show_summary_tab(df):
     st.subheader("Summary View")
@@ -158,7 +144,7 @@ def show_summary_tab(df):
     selected_cat = st.selectbox("Select a category:", categories)
 
     # Filter to just that sub‐category
-    filtered = df[df["Sub-category"] == selected_cat].copy()
+    filtered = df[df["Sub-category"] == selected_cat]
 
     # Sort the unique dates
     unique_dates = sorted(filtered["Date"].unique())
@@ -235,33 +221,42 @@ def show_summary_tab(df):
         filtered.groupby("Date", as_index=False)["Overall_Brand_Score"]
                 .mean()
     )
-    trend_df.set_index("Date", inplace=True)
+    trend_df = trend_df.set_index("Date")
     st.line_chart(trend_df["Overall_Brand_Score"])
 
 import streamlit as st
 import pandas as pd
 import numpy as np
 
-def show_sales_vs_target_tab(df):
+def show_sales_vs_target_tab(engine):
     st.subheader("Sales vs Targeted GMV Trend")
 
-    # Dropdown to select category
-    categories = df['Category'].dropna().unique()
-    selected_category = st.selectbox("Select Category", categories)
-
-    # Filter data for the selected category
-    filtered_df = df[df['Category'] == selected_category].copy()
+    snapshot = engine.snapshot()
+    if snapshot.empty:
+        st.write("No sales data available.")
+        return
 
-    # Ensure the Date column is in datetime format
-    filtered_df['Date'] = pd.to_datetime(filtered_df['Date'])
+    # Dropdown to select category
+    selected_category = st.selectbox("Select Category", snapshot['Category'])
+    row = snapshot[snapshot['Category'] == selected_category].iloc[0]
 
-    # Prepare data for the trend line
-    trend_data = filtered_df[['Date', 'Cumulative_GMV', 'Targeted_GMV']].set_index('Date')
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("MTD GMV", f"{row['MTD GMV']:,.0f}")
+    col2.metric("Run Rate / Day", f"{row['Run Rate / Day']:,.0f}")
+    col3.metric("Projected Month-End", f"{row['Projected Month-End']:,.0f}")
+    col4.metric("Projected Attainment", "No target" if pd.isna(row['Projected Attainment %']) else f"{row['Projected Attainment %']:.1f}%")
 
-    # Plot using Streamlit's line_chart
+    # Cumulative GMV against target to date, with the run-rate projection to month end
+    trend_data = engine.series(selected_category).set_index('Date')
     st.line_chart(trend_data)
+    st.caption(f"As of {row['As Of']:%d %b %Y}; projection assumes the month-to-date daily run-rate holds.")
+
+    st.markdown("#### All categories")
+    attainment = ['Attainment to Date %', 'Projected Attainment %']
+    st.dataframe(snapshot.sort_values('Projected Attainment %').style.format(precision=2)
+                 .format(precision=2, na_rep="no target", subset=attainment), hide_index=True)
 
-def show_drilldown_tab(df):
+def show_drilldown_tab(df, df_edd):
     st.subheader("Drill Down View")
 
     # 8 possible indicators
@@ -281,8 +276,8 @@ def show_drilldown_tab(df):
         "Activation_Hygiene": ['SNS Rule', 'Live SNS',
        'SNS Validation', 'BXGY Rule', 'Live BXGY', 'BXGY Validation'],
         "Price_Hygiene":      ['Price Rule', 'Live Price', 'Price Validation'],
-        "EDD_Hygiene":       [ 'EDD_400013', 'EDD_600005', 'EDD_122102',
-       'EDD_700016', 'EDD_560068'],
+        # Per-pincode promises are listed below the table from the long EDD store
+        "EDD_Hygiene":       [],
         "Catalog_Hygiene":    ['Ratings', 'Title Length','Bullet Point Count','Images Count', 'A+'],
         "Rating_Hygiene":     ['3 Star Ratings', '2 Star Ratings',
        '1 Star Ratings', 'Total Ratings', 'Ratings'],
@@ -315,17 +310,27 @@ def show_drilldown_tab(df):
         high = 0.01
     threshold_range = st.slider("Threshold Range", low, high, (low, high))
 
+    # Usage log entry for this rerun, see components/usage_log.py
+    interaction = Interaction("hygiene_drilldown", {
+        'brand': st.session_state.get('selected_brand'), 'category': cat_filter,
+        'indicator': chosen_indicator, 'date': None if date_choice == "All" else str(date_choice),
+        'threshold': "All" if threshold_range == (low, high) else "custom",
+    })
+    interaction.count('source', len(df))
+
     # --- Filtering ---
-    filtered_df = df.copy()
+    with interaction.stage('filter'):
+        filtered_df = df
 
-    if cat_filter != "All":
-        filtered_df = filtered_df[filtered_df["Sub-category"] == cat_filter]
-    if date_choice != "All":
-        filtered_df = filtered_df[filtered_df["Date"] == date_choice]
+        if cat_filter != "All":
+            filtered_df = filtered_df[filtered_df["Sub-category"] == cat_filter]
+        if date_choice != "All":
+            filtered_df = filtered_df[filtered_df["Date"] == date_choice]
 
-    # Keep rows whose chosen_indicator is within the threshold range
-    mask = filtered_df[chosen_indicator].between(*threshold_range, inclusive="both")
-    filtered_df = filtered_df[mask]
+        # Keep rows whose chosen_indicator is within the threshold range
+        mask = filtered_df[chosen_indicator].between(*threshold_range, inclusive="both")
+        filtered_df = filtered_df[mask]
+    interaction.count('result', len(filtered_df))
 
     st.markdown("### Filtered Results")
 
@@ -340,6 +345,53 @@ def show_drilldown_tab(df):
 
     st.dataframe(filtered_df[final_cols])
 
+    if chosen_indicator == "EDD_Hygiene":
+        st.markdown("#### Promised delivery days by pincode")
+        edd_rows = df_edd[df_edd["row"].isin(filtered_df.index)]
+        st.dataframe(edd_rows.drop(columns="row"), hide_index=True)
+    interaction.finish()
+
+def show_delivery_tab(df, df_edd):
+    import plotly.express as px
+
+    st.subheader("Delivery Promise by Pincode")
+
+    edd = df_edd
+    if edd.empty:
+        st.write("No delivery data available for this brand.")
+        return
+
+    # On-time share per pincode, joined to pincode coordinates
+    by_pincode = edd_by_pincode(edd).merge(load_pincode_locations(), on="pincode", how="left")
+    located = by_pincode.dropna(subset=["lat", "lng"])
+    if not located.empty:
+        fig = px.scatter_mapbox(
+            located, lat="lat", lon="lng", size="observations", color="on_time_pct",
+            color_continuous_scale="RdYlGn", range_color=(0, 100), hover_name="pincode",
+            hover_data={"city": True, "avg_days": ":.2f", "on_time_pct": ":.2f"},
+            labels={"on_time_pct": f"% within {EDD_TARGET_DAYS} days"},
+            mapbox_style="open-street-map", zoom=3.5, height=500,
+        )
+        st.plotly_chart(fig)
+    if len(located) < len(by_pincode):
+        st.caption(f"{len(by_pincode) - len(located)} pincodes have no coordinates in maps/pincodes.csv")
+
+    # Pincode x date heatmap of the same share
+    by_date = edd_by_pincode(edd, by=("pincode", "Date"))
+    heat = by_date.pivot(index="pincode", columns="Date", values="on_time_pct")
+    heat.columns = [d.strftime("%Y-%m-%d") for d in heat.columns]
+    fig = px.imshow(heat, color_continuous_scale="RdYlGn", zmin=0, zmax=100, aspect="auto",
+                    labels={"x": "Date", "y": "Pincode", "color": f"% within {EDD_TARGET_DAYS} days"})
+    fig.update_yaxes(type="category")
+    st.plotly_chart(fig)
+
+@st.cache_data
+def load_pincode_locations():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps", "pincodes.csv")
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["pincode", "city", "lat", "lng"])
+    return pd.read_csv(path, dtype={"pincode": "int32"})
+
 
 # -----------------------
 # Main Router
@@ -1,3 +1,4 @@
 import pandas as pd
-df= pd.read_excel("data/competition.xlsx",parse_dates=['Report Date'])
-print(df['Report Date'].dtype)
\ No newline at end of file
+from components.quality import parse_report_dates
+df= pd.read_excel("data/competition.xlsx")
+print(parse_report_dates(df['Report Date']).dtype)
\ No newline at end of file
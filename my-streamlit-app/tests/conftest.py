@@ -0,0 +1,8 @@
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# The app imports `components.*` / `page.*` from src, like `streamlit run` from that directory
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from components.assortment import AssortmentMatrix, rank_by_gaps
+
+
+def report(date, listings):
+    """Rows for one report date from {(product, city, platform): 'Yes' / 'No' / None}."""
+    return pd.DataFrame([
+        {'Product Description': product, 'Category': 'Snacks', 'City': city, 'Platform': platform,
+         'Report Date': pd.Timestamp(date), 'Stock Availability (Y/N)': stock}
+        for (product, city, platform), stock in listings.items()
+    ])
+
+
+def history():
+    return [
+        report("2024-12-01", {('Chips', 'Pune', 'Blinkit'): 'Yes', ('Soda', 'Pune', 'Blinkit'): 'Yes'}),
+        report("2024-12-02", {('Chips', 'Pune', 'Blinkit'): 'No', ('Soda', 'Pune', 'Zepto'): 'Yes',
+                              ('Tea', 'Delhi', 'Blinkit'): None}),
+        report("2024-12-03", {('Chips', 'Pune', 'Blinkit'): 'No', ('Nuts', 'Pune', 'Blinkit'): 'No'}),
+    ]
+
+
+def brute_force(frames, date_from, date_to):
+    rows = pd.concat(frames)
+    rows = rows[rows['Report Date'].between(date_from, date_to) & rows['Stock Availability (Y/N)'].notna()]
+    return rows.groupby(['Product Description', 'City', 'Platform'])['Stock Availability (Y/N)'].agg(
+        reported='size', in_stock=lambda s: int(s.eq('Yes').sum()))
+
+
+def test_window_sums_match_raw_rows_as_the_matrix_grows():
+    matrix = AssortmentMatrix()
+    frames = history()
+    for frame in frames:
+        matrix.update(frame)
+    # Already-folded dates are skipped
+    assert matrix.update(frames[0]) == 0
+    assert len(matrix.reported_totals) == 3
+
+    for date_from, date_to in (("2024-12-01", "2024-12-03"), ("2024-12-02", "2024-12-03"), ("2024-12-02", "2024-12-02")):
+        reported, in_stock = matrix.window(date_from, date_to)
+        expected = brute_force(frames, date_from, date_to)
+        for (product, city, platform), counts in expected.iterrows():
+            row, col = matrix._product_ids[product], matrix._cell_ids[(city, platform)]
+            assert reported[row, col] == counts['reported']
+            assert in_stock[row, col] == counts['in_stock']
+        assert reported.sum() == expected['reported'].sum()
+
+    reported, _ = matrix.window("2024-12-05", "2024-12-09")
+    assert reported.nnz == 0 and reported.shape == matrix.shape
+
+
+def test_stock_queries():
+    matrix = AssortmentMatrix()
+    matrix.update(pd.concat(history()))
+
+    assert matrix.out_of_stock_cities('Chips', date_from="2024-12-02") == ['Pune']
+    assert matrix.out_of_stock_cities('Chips') == []
+    # Dropped: listed in Pune before the window, not in stock (or not listed at all) during it
+    assert matrix.missing_products('Pune', date_from="2024-12-03", date_to="2024-12-03") == ['Chips', 'Soda']
+    assert matrix.missing_products('Pune', platforms=['Blinkit'], date_from="2024-12-02") == ['Chips', 'Soda']
+    # Nuts was never listed before the window, Tea never reported availability
+    assert 'Nuts' not in matrix.missing_products('Pune', date_from="2024-12-02")
+    assert matrix.missing_products('Delhi', date_from="2024-12-03") == []
+    assert matrix.missing_products('Pune') == []
+
+
+def test_coverage_and_ranking():
+    matrix = AssortmentMatrix()
+    matrix.update(pd.concat(history()))
+    coverage = matrix.coverage()
+    assert coverage.loc['Chips', 'Pune'] == round(100 / 3, 2)
+    assert coverage.loc['Soda', 'Pune'] == 100.0
+    assert np.isnan(coverage.loc['Tea', 'Delhi'])
+    assert list(rank_by_gaps(coverage).index) == ['Nuts', 'Chips', 'Soda', 'Tea']
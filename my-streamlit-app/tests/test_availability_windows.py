@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from components.availability_windows import HORIZON, AvailabilityWindowStore
+
+
+def report(date, listings):
+    """Rows for one report date from {(product, city): 'Yes' / 'No' / None}."""
+    return pd.DataFrame([
+        {'Product Description': product, 'City': city, 'Platform': 'Blinkit', 'Category': 'Snacks',
+         'Report Date': pd.Timestamp(date), 'Stock Availability (Y/N)': stock}
+        for (product, city), stock in listings.items()
+    ])
+
+
+def test_rolling_windows_only_count_their_days():
+    store = AvailabilityWindowStore()
+    store.update(report("2024-12-01", {('Chips', 'Pune'): 'No'}))
+    store.update(report("2024-12-20", {('Chips', 'Pune'): 'Yes'}))
+    store.update(report("2024-12-25", {('Chips', 'Pune'): 'Yes', ('Chips', 'Delhi'): None}))
+
+    # 2024-12-01 is 25 days back: inside the 30-day window only
+    assert store.rolling(7) == 100.0
+    assert store.rolling(14) == 100.0
+    assert store.rolling(30) == round(2 / 3 * 100, 2)
+    # Rows without reported availability are not counted
+    assert store.rolling(30, cities=['Delhi']) is None
+
+
+def test_ring_slots_are_cleared_after_a_gap():
+    store = AvailabilityWindowStore()
+    store.update(report("2024-12-01", {('Chips', 'Pune'): 'No'}))
+    # More than HORIZON days later every slot of the first date is gone
+    store.update(report(pd.Timestamp("2024-12-01") + pd.Timedelta(days=HORIZON), {('Chips', 'Pune'): 'Yes'}))
+    assert store.rolling(HORIZON) == 100.0
+    assert store.seen.sum() == 1
+
+
+def test_streak_counts_calendar_days_and_resets():
+    store = AvailabilityWindowStore()
+    store.update(pd.concat([
+        report("2024-12-01", {('Chips', 'Pune'): 'No', ('Soda', 'Pune'): 'No'}),
+        report("2024-12-05", {('Chips', 'Pune'): 'No', ('Soda', 'Pune'): 'Yes'}),
+    ]))
+    assert store.streaks() == {'longest': 5, 'out_now': 1}
+
+    # Back in stock ends the run
+    store.update(report("2024-12-06", {('Chips', 'Pune'): 'Yes', ('Soda', 'Pune'): 'No'}))
+    assert store.streaks() == {'longest': 1, 'out_now': 1}
+
+
+def test_streak_expires_when_key_is_missing_from_a_report_date():
+    store = AvailabilityWindowStore()
+    store.update(report("2024-12-01", {('Chips', 'Pune'): 'No', ('Soda', 'Delhi'): 'No'}))
+    store.update(report("2024-12-03", {('Soda', 'Delhi'): 'No'}))
+
+    per_city = store.streaks(group_by='City').set_index('City')
+    assert per_city.loc['Pune', 'longest_streak'] == 0
+    assert per_city.loc['Delhi', 'longest_streak'] == 3
+    assert np.array_equal(store.out_since >= 0, [False, True])
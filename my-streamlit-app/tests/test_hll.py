@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from components.hll import (
+    PRECISION, REGISTERS, RELATIVE_ERROR, DistinctSketchStore, estimate, hash_items, register_ranks,
+)
+
+
+def sketch(items):
+    registers, ranks = register_ranks(hash_items(items))
+    dense = np.zeros(REGISTERS, dtype=np.uint8)
+    np.maximum.at(dense, registers, ranks)
+    return dense
+
+
+def test_hashes_are_stable_and_ranks_in_range():
+    items = [f"item {i}" for i in range(1000)]
+    assert np.array_equal(hash_items(items), hash_items(list(items)))
+    registers, ranks = register_ranks(hash_items(items))
+    assert registers.max() < REGISTERS
+    assert ranks.min() >= 1 and ranks.max() <= 64 - PRECISION + 1
+
+
+def test_rank_counts_leading_zeros_exactly():
+    # Register 0, then a single set bit right after the register bits: one leading zero of the rest
+    word = np.array([1 << (63 - PRECISION - 1)], dtype=np.uint64)
+    registers, ranks = register_ranks(word)
+    assert registers[0] == 0 and ranks[0] == 2
+    # No bits set after the register: capped by the sentinel bit
+    registers, ranks = register_ranks(np.array([0xFFFC << 48], dtype=np.uint64))
+    assert registers[0] == REGISTERS - 1 and ranks[0] == 64 - PRECISION + 1
+
+
+def test_estimate_small_and_large_counts():
+    assert estimate(np.zeros(REGISTERS, dtype=np.uint8)) == 0
+    small = [f"product {i}" for i in range(500)]
+    # Linear counting: standard error of about 3 items at this size
+    assert abs(estimate(sketch(small)) - 500) <= 10
+    large = [f"product {i}" for i in range(200_000)]
+    assert abs(estimate(sketch(large)) / 200_000 - 1) < 3 * RELATIVE_ERROR
+
+
+def test_merge_is_union_not_sum():
+    left = [f"product {i}" for i in range(60_000)]
+    right = [f"product {i}" for i in range(40_000, 100_000)]
+    merged = np.maximum(sketch(left), sketch(right))
+    assert np.array_equal(merged, sketch(left + right))
+    assert abs(estimate(merged) / 100_000 - 1) < 3 * RELATIVE_ERROR
+
+
+def test_store_counts_each_item_once_across_keys_and_dates():
+    products = [f"product {i}" for i in range(300)]
+    rows = []
+    for date in pd.date_range("2024-12-01", periods=3):
+        for platform in ("Blinkit", "Zepto"):
+            for i, product in enumerate(products):
+                rows.append({
+                    'Platform': platform, 'City': 'Pune', 'Brand Name': f"Brand {i % 3}", 'Category': 'Snacks',
+                    'Report Date': date, 'Product Description': product,
+                    'Stock Availability (Y/N)': 'Yes' if i % 2 or platform == 'Zepto' else 'No',
+                })
+    data = pd.DataFrame(rows)
+    store = DistinctSketchStore()
+    assert store.update(data) == 18
+    assert store.update(data) == 0
+
+    overall = store.distinct()
+    assert abs(overall['listed'] - 300) <= 10 and abs(overall['in_stock'] - 300) <= 10
+    blinkit = store.distinct(platforms=['Blinkit'], date_to="2024-12-01")
+    assert abs(blinkit['in_stock'] - 150) <= 10
+    per_brand = store.distinct(group_by='Brand Name')
+    assert list(per_brand['Brand Name']) == ["Brand 0", "Brand 1", "Brand 2"]
+    assert (per_brand['listed'] - 100).abs().max() <= 10
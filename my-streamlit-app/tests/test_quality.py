@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from components.quality import parse_report_dates, publish, validate_competition
+
+CITIES = {"Pune", "Delhi"}
+
+
+def row(**overrides):
+    base = {
+        'Report Date': "18/12/2024", 'Brand Name': "Acme", 'Category': "Snacks",
+        'Product Description': "Chips 50g", 'City': "Pune", 'Platform': "Blinkit",
+        'Pincode': 411001, 'Unique Product ID': "P1",
+        'Stock Availability (Y/N)': "Yes", 'Selling Price': 90, 'MRP (₹)': 100, 'Discount': "10%",
+    }
+    return {**base, **overrides}
+
+
+def competition():
+    return pd.DataFrame([
+        row(),                                                          # clean
+        row(**{'Unique Product ID': "P2", 'Report Date': "20/12/24"}),  # clean, two-digit year
+        row(**{'Unique Product ID': "P3", 'Brand Name': "  "}),         # missing key: quarantined
+        row(**{'Unique Product ID': "P4", 'City': "Atlantis"}),         # unknown city: quarantined
+        row(**{'Unique Product ID': "P5", 'Selling Price': "n/a"}),     # not a number: quarantined
+        row(**{'Unique Product ID': "P6", 'Report Date': "someday"}),   # unreadable date: quarantined
+        row(**{'Stock Availability (Y/N)': None}),                      # duplicate of row 0, less complete
+        row(**{'Unique Product ID': "P7", 'Discount': "140%"}),         # out of range: blanked
+        row(**{'Unique Product ID': "P8", 'Selling Price': 120}),       # above MRP: both blanked
+        row(**{'Unique Product ID': "P9", 'Stock Availability (Y/N)': " no "}),  # normalized, clean
+    ])
+
+
+def test_quarantine_and_blank_counts():
+    raw = competition()
+    data, issues, summary = validate_competition(raw, CITIES)
+    rows = summary.set_index('check')['rows']
+
+    assert len(data) == 5
+    assert (rows['missing Brand Name'], rows['unknown city'], rows['Selling Price is not a number'],
+            rows['missing Report Date'], rows['duplicate key']) == (1, 1, 1, 1, 1)
+    assert rows['Discount outside 0-100%'] == 1 and rows['Selling Price above MRP'] == 1
+    assert rows.drop(['missing Brand Name', 'unknown city', 'Selling Price is not a number', 'missing Report Date',
+                      'duplicate key', 'Discount outside 0-100%', 'Selling Price above MRP']).eq(0).all()
+    assert issues['Action'].value_counts().to_dict() == {"quarantined": 5, "values blanked": 2}
+
+    # The more complete of the duplicates is kept
+    assert 0 in data.index and 6 not in data.index
+    assert np.isnan(data.loc[7, 'Discount'])
+    assert data.loc[8, ['Selling Price', 'MRP (₹)']].isna().all()
+    assert data.loc[9, 'Stock Availability (Y/N)'] == "No"
+    assert data['Report Date'].tolist() == [pd.Timestamp("2024-12-18"), pd.Timestamp("2024-12-20")] \
+        + [pd.Timestamp("2024-12-18")] * 3
+
+
+def test_report_dates_use_explicit_day_first_formats():
+    parsed = parse_report_dates(pd.Series(["01/02/2024", "01/02/24", "2024-02-01", None], dtype=object))
+    assert parsed.tolist()[:2] == [pd.Timestamp("2024-02-01")] * 2
+    assert parsed.iloc[2:].isna().all()
+    dates = pd.Series(pd.to_datetime(["2024-12-18"]))
+    assert parse_report_dates(dates) is dates
+
+
+def test_publish_writes_counts(tmp_path):
+    raw = competition()
+    _, issues, summary = validate_competition(raw, CITIES)
+    report = publish("competition", issues, summary, len(raw), output_dir=tmp_path)
+
+    assert (report['rows'], report['clean'], report['quarantined'], report['values_blanked']) == (10, 5, 5, 2)
+    assert json.loads((tmp_path / "competition_summary.json").read_text(encoding="utf-8")) == report
+    assert len(pd.read_csv(tmp_path / "competition_quarantine.csv")) == 7
@@ -0,0 +1,99 @@
+import sqlite3
+import types
+
+import pytest
+import streamlit as st
+
+from components import result_cache
+from components.result_cache import ResultCache, cache_key, cached, code_version
+
+
+def make_module(name, source):
+    module = types.ModuleType(name)
+    module.st = st
+    exec(source, module.__dict__)
+    return module
+
+
+def test_cache_key_ignores_container_type_and_order():
+    assert cache_key("f", "v", {"cities": ["Pune", "Delhi"], "n": 1}) == cache_key("f", "v", {"cities": ("Pune", "Delhi"), "n": 1})
+    assert cache_key("f", "v", {"cities": {"Pune", "Delhi"}}) == cache_key("f", "v", {"cities": {"Delhi", "Pune"}})
+    assert cache_key("f", "v", {"n": 1}) != cache_key("f", "v", {"n": 2})
+    assert cache_key("f", "v1", {"n": 1}) != cache_key("f", "v2", {"n": 1})
+
+
+def test_code_version_follows_helpers_and_constants():
+    base = "LIMIT = 3\ndef helper(x):\n    return x[:LIMIT]\ndef fn(x):\n    return helper(x)\n"
+    same = make_module("tests.fake_same", base)
+    changed_helper = make_module("tests.fake_helper", base.replace("x[:LIMIT]", "x[LIMIT:]"))
+    changed_constant = make_module("tests.fake_constant", base.replace("LIMIT = 3", "LIMIT = 4"))
+
+    assert code_version(same.fn) == code_version(make_module("tests.fake_again", base).fn)
+    assert code_version(same.fn) != code_version(changed_helper.fn)
+    assert code_version(same.fn) != code_version(changed_constant.fn)
+
+
+def test_code_version_sees_through_streamlit_caches():
+    base = (
+        "def rule(x):\n    return x + 1\n"
+        "@st.cache_resource\ndef load(x):\n    return rule(x)\n"
+        "def fn(x):\n    return load(x)\n"
+    )
+    changed = make_module("tests.fake_cached_changed", base.replace("x + 1", "x + 2"))
+    assert code_version(make_module("tests.fake_cached", base).fn) != code_version(changed.fn)
+
+
+def test_hits_survive_a_new_process_and_old_versions_are_purged(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    assert cache.get_or_compute("f", "v1", {"n": 1}, lambda: [1]) == [1]
+    # Served from the disk tier by a fresh instance, not recomputed
+    assert ResultCache(cache_dir=str(tmp_path)).get_or_compute("f", "v1", {"n": 1}, lambda: [2]) == [1]
+
+    fresh = ResultCache(cache_dir=str(tmp_path))
+    assert fresh.get_or_compute("f", "v2", {"n": 1}, lambda: [3]) == [3]
+    with sqlite3.connect(tmp_path / "results.sqlite") as db:
+        assert db.execute("SELECT DISTINCT version FROM results WHERE name = 'f'").fetchall() == [("v2",)]
+
+
+def test_results_are_copies(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    first = cache.get_or_compute("f", "v", {}, lambda: {"rows": [1]})
+    first["rows"].append(2)
+    assert cache.get_or_compute("f", "v", {}, lambda: None) == {"rows": [1]}
+
+
+def test_expired_entries_are_recomputed(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path), ttl_seconds=0)
+    cache.get_or_compute("f", "v", {}, lambda: 1)
+    assert cache.get_or_compute("f", "v", {}, lambda: 2) == 2
+
+
+def test_unreadable_disk_tier_is_a_miss(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    (tmp_path / "results.sqlite").write_bytes(b"not a database" * 100)
+    assert cache.get_or_compute("f", "v", {}, lambda: 5) == 5
+
+
+def test_cached_invalidates_when_the_source_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "_cache", ResultCache(cache_dir=str(tmp_path / "cache")))
+    source = tmp_path / "data.csv"
+    source.write_text("a")
+    calls = []
+
+    @cached()
+    def rows(filters, file_path=str(source)):
+        calls.append(filters)
+        return open(file_path).read()
+
+    assert rows(("x",)) == "a"
+    assert rows(["x"]) == "a"
+    assert len(calls) == 1
+
+    source.write_text("bb")
+    assert rows(("x",)) == "bb"
+    assert len(calls) == 2
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(result_cache, "ENABLED", True)
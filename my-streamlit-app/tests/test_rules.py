@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sample.rules import DEFAULT_RULES, VALIDATION_COLUMNS, HygieneRules
+
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "src", "sample", "Demo-Hygine Data V3.xlsx")
+
+
+@pytest.fixture(scope="module")
+def workbook():
+    return pd.read_excel(WORKBOOK)
+
+
+@pytest.mark.parametrize("column", VALIDATION_COLUMNS)
+def test_default_rules_reproduce_the_workbook_flags(workbook, column):
+    expected = pd.to_numeric(workbook[column], errors="coerce").to_numpy(dtype=float)
+    computed = DEFAULT_RULES.validate(workbook)[column].to_numpy(dtype=float)
+    # Same blanks, same 1.0 / 0.0 everywhere else
+    assert np.array_equal(np.isnan(expected), np.isnan(computed))
+    assert np.array_equal(expected[~np.isnan(expected)], computed[~np.isnan(computed)])
+
+
+def test_price_tolerance_band():
+    rule = pd.Series([100.0, 100.0, 100.0, np.nan, 200.0])
+    live = pd.Series([100.0, 101.5, 103.0, 50.0, np.nan])
+    assert np.allclose(DEFAULT_RULES.validate_price(rule, live), [1, 0, 0, np.nan, np.nan], equal_nan=True)
+    # The wider of the absolute and percentage bands applies
+    assert np.allclose(HygieneRules(price_tolerance=2).validate_price(rule, live)[:3], [1, 1, 0])
+    assert np.allclose(HygieneRules(price_tolerance_pct=3).validate_price(rule, live)[:3], [1, 1, 1])
+
+
+def test_flag_spellings_are_equivalent():
+    rule = pd.Series(["Yes", "yes ", "No", "Y", None, "No"])
+    live = pd.Series(["LIVE", "no", None, "true", "yes", "Not Live"])
+    assert np.allclose(DEFAULT_RULES.validate_flag(rule, live), [1, 0, 1, 1, np.nan, 1], equal_nan=True)
+
+
+def test_version_tracks_settings():
+    assert HygieneRules().version == DEFAULT_RULES.version
+    assert HygieneRules(price_tolerance=1).version != DEFAULT_RULES.version
+    assert HygieneRules(flag_equivalents={"y": "yes"}).version != DEFAULT_RULES.version
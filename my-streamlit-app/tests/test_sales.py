@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sample.sales import SalesEngine
+
+
+def sales_rows(start, days, categories=("Snacks", "Drinks")):
+    dates = pd.date_range(start, periods=days)
+    rows = pd.MultiIndex.from_product([dates, categories], names=['Date', 'Category']).to_frame(index=False)
+    rows['GMV'] = np.arange(1, len(rows) + 1, dtype=float)
+    rows['GMV_target'] = rows['Category'].map({"Snacks": 3100.0, "Drinks": 0.0})
+    return rows
+
+
+def brute_force_mtd(rows, category, as_of):
+    as_of = pd.Timestamp(as_of)
+    month = rows[(rows['Category'] == category) & (rows['Date'] <= as_of)
+                 & (rows['Date'].dt.to_period('M') == as_of.to_period('M'))]
+    return month['GMV'].sum()
+
+
+def test_cumulative_totals_restart_each_month_across_updates():
+    rows = sales_rows("2025-01-20", 25)
+    engine = SalesEngine()
+    # Folded in two batches that split a month
+    assert engine.update(rows[rows['Date'] <= "2025-01-28"]) == 9
+    assert engine.update(rows) == 16
+    assert engine.update(rows) == 0
+
+    for as_of in ("2025-01-20", "2025-01-28", "2025-01-31", "2025-02-01", "2025-02-13"):
+        snapshot = engine.snapshot(as_of).set_index('Category')
+        for category in ("Snacks", "Drinks"):
+            assert snapshot.loc[category, 'MTD GMV'] == pytest.approx(brute_force_mtd(rows, category, as_of))
+
+
+def test_duplicate_rows_are_summed_and_gaps_stay_blank():
+    rows = pd.concat([sales_rows("2025-03-01", 3, ("Snacks",)), sales_rows("2025-03-01", 1, ("Snacks",))])
+    rows = pd.concat([rows, pd.DataFrame({'Date': [pd.Timestamp("2025-03-05")], 'Category': ["Snacks"],
+                                          'GMV': [10.0], 'GMV_target': [3100.0]})])
+    engine = SalesEngine()
+    engine.update(rows)
+    assert engine.gmv[0, 0] == 2.0
+    assert np.isnan(engine.gmv[0, 3])
+    assert engine.snapshot("2025-03-04").iloc[0]['MTD GMV'] == 7.0
+    assert engine.snapshot().iloc[0]['MTD GMV'] == 17.0
+
+
+def test_snapshot_attainment_and_bounds():
+    engine = SalesEngine()
+    engine.update(sales_rows("2025-01-01", 10))
+    snapshot = engine.snapshot().set_index('Category')
+
+    assert snapshot.loc['Snacks', 'As Of'] == pd.Timestamp("2025-01-10").date()
+    assert snapshot.loc['Snacks', 'Target to Date'] == 1000.0
+    assert snapshot.loc['Snacks', 'Attainment to Date %'] == pytest.approx(
+        snapshot.loc['Snacks', 'MTD GMV'] / 10)
+    # No positive target, no attainment
+    assert np.isnan(snapshot.loc['Drinks', 'Projected Attainment %'])
+    # Later dates clamp to the last day with actuals, earlier ones have nothing to report
+    assert engine.snapshot("2025-06-01").equals(engine.snapshot())
+    assert engine.snapshot("2024-12-31").empty
+    assert engine.series("Snacks", "2024-12-31").empty
+    assert SalesEngine().snapshot().empty
+
+
+def test_series_covers_the_whole_month():
+    engine = SalesEngine()
+    engine.update(sales_rows("2025-02-01", 10))
+    series = engine.series("Snacks")
+    assert len(series) == 28
+    assert series['Cumulative GMV'].iloc[9] == engine.snapshot().set_index('Category').loc['Snacks', 'MTD GMV']
+    assert series['Cumulative GMV'].iloc[10:].isna().all()
+    assert series['Projected GMV'].iloc[-1] == pytest.approx(series['Cumulative GMV'].iloc[9] / 10 * 28)
+    assert engine.series("Unknown").empty
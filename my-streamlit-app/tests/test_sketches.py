@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from components.sketches import QUANTILES, QuantileSketchStore, compress, quantiles
+
+
+def rank_error(values, estimate, q):
+    # How far the estimate's rank is from the requested one, as a fraction of all values
+    return abs(np.searchsorted(np.sort(values), estimate) / values.size - q)
+
+
+def competition_rows(rng, n_days=5, n_cities=4, per_sketch=2000):
+    dates = pd.date_range("2024-12-01", periods=n_days)
+    cities = [f"City {i}" for i in range(n_cities)]
+    rows = pd.MultiIndex.from_product([dates, cities, range(per_sketch)]).to_frame(index=False)
+    prices = rng.lognormal(mean=5, sigma=0.6, size=len(rows))
+    return pd.DataFrame({
+        'Brand Name': 'Acme', 'Category': 'Snacks', 'Platform': 'Blinkit',
+        'City': rows[1], 'Report Date': rows[0],
+        'Selling Price': prices, 'MRP (₹)': prices * 1.2, 'Discount': rng.uniform(0, 40, len(rows)),
+    })
+
+
+def test_single_digest_rank_error_is_small():
+    values = np.random.default_rng(7).lognormal(mean=5, sigma=0.6, size=50_000)
+    means, weights = compress(values, np.ones(values.size))
+
+    assert means.size <= 100
+    assert weights.sum() == values.size
+    estimates = quantiles(means, weights, values.min(), values.max(), list(QUANTILES.values()))
+    for estimate, q in zip(estimates, QUANTILES.values()):
+        assert rank_error(values, estimate, q) < 0.01
+
+
+def test_merged_sketches_match_raw_quantiles():
+    data = competition_rows(np.random.default_rng(11))
+    store = QuantileSketchStore()
+    assert store.update(data) == 20
+
+    summary = store.summary('Selling Price', group_by='Brand Name').iloc[0]
+    values = data['Selling Price'].to_numpy()
+    assert summary['count'] == values.size
+    assert summary['mean'] == pytest.approx(values.mean())
+    assert summary['min'] == values.min() and summary['max'] == values.max()
+    for name, q in QUANTILES.items():
+        assert rank_error(values, summary[name], q) < 0.01
+
+
+def test_filters_and_incremental_updates():
+    data = competition_rows(np.random.default_rng(3))
+    store = QuantileSketchStore()
+    first_days = data['Report Date'] <= pd.Timestamp("2024-12-03")
+    store.update(data[first_days])
+    store.update(data)
+    # Dates already sketched are not sketched twice
+    assert store.update(data) == 0
+
+    summary = store.summary('Discount', group_by='City', date_from="2024-12-02", date_to="2024-12-04",
+                            cities=["City 1", "City 2"])
+    assert list(summary['City']) == ["City 1", "City 2"]
+    window = data[data['Report Date'].between("2024-12-02", "2024-12-04") & data['City'].eq("City 1")]
+    assert summary.iloc[0]['count'] == len(window)
+    assert rank_error(window['Discount'].to_numpy(), summary.iloc[0]['median'], 0.5) < 0.01
@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+from components.text_index import B, K1, TextIndex, normalize, tokenize
+
+POSTS = [
+    "Haldiram bhujia, crunchy namkeen 😋",
+    "Limited edition bhujia pack",
+    "New namkeen launch #ad",
+    "Crunchy snacks for the weekend",
+    "Hör mal: limited offer on snacks ❤️",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return TextIndex(POSTS)
+
+
+def matches(index, query):
+    _, docs, _ = index.search(query, per_page=None)
+    return sorted(docs.tolist())
+
+
+def test_normalize_and_tokenize():
+    assert normalize("Hör ＦＵＬＬ Straße") == "hor full strasse"
+    # Marks on Indic scripts are part of the word
+    assert tokenize("हल्दीराम भुजिया") == ["हल्दीराम", "भुजिया"]
+    assert tokenize("love ❤️ it") == tokenize("love ❤ it") == ["love", "❤", "it"]
+
+
+def test_boolean_operators(index):
+    assert matches(index, "bhujia") == [0, 1]
+    assert matches(index, "bhujia namkeen") == [0]
+    assert matches(index, "bhujia AND namkeen") == [0]
+    assert matches(index, "bhujia OR snacks") == [0, 1, 3, 4]
+    assert matches(index, "namkeen -ad") == [0]
+    assert matches(index, "namkeen NOT ad") == [0]
+    assert matches(index, "(bhujia OR namkeen) crunchy") == [0]
+    assert matches(index, "NOT bhujia") == [2, 3, 4]
+    assert matches(index, "hor") == [4]
+
+
+def test_phrases(index):
+    assert matches(index, '"limited edition"') == [1]
+    assert matches(index, '"edition limited"') == []
+    assert matches(index, '"limited offer" OR "crunchy snacks"') == [3, 4]
+
+
+def test_dangling_operators_match_nothing(index):
+    for query in ("NOT", "-", "NOT NOT", "bhujia NOT", "bhujia AND", "OR", "(", ")", "", "   "):
+        assert index.search(query)[0] == 0, query
+
+
+def test_bm25_ranks_rarer_and_denser_matches_first(index):
+    total, docs, scores = index.search("crunchy OR limited OR bhujia")
+    assert total == 4
+    assert np.all(np.diff(scores) <= 0)
+
+    # Score of one document by hand
+    n, avg = len(POSTS), index.avg_length
+    def term_score(df, tf, length):
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        return idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg))
+    expected = term_score(2, 1, 5) + term_score(2, 1, 5)
+    assert scores[docs.tolist().index(0)] == pytest.approx(expected)
+
+
+def test_paging(index):
+    total, everything, _ = index.search("snacks OR bhujia OR namkeen", per_page=None)
+    first = index.search("snacks OR bhujia OR namkeen", page=1, per_page=2)[1]
+    second = index.search("snacks OR bhujia OR namkeen", page=2, per_page=2)[1]
+    assert total == 5
+    assert np.concatenate([first, second]).tolist() == everything[:4].tolist()
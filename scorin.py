@@ -1,12 +1,13 @@
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime
+from datetime import date
 
 # Function to load data
 def load_data(file_path):
     if os.path.exists(file_path):
-        return pd.read_excel(file_path)
+        return pd.read_excel(file_path, parse_dates=['Report Date'])
     else:
         st.error(f"Source data file not found: {file_path}")
         return None
@@ -22,7 +23,7 @@ def create_top_container(data):
         
     with col2:
         st.subheader("Select Date")
-        selected_date = st.date_input("Date", datetime.date(2024, 12, 17))
+        selected_date = st.date_input("Date", date(2024, 12, 17))
         
     with col3:
         st.subheader("Select Platform")
@@ -59,19 +60,19 @@ def bottom_container(filtered_data):
             filtered_data['Availability Binary'] = filtered_data['Stock Availability (Y/N)'].apply(lambda x: 1 if x == 'Yes' else 0)
             
             # Calculate availability percentage for each brand
-            availability_percentage = filtered_data.groupby('Brand')['Availability Binary'].mean().reset_index()
-            availability_percentage.columns = ['Brand', 'Availability Proportion']
+            availability_percentage = filtered_data.groupby('Brand Name')['Availability Binary'].mean().reset_index()
+            availability_percentage.columns = ['Brand Name', 'Availability Proportion']
             
             # Convert proportion to percentage
             availability_percentage['Availability Percentage'] = availability_percentage['Availability Proportion'] * 100
             
             # Merge availability percentage with the original data
-            filtered_data = filtered_data.merge(availability_percentage, on='Brand', how='left')
+            filtered_data = filtered_data.merge(availability_percentage, on='Brand Name', how='left')
             
             # Grouped bar chart for discount and availability by brand
             fig = px.bar(
                 filtered_data,
-                x='Brand',
+                x='Brand Name',
                 y=['Discount', 'Availability Percentage'],
                 barmode='group',
                 title='Availability % and Avg Discount % by Brand'
@@ -99,7 +100,8 @@ def run():
         if selected_categories:
             filtered_data = filtered_data[filtered_data['Category'].isin(selected_categories)]
         if selected_date:
-            filtered_data = filtered_data[filtered_data['Report Date'] == selected_date]
+            # Report Date is a Timestamp column, compare against the picked day as one
+            filtered_data = filtered_data[filtered_data['Report Date'] == pd.Timestamp(selected_date)]
         if selected_platforms:
             filtered_data = filtered_data[filtered_data['Platform'].isin(selected_platforms)]
         if selected_cities: